@@ -1,17 +1,33 @@
 import os
 import re
 import time
+import platform
+import importlib.util
+import queue
+import threading
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
 import cv2
 import yaml
+import json
+import uuid
 import base64
 import tempfile
 import logging
 import numpy as np
-from io import BytesIO
+import torch
 from pathlib import Path
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 from ultralytics import YOLO
-from flask import Flask, request, jsonify, render_template_string, send_from_directory
+from ultralytics.engine.results import BatchResults, Results
+from ultralytics.trackers.byte_tracker import BYTETracker
+from ultralytics.utils import IterableSimpleNamespace, yaml_load
+from ultralytics.utils.checks import check_yaml
+from flask import Flask, Response, request, jsonify, render_template_string, send_from_directory
 from flask_cors import CORS
 import shutil
 
@@ -27,8 +43,57 @@ DEBUG_SAVE_DIR = os.path.join(TEMP_DIR, "debug_frames")
 for dir_path in [PROCESSED_VIDEO_DIR, DEBUG_SAVE_DIR]:
     os.makedirs(dir_path, exist_ok=True)
 
+# 模型池：启动即加载并预热，按CPU核数创建副本，支持热替换
+PRELOAD_MODEL = os.getenv("GARBAGE_PRELOAD_MODEL", "True").lower() == "true"
+MODEL_REPLICAS = int(os.getenv("GARBAGE_MODEL_REPLICAS", "0")) or max(1, min(4, (os.cpu_count() or 1) // 2))
+SERVED_IMGSZ = tuple(int(x) for x in os.getenv("GARBAGE_SERVED_IMGSZ", "640,480,320").split(","))  # 预热的推理尺寸
+EXTRA_MODEL_PATHS = [str(Path(p).resolve()) for p in os.getenv("GARBAGE_EXTRA_MODEL_PATHS", "").split(",") if p]
+
+# 推理后端：auto（导出ONNX/OpenVINO并与.pt在本机对比，选最快）/ pt / onnx / openvino
+SERVE_BACKEND = os.getenv("GARBAGE_BACKEND", "auto").lower()
+BACKEND_INT8 = os.getenv("GARBAGE_BACKEND_INT8", "False").lower() == "true"  # OpenVINO INT8量化（需nncf）
+CALIB_IMAGE_DIR = str(Path(os.getenv("GARBAGE_CALIB_DIR", "MyDataset/JPEGImages")).resolve())  # 量化校准/基准测试图片
+CALIB_IMAGE_COUNT = int(os.getenv("GARBAGE_CALIB_IMAGES", "300"))
+BENCHMARK_RUNS = int(os.getenv("GARBAGE_BENCHMARK_RUNS", "20"))  # 每个尺寸的计时推理次数
+BACKEND_RECORD_FILE = "serve_backend.json"  # 保存在权重同目录，记录基准测试结论，重启时直接复用
+
 DEBUG_SAVE_FRAME = os.getenv("DEBUG_SAVE_FRAME", "False").lower() == "true"
 MAX_HISTORY_LENGTH = 20
+JPEG_QUALITY = int(os.getenv("GARBAGE_JPEG_QUALITY", "85"))  # 返回图像的JPEG质量，可被请求参数quality覆盖
+
+# 微批推理：在时间窗口内收集多个客户端的帧，合并为一个batch推理
+BATCH_WINDOW_MS = float(os.getenv("GARBAGE_BATCH_WINDOW_MS", "10"))  # 收集窗口（毫秒），建议5~15
+MAX_BATCH_SIZE = int(os.getenv("GARBAGE_MAX_BATCH_SIZE", "8"))  # 单批最大帧数
+MAX_QUEUE_SIZE = int(os.getenv("GARBAGE_MAX_QUEUE_SIZE", "64"))  # 请求队列上限，超出直接拒绝
+INFER_TIMEOUT = float(os.getenv("GARBAGE_INFER_TIMEOUT", "10"))  # 单个请求等待结果的超时（秒）
+
+# 多进程推理：>0时启动N个推理进程，各自持有模型副本并绑定到独立的CPU核集合，帧经共享内存环形缓冲区传递
+WORKER_PROCESSES = int(os.getenv("GARBAGE_WORKER_PROCESSES", "0"))
+SHM_SLOT_MB = float(os.getenv("GARBAGE_SHM_SLOT_MB", "8"))  # 单个槽位容量，8MB可容纳1920x1080的BGR帧
+SHM_SLOTS = int(os.getenv("GARBAGE_SHM_SLOTS", "0")) or 2 * MAX_BATCH_SIZE  # 每个进程环形缓冲区的槽位数
+
+# 自适应：按实测延迟和队列积压在已预热尺寸（SERVED_IMGSZ）间切换imgsz，并放宽视频采样间隔
+ADAPTIVE = os.getenv("GARBAGE_ADAPTIVE", "True").lower() == "true"
+TARGET_LATENCY_MS = float(os.getenv("GARBAGE_TARGET_LATENCY_MS", "200"))  # 单帧/单图推理延迟目标（含排队）
+VIDEO_TARGET_FPS = float(os.getenv("GARBAGE_VIDEO_TARGET_FPS", "25"))  # 视频处理速度目标（输入帧/秒），0为不调整
+ADAPT_COOLDOWN = float(os.getenv("GARBAGE_ADAPT_COOLDOWN", "2"))  # 两次尺寸调整的最小间隔（秒）
+
+# 视频流水线：解码 / 批量推理 / 绘制 / 编码 分线程并行
+VIDEO_BATCH_SIZE = int(os.getenv("GARBAGE_VIDEO_BATCH_SIZE", "4"))  # 每次前向推理的采样帧数
+VIDEO_QUEUE_SIZE = int(os.getenv("GARBAGE_VIDEO_QUEUE_SIZE", "32"))  # 各级之间队列的容量
+
+# 异步视频任务
+VIDEO_JOB_WORKERS = int(os.getenv("GARBAGE_VIDEO_JOB_WORKERS", "2"))  # 同时处理的视频任务数
+MAX_PENDING_JOBS = int(os.getenv("GARBAGE_MAX_PENDING_JOBS", "16"))  # 排队+运行中任务上限
+JOB_RETENTION_SECONDS = int(os.getenv("GARBAGE_JOB_RETENTION_SECONDS", "86400"))  # 已结束任务及其视频的保留时长
+JOB_CLEANUP_INTERVAL = int(os.getenv("GARBAGE_JOB_CLEANUP_INTERVAL", "600"))  # 保留策略检查间隔（秒）
+
+# 实时帧复用：画面几乎不变时复用上次检测结果，并用ByteTrack平滑跨帧的框和标签
+FRAME_REUSE = os.getenv("GARBAGE_FRAME_REUSE", "True").lower() == "true"
+FRAME_DIFF_THRESHOLD = float(os.getenv("GARBAGE_FRAME_DIFF_THRESHOLD", "4.0"))  # 32x32灰度签名的平均绝对差（0~255）
+MAX_REUSE_FRAMES = int(os.getenv("GARBAGE_MAX_REUSE_FRAMES", "15"))  # 连续复用上限，到达后强制推理一次
+SESSION_TTL = int(os.getenv("GARBAGE_SESSION_TTL", "300"))  # 会话空闲多久后丢弃跟踪状态（秒）
+TRACKER_ARGS = IterableSimpleNamespace(**yaml_load(check_yaml("bytetrack.yaml")))
 
 # ------------------ 日志配置 ------------------
 logger = logging.getLogger(__name__)
@@ -48,13 +113,14 @@ logger.addHandler(file_handler)
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": ["http://localhost:5000", "http://127.0.0.1:5000"]}})
 
-model = None
+model_registry = None
 model_loaded = False
 big_category_mapping = {}
 big_category_names = {}
 small_category_names = {}
 history_messages = []
 is_detecting_flag = False
+inference_worker = None
 
 # ------------------ 前端页面模板 ------------------
 INDEX_HTML = """
@@ -74,6 +140,69 @@ INDEX_HTML = """
 
 
 # ------------------ 工具函数 ------------------
+class JpegCodec:
+    """JPEG编解码：优先使用PyTurboJPEG（可选依赖，需libturbojpeg），否则回退到cv2.imencode/imdecode"""
+
+    def __init__(self):
+        self._turbo = None
+        try:
+            from turbojpeg import TurboJPEG
+
+            self._turbo = TurboJPEG()
+            logger.info("JPEG编解码使用TurboJPEG")
+        except Exception:
+            pass  # 未安装PyTurboJPEG或缺少libturbojpeg时使用cv2
+        self._params = {}  # quality -> cv2编码参数，复用避免每帧重建
+
+    @property
+    def backend(self):
+        return "turbojpeg" if self._turbo is not None else "cv2"
+
+    def encode(self, img_bgr, quality=JPEG_QUALITY):
+        """BGR数组 → JPEG字节；失败返回None"""
+        quality = int(min(max(quality, 1), 100))
+        if self._turbo is not None:
+            return self._turbo.encode(img_bgr, quality=quality)
+        params = self._params.get(quality)
+        if params is None:
+            params = self._params[quality] = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        ok, buf = cv2.imencode('.jpg', img_bgr, params)
+        return buf.tobytes() if ok else None
+
+    def decode(self, data):
+        """图像字节 → BGR数组；JPEG走TurboJPEG，其余格式（PNG/WebP）走cv2；失败返回None"""
+        if self._turbo is not None and data[:2] == b"\xff\xd8":
+            try:
+                return self._turbo.decode(data)
+            except Exception:
+                pass  # 非标准JPEG交给cv2再试一次
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+jpeg_codec = JpegCodec()
+
+
+def bytes_to_cv2(img_bytes):
+    """原始图像字节解码并做尺寸校验，返回 (img, "ok") 或 (None, 错误信息)"""
+    try:
+        if not img_bytes:
+            return None, "图像数据为空"
+        img = jpeg_codec.decode(img_bytes)
+        if img is None:
+            return None, "无法解码为图像（格式错误或损坏）"
+
+        h, w = img.shape[:2]
+        if h < 20 or w < 20:
+            return None, f"图像尺寸过小: {w}x{h}（最小20x20）"
+        if h > 4000 or w > 4000:
+            return None, f"图像尺寸过大: {w}x{h}（最大4000x4000）"
+
+        return img, "ok"
+    except Exception as e:
+        logger.exception("bytes_to_cv2 异常")
+        return None, f"处理失败: {str(e)}"
+
+
 def base64_to_cv2(base64_str):
     try:
         if not base64_str or not isinstance(base64_str, str):
@@ -92,19 +221,7 @@ def base64_to_cv2(base64_str):
             base64_data += "=" * pad_count
 
         img_bytes = base64.b64decode(base64_data, validate=True)
-        arr = np.frombuffer(img_bytes, dtype=np.uint8)
-        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-
-        if img is None:
-            return None, "无法解码为图像（格式错误或损坏）"
-
-        h, w = img.shape[:2]
-        if h < 20 or w < 20:
-            return None, f"图像尺寸过小: {w}x{h}（最小20x20）"
-        if h > 4000 or w > 4000:
-            return None, f"图像尺寸过大: {w}x{h}（最大4000x4000）"
-
-        return img, "ok"
+        return bytes_to_cv2(img_bytes)
     except base64.binascii.Error as e:
         logger.error(f"Base64解码错误: {str(e)}")
         return None, f"Base64格式错误: {str(e)}"
@@ -113,7 +230,7 @@ def base64_to_cv2(base64_str):
         return None, f"处理失败: {str(e)}"
 
 
-def cv2_to_base64(img_bgr, quality=85):
+def cv2_to_base64(img_bgr, quality=JPEG_QUALITY):
     try:
         if img_bgr is None:
             logger.error("cv2_to_base64: 输入图像为空")
@@ -125,91 +242,1670 @@ def cv2_to_base64(img_bgr, quality=85):
             scale = max_size / max(h, w)
             img_bgr = cv2.resize(img_bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
 
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB) if len(img_bgr.shape) == 3 else img_bgr
-        pil = Image.fromarray(img_rgb)
-        buf = BytesIO()
-        pil.save(buf, format='JPEG', quality=quality, optimize=True)
-        b64 = base64.b64encode(buf.getvalue()).decode()
-        return "data:image/jpeg;base64," + b64
-    except Exception as e:
+        jpeg = jpeg_codec.encode(img_bgr, quality)
+        if jpeg is None:
+            return None
+        return "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()
+    except Exception:
         logger.exception("cv2_to_base64 异常")
         return None
 
 
-def draw_detection_results(pil_img, img_bgr, results):
-    draw = ImageDraw.Draw(pil_img)
-    font_paths = ["C:/Windows/Fonts/simhei.ttf", "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"]
-    font = None
-    for path in font_paths:
-        if os.path.exists(path):
+class DetectionRenderer:
+    """
+    检测结果绘制器：字体只加载一次，40个类别的标签文字在加载YAML时预先渲染成灰度位图，
+    置信度文字按"0.00"~"1.00"缓存；绘制时直接在BGR数组上用NumPy贴图，不经过PIL整图转换。
+    """
+
+    FONT_PATHS = ["C:/Windows/Fonts/simhei.ttf", "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"]
+    BOX_COLOR = (0, 255, 0)  # BGR
+
+    def __init__(self, font_size=18):
+        self.font_size = font_size
+        self._font = None
+        self._line_height = 0
+        self._label_masks = {}  # cls_idx -> "大类/小类 " 位图
+        self._conf_masks = {}  # "0.87" -> 位图
+        self._big_lookup = np.full(0, -1, dtype=np.int64)
+        self.categories_key = None  # 当前预渲染所对应的类别配置
+
+    def load_font(self):
+        if self._font is None:
+            for path in self.FONT_PATHS:
+                if os.path.exists(path):
+                    try:
+                        self._font = ImageFont.truetype(path, self.font_size)
+                        break
+                    except Exception:
+                        continue
+            if self._font is None:
+                self._font = ImageFont.load_default()
+                logger.warning("未找到中文字体，使用默认字体")
+            bbox = self._font.getbbox("国Ag0")
+            self._line_height = bbox[3] + 2
+        return self._font
+
+    def _render_text(self, text):
+        """把文字渲染为uint8灰度位图（255为笔画），高度固定为行高以便横向拼接"""
+        font = self.load_font()
+        width = max(1, int(np.ceil(font.getlength(text))) + 4)
+        canvas = Image.new("L", (width, self._line_height), 0)
+        ImageDraw.Draw(canvas).text((2, 0), text, fill=255, font=font)
+        return np.asarray(canvas)
+
+    def set_categories(self, small_names, big_mapping, big_names):
+        """根据YAML中的类别信息预渲染所有标签，并建立小类→大类的查找数组"""
+        key = (id(small_names), id(big_mapping), id(big_names))
+        if key == self.categories_key:
+            return
+        n = max([int(k) for k in small_names] + [int(k) for k in big_mapping] + [-1]) + 1
+        lookup = np.full(n, -1, dtype=np.int64)
+        for k, v in big_mapping.items():
+            lookup[int(k)] = int(v)
+        self._big_lookup = lookup
+        self._label_masks = {}
+        self.categories_key = key
+        for cls_idx in range(n):
+            self._label_mask(cls_idx)
+
+    def category_names(self, cls_idx, big_idx):
+        small_name = small_category_names.get(cls_idx, f"未知类别({cls_idx})")
+        big_name = big_category_names.get(big_idx, f"未知大类({big_idx})") if big_idx != -1 else "未知大类"
+        return big_name, small_name
+
+    def big_indices(self, cls):
+        """向量化的小类→大类映射，未知类别为-1"""
+        valid = (cls >= 0) & (cls < len(self._big_lookup))
+        big = np.full(cls.shape, -1, dtype=np.int64)
+        big[valid] = self._big_lookup[cls[valid]]
+        return big
+
+    def _label_mask(self, cls_idx):
+        mask = self._label_masks.get(cls_idx)
+        if mask is None:
+            big_idx = int(self.big_indices(np.array([cls_idx]))[0])
+            big_name, small_name = self.category_names(cls_idx, big_idx)
+            mask = self._label_masks[cls_idx] = self._render_text(f"{big_name}/{small_name} ")
+        return mask
+
+    def _conf_mask(self, conf):
+        text = f"{conf:.2f}"
+        mask = self._conf_masks.get(text)
+        if mask is None:
+            mask = self._conf_masks[text] = self._render_text(text)
+        return mask
+
+    @staticmethod
+    def _blit_label(img, x, y, mask):
+        """绿色底黑色字：G通道 = 255 - 笔画灰度，B/R通道为0，一次数组赋值完成"""
+        h, w = mask.shape
+        img_h, img_w = img.shape[:2]
+        x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, img_w), min(y + h, img_h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        region = img[y0:y1, x0:x1]
+        region[...] = 0
+        region[..., 1] = 255 - mask[y0 - y:y1 - y, x0 - x:x1 - x]
+
+    def draw(self, img_bgr, results, annotate=True):
+        """
+        在img_bgr上原地绘制检测框和标签，返回 (img_bgr, detected)；annotate=False时只提取检测结果不绘制。
+        每个Results只做一次 boxes.data → host 的拷贝，坐标归一化和大类映射均为数组运算。
+        """
+        detected = []
+        img_height, img_width = img_bgr.shape[:2]
+        self.load_font()  # 确保字体和行高已初始化
+
+        for res in results:
+            try:
+                boxes = getattr(res, "boxes", None)
+                if boxes is None or len(boxes) == 0:
+                    continue
+                data = boxes.data
+                data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+                xyxy = data[:, :4].astype(np.int64)  # 与int()一致：向零截断
+                conf = data[:, -2].astype(np.float64)
+                cls = data[:, -1].astype(np.int64)
+                big = self.big_indices(cls)
+                if img_width != 0 and img_height != 0:
+                    xyxyn = np.round(xyxy / np.array([img_width, img_height, img_width, img_height]), 4)
+                else:
+                    xyxyn = np.zeros(xyxy.shape, dtype=np.float64)
+                conf_r = np.round(conf, 4)
+
+                for i in range(len(data)):
+                    cls_idx, big_idx = int(cls[i]), int(big[i])
+                    big_name, small_name = self.category_names(cls_idx, big_idx)
+                    nx1, ny1, nx2, ny2 = xyxyn[i].tolist()
+                    # 后端不再生成AI介绍，改为空字符串，由前端填充
+                    detected.append({
+                        "label": f"{big_name}/{small_name}",
+                        "big_name": big_name,
+                        "small_name": small_name,
+                        "confidence": float(conf_r[i]),
+                        "x1": nx1, "y1": ny1, "x2": nx2, "y2": ny2,
+                        "introduction": ""  # 前端填充介绍
+                    })
+
+                    if not annotate:
+                        continue
+                    x1, y1, x2, y2 = xyxy[i].tolist()
+                    cv2.rectangle(img_bgr, (x1, y1), (x2, y2), self.BOX_COLOR, 3)
+                    label = np.hstack((self._label_mask(cls_idx), self._conf_mask(conf[i])))
+                    label_y = y1 - label.shape[0] if y1 - label.shape[0] >= 0 else y1
+                    self._blit_label(img_bgr, x1, label_y, label)
+            except Exception as e:
+                logger.exception(f"绘制检测结果失败: {str(e)}")
+                continue
+
+        return img_bgr, detected
+
+
+renderer = DetectionRenderer()
+
+
+def draw_detection_results(img_bgr, results, annotate=True):
+    """在BGR图像上原地绘制检测结果，返回 (img_bgr, detected)；annotate=False时仅返回检测结果"""
+    if renderer.categories_key is None and small_category_names:
+        renderer.set_categories(small_category_names, big_category_mapping, big_category_names)
+    return renderer.draw(img_bgr, results, annotate=annotate)
+
+
+# ------------------ 推理后端导出与自动选择 ------------------
+BACKEND_RUNTIMES = {"onnx": "onnxruntime", "openvino": "openvino"}  # 导出格式 → 推理所需的Python包
+
+
+def available_backends():
+    """本机已安装运行时的导出格式（不在服务启动时自动pip安装依赖）"""
+    return [fmt for fmt, module in BACKEND_RUNTIMES.items() if importlib.util.find_spec(module) is not None]
+
+
+def _calibration_images(limit):
+    if not os.path.isdir(CALIB_IMAGE_DIR):
+        return []
+    files = sorted(f for f in os.listdir(CALIB_IMAGE_DIR) if f.lower().endswith((".jpg", ".jpeg", ".png", ".bmp")))
+    return [os.path.join(CALIB_IMAGE_DIR, f) for f in files[:limit]]
+
+
+def _calibration_yaml(pt_path):
+    """为INT8量化生成数据集YAML：从MyDataset取校准图片列表，类别名沿用lajifenlei.yaml"""
+    images = _calibration_images(CALIB_IMAGE_COUNT)
+    if not images:
+        raise FileNotFoundError(f"未找到校准图片: {CALIB_IMAGE_DIR}")
+    cache_dir = Path(pt_path).parent
+    list_file = cache_dir / "int8_calib.txt"
+    list_file.write_text("\n".join(images), encoding="utf-8")
+    with open(YAML_PATH, 'r', encoding='utf-8-sig') as f:
+        names = yaml.safe_load(f).get("names", {})
+    data_file = cache_dir / "int8_calib.yaml"
+    with open(data_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump({"path": str(cache_dir), "train": list_file.name, "val": list_file.name, "names": names},
+                       f, allow_unicode=True)
+    return str(data_file)
+
+
+def _backend_record_key(pt_path):
+    """主机 + 权重文件 + 服务尺寸 + 量化选项，任一变化都需要重新导出和基准测试"""
+    st = os.stat(pt_path)
+    imgsz = "x".join(str(x) for x in SERVED_IMGSZ)
+    return f"{platform.node()}|cpu{os.cpu_count()}|{st.st_size}|{int(st.st_mtime)}|{imgsz}|int8={BACKEND_INT8}"
+
+
+def _read_backend_record(record_file):
+    try:
+        with open(record_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def export_backend(pt_path, fmt):
+    """导出为ONNX/OpenVINO（动态batch和输入尺寸，可同时服务多个imgsz和微批推理），返回导出文件路径"""
+    kwargs = {"format": fmt, "imgsz": max(SERVED_IMGSZ), "dynamic": True}
+    if fmt == "openvino" and BACKEND_INT8:
+        kwargs.update(int8=True, data=_calibration_yaml(pt_path))
+    return str(YOLO(pt_path).export(**kwargs))
+
+
+def benchmark_backend(path, runs=BENCHMARK_RUNS):
+    """在本机上测量单张推理的平均耗时（毫秒），使用校准图片或随机图像，各服务尺寸取平均"""
+    bench_model = YOLO(path, task="detect")
+    images = [cv2.imread(f) for f in _calibration_images(4)]
+    images = [im for im in images if im is not None] or [
+        np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(4)
+    ]
+    per_size = []
+    for imgsz in SERVED_IMGSZ:
+        for im in images[:2]:
+            bench_model.predict(im, conf=0.5, imgsz=imgsz, verbose=False)  # 预热
+        start = time.perf_counter()
+        for i in range(runs):
+            bench_model.predict(images[i % len(images)], conf=0.5, imgsz=imgsz, verbose=False)
+        per_size.append((time.perf_counter() - start) * 1000 / runs)
+    return sum(per_size) / len(per_size)
+
+
+def select_serving_weights(pt_path):
+    """
+    返回实际用于推理的模型路径。首次启动时导出候选后端、与.pt对比并记录结论；
+    之后只要主机、权重和配置不变，直接读取记录，不再重复导出和基准测试。
+    """
+    if SERVE_BACKEND == "pt" or not pt_path.endswith(".pt"):
+        return pt_path
+    record_file = os.path.join(os.path.dirname(pt_path), BACKEND_RECORD_FILE)
+    records = _read_backend_record(record_file)
+    key = _backend_record_key(pt_path)
+    record = records.get(key)
+    if record and (record["backend"] == "pt" or os.path.exists(record["path"])):
+        logger.info(f"使用已记录的推理后端: {record['backend']} ({record['path']})")
+        return record["path"]
+
+    formats = available_backends() if SERVE_BACKEND == "auto" else [SERVE_BACKEND]
+    candidates = {"pt": pt_path}
+    for fmt in formats:
+        try:
+            candidates[fmt] = export_backend(pt_path, fmt)
+            logger.info(f"模型已导出为{fmt}: {candidates[fmt]}")
+        except Exception as e:
+            logger.warning(f"导出{fmt}失败，跳过该后端: {str(e)}")
+
+    timings = {}
+    if SERVE_BACKEND == "auto":
+        for fmt, path in candidates.items():
+            try:
+                timings[fmt] = round(benchmark_backend(path), 2)
+                logger.info(f"后端基准测试 {fmt}: {timings[fmt]:.1f}ms/张")
+            except Exception as e:
+                logger.warning(f"后端{fmt}基准测试失败: {str(e)}")
+        best = min(timings, key=timings.get) if timings else "pt"
+    else:
+        best = SERVE_BACKEND if SERVE_BACKEND in candidates else "pt"
+
+    records[key] = {"backend": best, "path": candidates[best], "timings_ms": timings, "created_at": time.time()}
+    try:
+        with open(record_file, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logger.warning(f"推理后端记录保存失败: {e}")
+    logger.info(f"选用推理后端: {best} ({candidates[best]})")
+    return candidates[best]
+
+
+# ------------------ 模型池与热替换 ------------------
+def model_name_from_path(path):
+    """garbage_detection/double_label_train7/weights/best.pt → double_label_train7"""
+    p = Path(path)
+    return p.parent.parent.name if p.parent.name == "weights" else p.stem
+
+
+class ModelReplicaPool:
+    """同一权重的一组已预热模型副本，通过lease()借出；每个副本有独立的predictor，可并行推理"""
+
+    def __init__(self, name, path, replicas=MODEL_REPLICAS, imgsizes=SERVED_IMGSZ, source=None):
+        self.name = name
+        self.path = path
+        self.source = source or path  # 原始.pt路径；path可能是导出的ONNX/OpenVINO模型
+        self.replicas = max(1, replicas)
+        self.imgsizes = imgsizes
+        self.loaded_at = None
+        self.load_seconds = 0.0
+        self.retired = False
+        self._free = queue.Queue()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._drained = threading.Event()
+
+    def load(self):
+        """加载全部副本并在每个服务尺寸上做一次空跑，完成AutoBackend构建、层融合和图初始化"""
+        start = time.perf_counter()
+        for _ in range(self.replicas):
+            replica = YOLO(self.path, task="detect")
+            for imgsz in self.imgsizes:
+                warmup_img = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+                replica.predict(source=warmup_img, conf=0.5, imgsz=imgsz, stream=False, verbose=False)
+            self._free.put(replica)
+        self.load_seconds = time.perf_counter() - start
+        self.loaded_at = time.time()
+        logger.info(f"模型[{self.name}]加载并预热完成: {self.replicas}个副本, 尺寸{list(self.imgsizes)}, "
+                    f"耗时{self.load_seconds:.1f}s")
+        return self
+
+    @contextmanager
+    def lease(self):
+        with self._lock:
+            self._in_flight += 1
+        replica = self._free.get()
+        try:
+            yield replica
+        finally:
+            self._free.put(replica)
+            with self._lock:
+                self._in_flight -= 1
+                if self.retired and self._in_flight == 0:
+                    self._drained.set()
+
+    def retire(self):
+        """标记为已退役：不再分配新请求，正在进行的请求完成后即可释放"""
+        with self._lock:
+            self.retired = True
+            if self._in_flight == 0:
+                self._drained.set()
+
+    def wait_drained(self, timeout=None):
+        return self._drained.wait(timeout)
+
+    def status(self):
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "name": self.name,
+            "path": self.path,
+            "source": self.source,
+            "replicas": self.replicas,
+            "imgsz": list(self.imgsizes),
+            "in_flight": in_flight,
+            "load_seconds": round(self.load_seconds, 2),
+            "loaded_at": self.loaded_at,
+            "retired": self.retired,
+        }
+
+
+class ModelRegistry:
+    """
+    已加载模型的注册表。新权重总是先在后台完整加载和预热，再在锁内原子地切换指针；
+    旧模型上的在途请求继续用旧副本完成，排空后旧副本被释放，因此切换不会丢请求也没有冷启动尖刺。
+    """
+
+    def __init__(self, replicas=MODEL_REPLICAS, imgsizes=SERVED_IMGSZ):
+        self.replicas = replicas
+        self.imgsizes = imgsizes
+        self.pools = {}
+        self.active_name = None
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()  # 同一时间只允许一次加载/替换
+        if replicas > 1:
+            # 多个副本并行时，每个副本分到的intra-op线程数 = 核数 / 副本数，避免互相争抢
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // replicas))
+
+    def load(self, path, name=None, activate=False):
+        name = name or model_name_from_path(path)
+        with self._swap_lock:
+            serve_path = select_serving_weights(path)
+            pool = ModelReplicaPool(name, serve_path, self.replicas, self.imgsizes, source=path).load()
+            with self._lock:
+                old = self.pools.get(name)
+                self.pools[name] = pool
+                if activate or self.active_name is None:
+                    self.active_name = name
+            if old is not None:
+                self._release_later(old)
+        return pool
+
+    def activate(self, name):
+        with self._lock:
+            if name not in self.pools:
+                raise KeyError(name)
+            self.active_name = name
+        logger.info(f"当前模型切换为: {name}")
+
+    def swap(self, path, name=None):
+        """热替换：加载新权重（如训练得到的新best.pt）并设为当前模型"""
+        pool = self.load(path, name=name, activate=True)
+        logger.info(f"模型热替换完成: {pool.name} ← {path}")
+        return pool
+
+    def _release_later(self, pool):
+        pool.retire()
+
+        def _wait():
+            pool.wait_drained()
+            logger.info(f"旧模型副本已排空并释放: {pool.name}")
+
+        threading.Thread(target=_wait, name=f"drain-{pool.name}", daemon=True).start()
+
+    @contextmanager
+    def lease(self, name=None):
+        """借出一个模型副本；name为空时使用当前模型"""
+        with self._lock:
+            pool = self.pools[name or self.active_name]
+        with pool.lease() as replica:
+            yield replica
+
+    def active_pool(self):
+        with self._lock:
+            return self.pools.get(self.active_name)
+
+    def status(self):
+        with self._lock:
+            pools = list(self.pools.values())
+            active = self.active_name
+        return {"active": active, "models": [p.status() for p in pools]}
+
+
+# ------------------ 多进程推理 ------------------
+def split_cores(n):
+    """把当前可用的CPU核尽量均分成n组；进程数多于核数时轮流复用"""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    if n >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(n)]
+    return [[int(c) for c in group] for group in np.array_split(cores, n)]
+
+
+def inference_process_main(worker_id, cores, shm_name, slot_bytes, imgsizes, task_q, result_q):
+    """
+    推理进程入口：绑定CPU核，挂载主进程创建的共享内存，按顺序处理任务队列中的消息：
+      ("load", call_id, name, path)              加载并预热模型，回传类别名
+      ("infer", call_id, name, items, imgsz, conf) items为(槽位, 形状, 数据)，槽位为None时数据随消息传入
+      ("stop", None)                              退出
+    每条消息都回传 ("done", call_id, payload, error)，推理结果只回传各帧的boxes.data数组。
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(max(1, len(cores)))
+    cv2.setNumThreads(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    models = {}
+    while True:
+        msg = task_q.get()
+        kind, call_id = msg[0], msg[1]
+        if kind == "stop":
+            break
+        try:
+            if kind == "load":
+                name, path = msg[2], msg[3]
+                replica = YOLO(path, task="detect")
+                for imgsz in imgsizes:
+                    warmup_img = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+                    replica.predict(source=warmup_img, conf=0.5, imgsz=imgsz, stream=False, verbose=False)
+                models[name] = replica  # 同名旧模型在此之前排队的批次已用旧模型处理完
+                payload = dict(replica.names)
+            elif kind == "infer":
+                name, items, imgsz, conf = msg[2], msg[3], msg[4], msg[5]
+                frames = [
+                    np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                    if slot is not None else data
+                    for slot, shape, data in items
+                ]
+                results = models[name](frames, conf=conf, imgsz=imgsz, verbose=False)
+                batch = BatchResults(results)  # 整批框一次拷贝到host，按图片偏移切分
+                payload = [batch[i] for i in range(len(batch))]
+                del frames, results, batch
+            else:
+                raise ValueError(f"未知消息类型: {kind}")
+            result_q.put(("done", call_id, payload, None))
+        except Exception as e:
+            logger.exception(f"推理进程{worker_id}处理{kind}失败")
+            result_q.put(("done", call_id, None, f"{type(e).__name__}: {str(e)}"))
+    models.clear()
+    try:
+        shm.close()
+    except BufferError:
+        pass  # predictor仍引用着最后一批帧的视图，进程退出时自动释放
+
+
+class SharedFrameRing:
+    """主进程侧的共享内存环形缓冲区：固定大小槽位按顺序分配，推理进程回传结果后由结果线程归还"""
+
+    def __init__(self, slots=SHM_SLOTS, slot_bytes=int(SHM_SLOT_MB * 1024 * 1024)):
+        self.slots = max(1, slots)
+        self.slot_bytes = int(slot_bytes)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self._busy = [False] * self.slots
+        self._head = 0
+        self._cond = threading.Condition()
+
+    def fits(self, frame):
+        return frame.dtype == np.uint8 and frame.nbytes <= self.slot_bytes
+
+    def acquire(self, timeout=None):
+        """取下一个空闲槽位；缓冲区满时阻塞（背压），超时返回None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: not all(self._busy), timeout):
+                return None
+            while self._busy[self._head]:
+                self._head = (self._head + 1) % self.slots
+            slot = self._head
+            self._busy[slot] = True
+            self._head = (slot + 1) % self.slots
+            return slot
+
+    def write(self, slot, frame):
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        view[...] = frame
+        del view
+
+    def release(self, slots):
+        if not slots:
+            return
+        with self._cond:
+            for slot in slots:
+                self._busy[slot] = False
+            self._cond.notify_all()
+
+    def in_use(self):
+        with self._cond:
+            return sum(self._busy)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class InferenceProcess:
+    """一个推理进程及其专属的环形缓冲区和任务队列"""
+
+    def __init__(self, ctx, worker_id, cores, imgsizes, result_q):
+        self.worker_id = worker_id
+        self.cores = cores
+        self.ring = SharedFrameRing()
+        self.task_q = ctx.Queue()
+        self.in_flight = 0
+        self.process = ctx.Process(
+            target=inference_process_main,
+            args=(worker_id, cores, self.ring.shm.name, self.ring.slot_bytes, imgsizes, self.task_q, result_q),
+            name=f"inference-process-{worker_id}",
+            daemon=True,
+        )
+
+    def status(self):
+        return {
+            "worker_id": self.worker_id,
+            "pid": self.process.pid,
+            "alive": self.process.is_alive(),
+            "cores": self.cores,
+            "in_flight": self.in_flight,
+            "ring_in_use": self.ring.in_use(),
+            "ring_slots": self.ring.slots,
+        }
+
+
+class _ProcessCall:
+    __slots__ = ("worker", "slots", "event", "result", "error")
+
+    def __init__(self, worker, slots):
+        self.worker = worker
+        self.slots = slots
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ProcessReplica:
+    """lease()借出的代理对象，调用方式与YOLO模型相同：m(frames, conf=..., imgsz=..., verbose=False)"""
+
+    def __init__(self, registry, worker, name):
+        self.registry = registry
+        self.worker = worker
+        self.name = name
+
+    def __call__(self, source, conf=0.5, imgsz=640, verbose=False):
+        return self.registry.infer(self.worker, self.name, source, imgsz=imgsz, conf=conf)
+
+
+class ProcessModelRegistry:
+    """
+    多进程模式下的模型注册表，接口与ModelRegistry一致（load/swap/activate/lease/status）。
+    每个推理进程持有全部已加载模型的一个副本；lease()借出在途任务最少的进程，
+    帧写入该进程的共享内存环形缓冲区，队列中只传递槽位号和形状；进程只回传boxes.data小数组，
+    主进程据此重建Results，后续绘制和整理逻辑不变。推理不再受Flask进程GIL的限制。
+    """
+
+    def __init__(self, processes=WORKER_PROCESSES, imgsizes=SERVED_IMGSZ):
+        self.replicas = max(1, processes)
+        self.imgsizes = imgsizes
+        self.models = {}
+        self.active_name = None
+        self._ctx = multiprocessing.get_context("spawn")  # 不fork已启动线程和torch线程池的Flask进程
+        self._result_q = self._ctx.Queue()
+        self.workers = [
+            InferenceProcess(self._ctx, i, cores, imgsizes, self._result_q)
+            for i, cores in enumerate(split_cores(self.replicas))
+        ]
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._dispatcher = None
+
+    def start(self):
+        for w in self.workers:
+            w.process.start()
+        self._dispatcher = threading.Thread(target=self._dispatch_results, name="process-result-dispatcher",
+                                            daemon=True)
+        self._dispatcher.start()
+        logger.info(f"推理进程已启动: {self.replicas}个进程, CPU核分组{[w.cores for w in self.workers]}, "
+                    f"每进程{self.workers[0].ring.slots}个共享内存槽位")
+        return self
+
+    def stop(self):
+        for w in self.workers:
+            w.task_q.put(("stop", None))
+        for w in self.workers:
+            w.process.join(timeout=5)
+            if w.process.is_alive():
+                w.process.terminate()
+        self._result_q.put(None)
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+        for call in pending:
+            call.error = "推理服务已停止"
+            call.event.set()
+        for w in self.workers:
+            w.ring.close()
+
+    def _dispatch_results(self):
+        while True:
+            msg = self._result_q.get()
+            if msg is None:
+                return
+            _, call_id, payload, error = msg
+            with self._lock:
+                call = self._pending.pop(call_id, None)
+            if call is None:
+                continue
+            call.worker.ring.release(call.slots)
+            call.result, call.error = payload, error
+            call.event.set()
+
+    def _send(self, worker, kind, *args, slots=()):
+        call = _ProcessCall(worker, list(slots))
+        with self._lock:
+            call_id = next(self._ids)
+            self._pending[call_id] = call
+        worker.task_q.put((kind, call_id) + args)
+        return call
+
+    def _wait(self, call, timeout=None):
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not call.event.wait(0.5):
+            if not call.worker.process.is_alive():
+                raise RuntimeError(f"推理进程{call.worker.worker_id}已退出")
+            if deadline is not None and time.perf_counter() > deadline:
+                raise TimeoutError(f"推理进程{call.worker.worker_id}响应超时（{timeout}s）")
+        if call.error is not None:
+            raise RuntimeError(call.error)
+        return call.result
+
+    def load(self, path, name=None, activate=False):
+        name = name or model_name_from_path(path)
+        with self._swap_lock:
+            serve_path = select_serving_weights(path)
+            start = time.perf_counter()
+            # 各进程并行加载和预热；进程按顺序处理消息，此前已排队的批次仍用旧模型完成
+            calls = [self._send(w, "load", name, serve_path) for w in self.workers]
+            names = [self._wait(call) for call in calls][0]
+            info = {
+                "name": name,
+                "path": serve_path,
+                "source": path,
+                "names": names,
+                "load_seconds": round(time.perf_counter() - start, 2),
+                "loaded_at": time.time(),
+            }
+            with self._lock:
+                self.models[name] = info
+                if activate or self.active_name is None:
+                    self.active_name = name
+        logger.info(f"模型[{name}]已在{self.replicas}个推理进程中加载并预热, 耗时{info['load_seconds']:.1f}s")
+        return info
+
+    def activate(self, name):
+        with self._lock:
+            if name not in self.models:
+                raise KeyError(name)
+            self.active_name = name
+        logger.info(f"当前模型切换为: {name}")
+
+    def swap(self, path, name=None):
+        info = self.load(path, name=name, activate=True)
+        logger.info(f"模型热替换完成: {info['name']} ← {path}")
+        return info
+
+    @contextmanager
+    def lease(self, name=None):
+        """借出在途任务最少的推理进程"""
+        with self._lock:
+            name = name or self.active_name
+            if name not in self.models:
+                raise KeyError(name)
+            worker = min(self.workers, key=lambda w: w.in_flight)
+            worker.in_flight += 1
+        try:
+            yield ProcessReplica(self, worker, name)
+        finally:
+            with self._lock:
+                worker.in_flight -= 1
+
+    def infer(self, worker, name, source, imgsz=640, conf=0.5, timeout=INFER_TIMEOUT):
+        frames = list(source) if isinstance(source, (list, tuple)) else [source]
+        items, slots = [], []
+        try:
+            for frame in frames:
+                if not worker.ring.fits(frame):
+                    items.append((None, frame.shape, frame))  # 超出槽位容量的帧退回到随消息序列化
+                    continue
+                slot = worker.ring.acquire(timeout)
+                if slot is None:
+                    raise TimeoutError("共享内存缓冲区已满，请稍后重试")
+                slots.append(slot)
+                worker.ring.write(slot, frame)
+                items.append((slot, frame.shape, None))
+        except Exception:
+            worker.ring.release(slots)
+            raise
+        call = self._send(worker, "infer", name, items, imgsz, conf, slots=slots)
+        payload = self._wait(call, timeout)
+        names = self.models[name]["names"]
+        return [Results(orig_img=frame, path="", names=names, boxes=torch.from_numpy(data))
+                for frame, data in zip(frames, payload)]
+
+    def active_pool(self):
+        with self._lock:
+            return self.models.get(self.active_name)
+
+    def status(self):
+        with self._lock:
+            models = [{k: v for k, v in info.items() if k != "names"} for info in self.models.values()]
+            active = self.active_name
+        return {
+            "active": active,
+            "mode": "process",
+            "models": models,
+            "processes": [w.status() for w in self.workers],
+        }
+
+
+# ------------------ 微批推理队列 ------------------
+class InferenceRequest:
+    """单个待推理请求：帧 + 推理尺寸，完成后通过event通知等待的Flask线程"""
+
+    __slots__ = ("frame", "imgsz", "event", "result", "error", "enqueue_time")
+
+    def __init__(self, frame, imgsz):
+        self.frame = frame
+        self.imgsz = imgsz
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.enqueue_time = time.perf_counter()
+
+
+class BatchInferenceWorker:
+    """
+    专用推理线程：从有界队列中取请求，在batch_window内凑批后一次前向推理，再把Results分发回各请求。
+    推理线程数与模型副本数相同，每个线程每批借用一个副本；Flask线程只负责排队和等待。
+    """
+
+    def __init__(self, batch_window_ms=BATCH_WINDOW_MS, max_batch_size=MAX_BATCH_SIZE, max_queue_size=MAX_QUEUE_SIZE,
+                 num_threads=MODEL_REPLICAS):
+        self.batch_window = max(0.0, batch_window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.queue = queue.Queue(maxsize=max(1, max_queue_size))
+        self.num_threads = max(1, num_threads)
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "frames": 0,
+            "rejected": 0,
+            "errors": 0,
+            "last_batch_size": 0,
+            "max_batch_size_seen": 0,
+            "total_wait_ms": 0.0,
+            "total_infer_ms": 0.0,
+            "batch_size_hist": {},
+        }
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"batch-inference-worker-{i}", daemon=True)
+            for i in range(self.num_threads)
+        ]
+        for t in self._threads:
+            t.start()
+        logger.info(f"微批推理线程已启动: {self.num_threads}个线程, 窗口{self.batch_window * 1000:.1f}ms, "
+                    f"最大批量{self.max_batch_size}")
+
+    def stop(self):
+        self._stop_event.set()
+        for t in self._threads:
+            t.join(timeout=2)
+        # 唤醒仍在等待的请求，避免Flask线程一直阻塞
+        while True:
             try:
-                font = ImageFont.truetype(path, 18)
+                req = self.queue.get_nowait()
+            except queue.Empty:
                 break
-            except Exception:
+            req.error = "推理服务已停止"
+            req.event.set()
+
+    def submit(self, frame, imgsz, timeout=INFER_TIMEOUT):
+        """提交一帧并阻塞等待结果，返回 (Results, "ok") 或 (None, 错误信息)"""
+        req = InferenceRequest(frame, imgsz)
+        try:
+            self.queue.put_nowait(req)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["rejected"] += 1
+            return None, "推理队列已满，请稍后重试"
+        if not req.event.wait(timeout):
+            return None, f"推理超时（{timeout}s）"
+        if req.error is not None:
+            return None, req.error
+        return req.result, "ok"
+
+    def _collect_batch(self):
+        """阻塞取第一个请求，然后在时间窗口内尽量凑满一个batch"""
+        try:
+            first = self.queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            if not batch:
                 continue
-    if font is None:
-        font = ImageFont.load_default()
-        logger.warning("未找到中文字体，使用默认字体")
 
-    detected = []
-    img_height, img_width = img_bgr.shape[:2]
+            # 不同imgsz（图片640 / 视频帧480）不能合并为一次前向，按尺寸分组
+            groups = {}
+            for req in batch:
+                groups.setdefault(req.imgsz, []).append(req)
+
+            for imgsz, reqs in groups.items():
+                start = time.perf_counter()
+                try:
+                    with model_registry.lease() as m:
+                        results = m([r.frame for r in reqs], conf=0.5, imgsz=imgsz, verbose=False)
+                    for req, res in zip(reqs, results):
+                        req.result = [res]
+                except Exception as e:
+                    logger.exception(f"批量推理失败（batch={len(reqs)}）")
+                    for req in reqs:
+                        req.error = f"模型推理失败: {str(e)}"
+                    with self._stats_lock:
+                        self._stats["errors"] += 1
+                infer_ms = (time.perf_counter() - start) * 1000
+                self._record(reqs, start, infer_ms)
+                for req in reqs:
+                    req.event.set()
+
+    def _record(self, reqs, start, infer_ms):
+        n = len(reqs)
+        with self._stats_lock:
+            st = self._stats
+            st["batches"] += 1
+            st["frames"] += n
+            st["last_batch_size"] = n
+            st["max_batch_size_seen"] = max(st["max_batch_size_seen"], n)
+            st["total_wait_ms"] += sum((start - r.enqueue_time) * 1000 for r in reqs)
+            st["total_infer_ms"] += infer_ms
+            st["batch_size_hist"][n] = st["batch_size_hist"].get(n, 0) + 1
+
+    def stats(self):
+        with self._stats_lock:
+            st = dict(self._stats)
+            st["batch_size_hist"] = dict(self._stats["batch_size_hist"])
+        batches, frames = st["batches"], st["frames"]
+        total_wait_ms, total_infer_ms = st.pop("total_wait_ms"), st.pop("total_infer_ms")
+        st.update({
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "batch_window_ms": self.batch_window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": round(frames / batches, 2) if batches else 0.0,
+            "avg_wait_ms": round(total_wait_ms / frames, 2) if frames else 0.0,
+            "avg_infer_ms_per_batch": round(total_infer_ms / batches, 2) if batches else 0.0,
+            "threads": self.num_threads,
+            "running": self.running,
+        })
+        return st
+
+
+# ------------------ 自适应分辨率与抽帧 ------------------
+class AdaptiveController:
+    """
+    根据实测推理延迟（EWMA）和推理队列积压程度，在已预热的尺寸中为图片/实时帧选择imgsz，并为视频选择采样步长。
+    延迟超过目标或队列积压时降一级尺寸（积压严重时直接降到最小尺寸）；延迟持续低于目标的60%且队列空闲时
+    才升一级，最高不超过原始尺寸。两次调整之间有冷却时间，避免来回抖动；每次决策都写日志并保留最近记录。
+    """
+
+    BASE_IMGSZ = {"image": 640, "frame": 480}
+    EWMA_ALPHA = 0.3
+
+    def __init__(self, sizes=SERVED_IMGSZ, target_ms=TARGET_LATENCY_MS, cooldown=ADAPT_COOLDOWN, enabled=ADAPTIVE):
+        self.sizes = sorted(set(sizes), reverse=True)
+        self.target_ms = target_ms
+        self.cooldown = cooldown
+        self.enabled = enabled
+        # 原始尺寸对应的档位：取不大于原始尺寸的最大已预热尺寸
+        self.base_level = {
+            kind: next((i for i, s in enumerate(self.sizes) if s <= base), len(self.sizes) - 1)
+            for kind, base in self.BASE_IMGSZ.items()
+        }
+        self.level = dict(self.base_level)
+        self.ewma = {kind: None for kind in self.BASE_IMGSZ}
+        self.changed_at = {kind: 0.0 for kind in self.BASE_IMGSZ}
+        self.decisions = deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def imgsz(self, kind):
+        if not self.enabled:
+            return self.BASE_IMGSZ[kind]
+        with self._lock:
+            return self.sizes[self.level[kind]]
+
+    def record(self, kind, latency_ms, queue_ratio=0.0):
+        """记录一次请求的推理延迟（含排队），必要时调整该类请求的imgsz"""
+        if not self.enabled:
+            return
+        with self._lock:
+            prev = self.ewma[kind]
+            ewma = latency_ms if prev is None else self.EWMA_ALPHA * latency_ms + (1 - self.EWMA_ALPHA) * prev
+            self.ewma[kind] = ewma
+            level, smallest = self.level[kind], len(self.sizes) - 1
+            in_cooldown = time.time() - self.changed_at[kind] < self.cooldown
+            if queue_ratio >= 0.75 and level < smallest:
+                self._change(kind, smallest, f"队列积压{queue_ratio:.0%}，降到最小尺寸")
+            elif in_cooldown:
+                return
+            elif (ewma > self.target_ms or queue_ratio >= 0.5) and level < smallest:
+                self._change(kind, level + 1, f"延迟{ewma:.0f}ms/目标{self.target_ms:.0f}ms，队列{queue_ratio:.0%}")
+            elif ewma < 0.6 * self.target_ms and queue_ratio < 0.1 and level > self.base_level[kind]:
+                self._change(kind, level - 1, f"延迟{ewma:.0f}ms低于目标{self.target_ms:.0f}ms的60%，队列空闲")
+
+    def _change(self, kind, level, reason):
+        old, new = self.sizes[self.level[kind]], self.sizes[level]
+        self.level[kind] = level
+        self.changed_at[kind] = time.time()
+        self.ewma[kind] = None  # 尺寸变化后延迟重新统计
+        self.decisions.append({"time": time.time(), "kind": kind, "imgsz": [old, new], "reason": reason})
+        logger.info(f"自适应调整[{kind}] imgsz {old} → {new}: {reason}")
+
+    def video_stride(self, base_stride, fps, infer_ms_per_frame):
+        """
+        视频采样步长：推理速度需跟上VIDEO_TARGET_FPS的处理速度，即 目标fps / 步长 × 单帧推理耗时 ≤ 1秒；
+        不比按时长计算的原步长更密，也不低于每秒采样一帧。
+        """
+        if not self.enabled or VIDEO_TARGET_FPS <= 0 or infer_ms_per_frame <= 0:
+            return base_stride
+        needed = int(np.ceil(VIDEO_TARGET_FPS * infer_ms_per_frame / 1000.0))
+        return max(base_stride, min(needed, max(1, int(fps))))
+
+    def log_stride(self, old, new, infer_ms_per_frame):
+        with self._lock:
+            self.decisions.append({"time": time.time(), "kind": "video", "sample_interval": [old, new],
+                                   "reason": f"单帧推理{infer_ms_per_frame:.0f}ms"})
+        logger.info(f"自适应调整[video] 采样间隔 {old} → {new}帧: 单帧推理{infer_ms_per_frame:.0f}ms, "
+                    f"目标处理速度{VIDEO_TARGET_FPS:.0f}FPS")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "target_latency_ms": self.target_ms,
+                "video_target_fps": VIDEO_TARGET_FPS,
+                "sizes": self.sizes,
+                "imgsz": {kind: self.sizes[lv] for kind, lv in self.level.items()},
+                "ewma_latency_ms": {k: (round(v, 1) if v is not None else None) for k, v in self.ewma.items()},
+                "recent_decisions": list(self.decisions)[-10:],
+            }
+
+
+adaptive_controller = AdaptiveController()
+
+
+def queue_ratio():
+    """推理队列占用比例，作为过载信号"""
+    if inference_worker is None:
+        return 0.0
+    return inference_worker.queue.qsize() / inference_worker.queue.maxsize
+
+
+# ------------------ 视频处理流水线 ------------------
+_PIPELINE_END = object()
+
 
-    for res in results:
+class VideoFrameItem:
+    """流水线中传递的单帧；未采样帧只携带原始frame，不做任何拷贝"""
+
+    __slots__ = ("idx", "frame", "sampled", "results")
+
+    def __init__(self, idx, frame, sampled):
+        self.idx = idx
+        self.frame = frame
+        self.sampled = sampled
+        self.results = None
+
+
+class VideoPipeline:
+    """
+    解码 → 批量推理 → 绘制 → 编码 四级流水线，各级之间由有界队列连接。
+    每级只有一个线程且队列先进先出，因此输出帧顺序与输入一致；未采样帧直接穿过推理和绘制阶段写入视频。
+    """
+
+    def __init__(self, cap, writer, sample_interval, imgsz=480, batch_size=VIDEO_BATCH_SIZE,
+                 queue_size=VIDEO_QUEUE_SIZE, fps=None):
+        self.cap = cap
+        self.writer = writer
+        self.sample_interval = max(1, sample_interval)
+        self.base_interval = self.sample_interval
+        self.fps = fps  # 给定时按实测推理速度动态放宽采样间隔
+        self.imgsz = imgsz
+        self.batch_size = max(1, batch_size)
+        self.infer_q = queue.Queue(maxsize=queue_size)
+        self.annotate_q = queue.Queue(maxsize=queue_size)
+        self.write_q = queue.Queue(maxsize=queue_size)
+        self.detected_set = {}
+        self.frames_read = 0
+        self.frames_inferred = 0
+        self.frames_written = 0
+        self.error = None
+        self._stop_event = threading.Event()
+        self._detected_lock = threading.Lock()
+
+    # ---------- 队列工具：定期检查停止标志，避免某一级异常后其它线程永久阻塞 ----------
+    def _put(self, q, item):
+        while not self._stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _fail(self, stage, e):
+        logger.exception(f"视频流水线[{stage}]异常")
+        if self.error is None:
+            self.error = f"{stage}: {str(e)}"
+        self._stop_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def snapshot_detections(self):
+        """当前已累积的检测结果（按置信度降序），可在处理过程中随时调用"""
+        with self._detected_lock:
+            detections = list(self.detected_set.values())
+        return sorted(detections, key=lambda x: x['confidence'], reverse=True)
+
+    # ---------- 各级线程 ----------
+    def _decode(self):
+        try:
+            idx, since_sample = 0, 0
+            while not self._stop_event.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                idx += 1
+                self.frames_read = idx
+                since_sample += 1
+                sampled = since_sample >= self.sample_interval  # 采样间隔可能在处理中被推理线程调整
+                if sampled:
+                    since_sample = 0
+                if not self._put(self.infer_q, VideoFrameItem(idx, frame, sampled)):
+                    return
+        except Exception as e:
+            self._fail("decode", e)
+        finally:
+            self._put(self.infer_q, _PIPELINE_END)
+
+    def _run_batch(self, pending):
+        sampled = [item for item in pending if item.sampled]
+        if not sampled:
+            return
         try:
-            boxes = getattr(res, "boxes", [])
-            for box in boxes:
-                xyxy = box.xyxy[0].cpu().numpy() if hasattr(box.xyxy[0], 'cpu') else box.xyxy[0]
-                x1_abs, y1_abs, x2_abs, y2_abs = map(int, xyxy)
-                x1 = round(x1_abs / img_width, 4) if img_width != 0 else 0.0
-                y1 = round(y1_abs / img_height, 4) if img_height != 0 else 0.0
-                x2 = round(x2_abs / img_width, 4) if img_width != 0 else 0.0
-                y2 = round(y2_abs / img_height, 4) if img_height != 0 else 0.0
-                conf = float(box.conf[0].cpu().numpy()) if hasattr(box.conf[0], 'cpu') else float(box.conf[0])
-                cls_idx = int(box.cls[0].cpu().numpy()) if hasattr(box.cls[0], 'cpu') else int(box.cls[0])
-
-                small_name = small_category_names.get(cls_idx, f"未知类别({cls_idx})")
-                big_idx = big_category_mapping.get(cls_idx, -1)
-                big_name = big_category_names.get(big_idx, f"未知大类({big_idx})") if big_idx != -1 else "未知大类"
-
-                # 后端不再生成AI介绍，改为空字符串，由前端填充
-                detected.append({
-                    "label": f"{big_name}/{small_name}",
-                    "big_name": big_name,
-                    "small_name": small_name,
-                    "confidence": round(conf, 4),
-                    "x1": x1, "y1": y1, "x2": x2, "y2": y2,
-                    "introduction": ""  # 前端填充介绍
-                })
-
-                draw.rectangle([(x1_abs, y1_abs), (x2_abs, y2_abs)], outline=(0, 255, 0), width=3)
-                text = f"{big_name}/{small_name} {conf:.2f}"
-                text_bbox = draw.textbbox((x1_abs, y1_abs - 22), text, font=font)
-                draw.rectangle(text_bbox, fill=(0, 255, 0))
-                draw.text((x1_abs, y1_abs - 22), text, fill=(0, 0, 0), font=font)
+            start = time.perf_counter()
+            with model_registry.lease() as m:
+                results = m([item.frame for item in sampled], conf=0.5, imgsz=self.imgsz, verbose=False)
+            for item, res in zip(sampled, results):
+                item.results = [res]
+            self.frames_inferred += len(sampled)
+            if self.fps:
+                per_frame_ms = (time.perf_counter() - start) * 1000 / len(sampled)
+                interval = adaptive_controller.video_stride(self.base_interval, self.fps, per_frame_ms)
+                if interval != self.sample_interval:
+                    adaptive_controller.log_stride(self.sample_interval, interval, per_frame_ms)
+                    self.sample_interval = interval
         except Exception as e:
-            logger.exception(f"绘制检测结果失败: {str(e)}")
-            continue
+            # 与原逻辑一致：推理失败的帧原样写出
+            logger.warning(f"处理第{sampled[0].idx}~{sampled[-1].idx}帧失败: {str(e)}")
 
-    return pil_img, detected
+    def _infer(self):
+        try:
+            pending, n_sampled = [], 0
+            while True:
+                item = self._get(self.infer_q)
+                if item is None:
+                    return
+                if item is _PIPELINE_END:
+                    self._run_batch(pending)
+                    for p in pending:
+                        if not self._put(self.annotate_q, p):
+                            return
+                    self._put(self.annotate_q, _PIPELINE_END)
+                    return
+                if not item.sampled and n_sampled == 0:
+                    # 前面没有等待凑批的采样帧，未采样帧直接下传
+                    if not self._put(self.annotate_q, item):
+                        return
+                    continue
+                pending.append(item)
+                n_sampled += item.sampled
+                if n_sampled >= self.batch_size:
+                    self._run_batch(pending)
+                    for p in pending:
+                        if not self._put(self.annotate_q, p):
+                            return
+                    pending, n_sampled = [], 0
+        except Exception as e:
+            self._fail("infer", e)
+
+    def _annotate(self):
+        try:
+            while True:
+                item = self._get(self.annotate_q)
+                if item is None:
+                    return
+                if item is _PIPELINE_END:
+                    self._put(self.write_q, _PIPELINE_END)
+                    return
+                if item.results is not None:
+                    try:
+                        item.frame, detected = draw_detection_results(item.frame, item.results)
+                        with self._detected_lock:
+                            for d in detected:
+                                if d['label'] not in self.detected_set or \
+                                        d['confidence'] > self.detected_set[d['label']]['confidence']:
+                                    self.detected_set[d['label']] = d
+                    except Exception as e:
+                        logger.warning(f"绘制第{item.idx}帧失败: {str(e)}")
+                    item.results = None
+                if not self._put(self.write_q, item):
+                    return
+        except Exception as e:
+            self._fail("annotate", e)
+
+    def _encode(self):
+        try:
+            while True:
+                item = self._get(self.write_q)
+                if item is None or item is _PIPELINE_END:
+                    return
+                self.writer.write(item.frame)
+                self.frames_written += 1
+        except Exception as e:
+            self._fail("encode", e)
+
+    def run(self):
+        """启动四级线程并等待全部完成，返回 detected_set；任一阶段失败时抛出 RuntimeError"""
+        threads = [
+            threading.Thread(target=target, name=f"video-{name}", daemon=True)
+            for name, target in (("decode", self._decode), ("infer", self._infer),
+                                 ("annotate", self._annotate), ("encode", self._encode))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if self.error is not None:
+            raise RuntimeError(f"视频流水线失败: {self.error}")
+        return self.detected_set
+
+
+# ------------------ 异步视频任务 ------------------
+class VideoJob:
+    """一次视频处理任务的状态；pipeline在任务运行期间可用于读取进度"""
+
+    ACTIVE = ("queued", "running")
+
+    def __init__(self, input_path, filename):
+        self.job_id = uuid.uuid4().hex
+        self.input_path = input_path
+        self.filename = filename
+        self.out_name = f"processed_{int(time.time())}_{self.job_id[:8]}_{os.path.splitext(filename)[0]}.mp4"
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.total_frames = 0
+        self.pipeline = None
+        self.result = None
+        self.error = None
+        self.future = None
+        self.cancel_requested = False
+
+    @property
+    def out_path(self):
+        return os.path.join(PROCESSED_VIDEO_DIR, self.out_name)
+
+    def to_dict(self):
+        pipeline = self.pipeline
+        frames_done = pipeline.frames_written if pipeline is not None else 0
+        frames_inferred = pipeline.frames_inferred if pipeline is not None else 0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        else:
+            elapsed = 0.0
+        info = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "filename": self.filename,
+            "frames_done": frames_done,
+            "frames_total": self.total_frames,
+            "frames_inferred": frames_inferred,
+            "progress": round(min(frames_done / self.total_frames, 1.0), 4) if self.total_frames else 0.0,
+            "fps": round(frames_done / elapsed, 2) if elapsed > 0 else 0.0,
+            "elapsed": round(elapsed, 2),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if self.result is not None:
+            info["result"] = self.result
+            info["detections"] = self.result["detections"]
+        else:
+            # 处理中：返回截至目前的部分检测汇总
+            info["detections"] = pipeline.snapshot_detections() if pipeline is not None else []
+        return info
+
+
+class VideoJobManager:
+    """线程池执行视频任务，并按保留策略清理已结束任务的记录和输出文件"""
+
+    def __init__(self, max_workers=VIDEO_JOB_WORKERS, max_pending=MAX_PENDING_JOBS,
+                 retention=JOB_RETENTION_SECONDS, cleanup_interval=JOB_CLEANUP_INTERVAL):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="video-job")
+        self.max_pending = max(1, max_pending)
+        self.retention = retention
+        self.cleanup_interval = cleanup_interval
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._cleanup_thread = None
+
+    def submit(self, input_path, filename):
+        """提交任务，返回 (job, "ok") 或 (None, 错误信息)"""
+        with self._lock:
+            active = sum(1 for j in self.jobs.values() if j.status in VideoJob.ACTIVE)
+            if active >= self.max_pending:
+                return None, f"视频任务过多（{active}个进行中），请稍后重试"
+            job = VideoJob(input_path, filename)
+            self.jobs[job.job_id] = job
+        job.future = self.executor.submit(run_video_job, job)
+        self._ensure_cleanup_thread()
+        logger.info(f"视频任务已提交: {job.job_id} ({filename})")
+        return job, "ok"
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job.status not in VideoJob.ACTIVE:
+            return job
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel():
+            # 尚未开始执行，直接标记取消并删除上传的临时文件
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            _remove_file(job.input_path)
+        elif job.pipeline is not None:
+            job.pipeline.stop()
+        logger.info(f"视频任务取消: {job_id}")
+        return job
+
+    def protected_outputs(self):
+        """进行中和仍在保留期内的任务输出文件名，清理时不能删除"""
+        now = time.time()
+        with self._lock:
+            return {
+                j.out_name for j in self.jobs.values()
+                if j.status in VideoJob.ACTIVE or (j.status == "done" and now - j.finished_at <= self.retention)
+            }
+
+    def is_active_output(self, out_name):
+        with self._lock:
+            return any(j.out_name == out_name and j.status in VideoJob.ACTIVE for j in self.jobs.values())
+
+    def purge_expired(self):
+        """移除超过保留期的已结束任务记录，返回被移除的任务"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                j for j in self.jobs.values()
+                if j.status not in VideoJob.ACTIVE and j.finished_at and now - j.finished_at > self.retention
+            ]
+            for j in expired:
+                del self.jobs[j.job_id]
+        return expired
+
+    def _ensure_cleanup_thread(self):
+        if self._cleanup_thread is not None and self._cleanup_thread.is_alive():
+            return
+        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, name="video-job-cleanup", daemon=True)
+        self._cleanup_thread.start()
+
+    def _cleanup_loop(self):
+        while True:
+            time.sleep(self.cleanup_interval)
+            cleanup_temp_files()
+
+    def shutdown(self):
+        for job in self.list():
+            if job.status in VideoJob.ACTIVE:
+                self.cancel(job.job_id)
+        self.executor.shutdown(wait=True)
+
+
+def _remove_file(path):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        logger.warning(f"删除文件失败 {path}: {e}")
+
+
+def run_video_job(job):
+    """在任务线程中执行：解码→推理→绘制→编码，完成后写入job.result"""
+    global history_messages
+    if job.cancel_requested:
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        _remove_file(job.input_path)
+        return
+    job.status = "running"
+    job.started_at = time.time()
+    cap = out = None
+    try:
+        if not model_loaded:
+            raise RuntimeError("模型未加载，请先初始化")
+
+        cap = cv2.VideoCapture(job.input_path)
+        if not cap.isOpened():
+            raise RuntimeError("无法打开视频")
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+        job.total_frames = total_frames
+        logger.info(f"视频信息: {width}x{height}, {fps:.1f}FPS")
+
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(job.out_path, fourcc, fps, (width, height))
+        if not out.isOpened():
+            raise RuntimeError("视频写入器初始化失败")
+
+        video_duration = total_frames / fps if fps > 0 else 0
+        sample_interval = max(1, int(fps / (10 if video_duration < 60 else 5 if video_duration < 300 else 2)))
+        logger.info(f"视频采样间隔: {sample_interval}帧")
+
+        job.pipeline = VideoPipeline(cap, out, sample_interval, imgsz=adaptive_controller.imgsz("frame"), fps=fps)
+        if job.cancel_requested:
+            job.pipeline.stop()
+        start = time.perf_counter()
+        job.pipeline.run()
+        elapsed = time.perf_counter() - start
+        logger.info(f"视频流水线完成: 共{job.pipeline.frames_written}帧, 推理{job.pipeline.frames_inferred}帧, "
+                    f"耗时{elapsed:.1f}s ({job.pipeline.frames_written / max(elapsed, 1e-6):.1f} FPS)")
+    except Exception as e:
+        logger.exception(f"视频任务失败: {job.job_id}")
+        job.error = f"视频处理失败: {str(e)}"
+    finally:
+        if cap is not None:
+            cap.release()
+        if out is not None:
+            out.release()
+        _remove_file(job.input_path)
+        job.finished_at = time.time()
+
+    if job.cancel_requested:
+        job.status = "cancelled"
+        _remove_file(job.out_path)
+        return
+    if job.error is not None:
+        job.status = "failed"
+        _remove_file(job.out_path)
+        return
+
+    logger.info(f"视频处理完成: {job.out_path}")
+    detections = job.pipeline.snapshot_detections()
+    if detections:
+        detected_labels = [d['label'] for d in detections]
+        final_intro = ""  # 前端填充介绍
+        full_intro = ""
+    else:
+        detected_labels = []
+        final_intro = "未检测到物体"
+        full_intro = final_intro
+
+    history_item = f"[视频检测] {os.path.basename(job.filename)}\n{final_intro}\n"
+    history_messages.append(history_item)
+    if len(history_messages) > MAX_HISTORY_LENGTH:
+        history_messages.pop(0)
+
+    job.result = {
+        "download_url": f"/download_processed_video/{job.out_name}",
+        "introduction": full_intro,
+        "history": "\n".join(history_messages[-10:]),
+        "detections": detections,
+        "detected_labels": detected_labels
+    }
+    job.status = "done"
+
+
+job_manager = VideoJobManager()
+
+
+# ------------------ 实时帧复用与跟踪平滑 ------------------
+class FrameSession:
+    """
+    单个实时检测客户端的状态。帧缩小为32x32灰度图作为签名，与上一次真正推理的帧比较平均绝对差，
+    低于阈值即复用上次结果（以上次推理帧为基准，缓慢变化不会无限累积）；推理得到的结果交给ByteTrack，
+    用卡尔曼平滑后的框替换原框，并按跟踪ID对类别做置信度加权的衰减投票，避免标签在相近类别间跳变。
+    """
+
+    SIGNATURE_SIZE = (32, 32)
+    VOTE_DECAY = 0.8
+
+    def __init__(self, key):
+        self.key = key
+        self.lock = threading.Lock()
+        self.tracker = BYTETracker(TRACKER_ARGS, frame_rate=30)
+        self.signature = None
+        self.last_results = None
+        self.reuse_streak = 0
+        self.votes = {}  # 跟踪ID → 各类别累计票数
+        self.frames = 0
+        self.inferred = 0
+        self.last_seen = time.time()
+
+    @classmethod
+    def frame_signature(cls, frame_bgr):
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, cls.SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def try_reuse(self, frame_bgr, force=False):
+        """
+        返回 (results, signature)：画面与上次推理帧几乎相同时results为上次结果，否则为None。
+        force=True（服务过载）时不比较画面，只要有上次结果且未超过连续复用上限就复用
+        """
+        with self.lock:
+            self.frames += 1
+            self.last_seen = time.time()
+            signature = self.frame_signature(frame_bgr)
+            if self.last_results is not None and self.reuse_streak < MAX_REUSE_FRAMES and (
+                    force or (signature.shape == self.signature.shape
+                              and np.abs(signature - self.signature).mean() < FRAME_DIFF_THRESHOLD)):
+                self.reuse_streak += 1
+                return self.last_results, signature
+            return None, signature
+
+    def update(self, frame_bgr, results, signature):
+        """用本次推理结果更新跟踪器，返回平滑后的Results列表并缓存供后续帧复用"""
+        with self.lock:
+            smoothed = [self._smooth(frame_bgr, res) for res in results]
+            self.signature = signature
+            self.last_results = smoothed
+            self.reuse_streak = 0
+            self.inferred += 1
+            return smoothed
+
+    def _smooth(self, frame_bgr, res):
+        boxes = res.boxes.cpu().numpy()
+        data = boxes.data.copy()
+        tracks = self.tracker.update(boxes, frame_bgr)
+        if len(tracks) == 0:
+            return res
+        rows = tracks[:, -1].astype(int)
+        data[rows, :4] = tracks[:, :4]
+        nc = max(len(res.names), int(data[:, -1].max()) + 1)
+        for row, track_id in zip(rows, tracks[:, 4].astype(int)):
+            votes = self.votes.get(track_id)
+            if votes is None or len(votes) < nc:
+                votes = np.zeros(nc, dtype=np.float32)
+            votes *= self.VOTE_DECAY
+            votes[int(data[row, -1])] += data[row, -2]
+            self.votes[track_id] = votes
+            data[row, -1] = votes.argmax()
+        alive = {t.track_id for t in self.tracker.tracked_stracks + self.tracker.lost_stracks}
+        self.votes = {k: v for k, v in self.votes.items() if k in alive}
+        return Results(orig_img=frame_bgr, path=res.path, names=res.names, boxes=torch.from_numpy(data))
+
+    def stats(self):
+        with self.lock:
+            return {"frames": self.frames, "forward_passes": self.inferred}
+
+
+class FrameSessionManager:
+    """按客户端维护FrameSession，空闲超过SESSION_TTL的会话在访问时顺带清理"""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self.sessions = {}
+        self._lock = threading.Lock()
+        self._closed = {"frames": 0, "forward_passes": 0}  # 已清理会话的累计计数
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            for k in [k for k, s in self.sessions.items() if now - s.last_seen > self.ttl]:
+                for name, value in self.sessions.pop(k).stats().items():
+                    self._closed[name] += value
+            session = self.sessions.get(key)
+            if session is None:
+                session = self.sessions[key] = FrameSession(key)
+            return session
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+            totals = dict(self._closed)
+        for s in sessions:
+            for name, value in s.stats().items():
+                totals[name] += value
+        saved = totals["frames"] - totals["forward_passes"]
+        totals.update({
+            "sessions": len(sessions),
+            "saved_forward_passes": saved,
+            "saved_ratio": round(saved / totals["frames"], 3) if totals["frames"] else 0.0,
+            "diff_threshold": FRAME_DIFF_THRESHOLD,
+            "max_reuse_frames": MAX_REUSE_FRAMES,
+        })
+        return totals
+
+
+frame_sessions = FrameSessionManager()
 
 
 # ------------------ 公共检测逻辑 ------------------
-def process_media(media_bgr, is_video_frame=False):
-    global model, history_messages
-    if model is None or not model_loaded:
-        return None, "模型未加载，请先初始化"
+OUTPUT_FORMATS = ("json", "jpeg", "detections")
 
+
+def infer_media(media_bgr, imgsz):
+    """单帧推理：优先交给微批推理线程，返回 (Results列表, "ok") 或 (None, 错误信息)"""
+    if inference_worker is not None:
+        results, err_msg = inference_worker.submit(media_bgr, imgsz)
+        if results is None:
+            logger.warning(err_msg)
+        return results, err_msg
     try:
-        imgsz = 640 if not is_video_frame else 480
-        results = model(media_bgr, conf=0.5, imgsz=imgsz, verbose=False)
+        with model_registry.lease() as m:
+            return m(media_bgr, conf=0.5, imgsz=imgsz, verbose=False), "ok"
     except Exception as e:
         err_msg = f"模型推理失败: {str(e)}"
         logger.exception(err_msg)
         return None, err_msg
 
-    media_rgb = cv2.cvtColor(media_bgr, cv2.COLOR_BGR2RGB)
-    pil_img = Image.fromarray(media_rgb)
-    pil_drawn, detected = draw_detection_results(pil_img, media_bgr, results)
+
+def process_media(media_bgr, is_video_frame=False, output="json", quality=JPEG_QUALITY, session=None):
+    """
+    推理并整理结果。output:
+      json       - 标注图以base64放在annotated_base64中（旧前端默认）
+      jpeg       - 标注图以JPEG字节放在annotated_jpeg中，由路由直接作为二进制响应体返回
+      detections - 不绘制也不编码，只返回检测结果，由客户端自行叠加
+    session为实时检测的FrameSession：画面未变化时复用上次结果，推理结果经跟踪器平滑
+    """
+    global history_messages
+    if not model_loaded:
+        return None, "模型未加载，请先初始化"
+
+    kind = "frame" if is_video_frame else "image"
+    imgsz = adaptive_controller.imgsz(kind)
+    overload = queue_ratio()
+    # 队列严重积压时，实时帧只要有上次结果就直接复用（丢弃本帧推理），避免延迟无限增长
+    results, signature = session.try_reuse(media_bgr, force=overload >= 0.75) if session is not None else (None, None)
+    if results is None:
+        start = time.perf_counter()
+        results, err_msg = infer_media(media_bgr, imgsz)
+        adaptive_controller.record(kind, (time.perf_counter() - start) * 1000, overload)
+        if results is None:
+            return None, err_msg
+        if session is not None:
+            results = session.update(media_bgr, results, signature)
+
+    annotated_bgr, detected = draw_detection_results(media_bgr, results, annotate=output != "detections")
 
     intro = "暂无检测物体" if not detected else ""  # 前端填充介绍
     detected_label = detected[0]['label'] if detected else ""
@@ -220,17 +1916,25 @@ def process_media(media_bgr, is_video_frame=False):
         if len(history_messages) > MAX_HISTORY_LENGTH:
             history_messages.pop(0)
 
-    buf = BytesIO()
-    pil_drawn.save(buf, format='JPEG', quality=85)
-    annotated_base64 = "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode()
-
-    return {
-        "annotated_base64": annotated_base64,
+    result = {
         "introduction": intro,
         "history": "\n".join(history_messages[-10:]),
         "detected_label": detected_label,
         "detections": detected
-    }, "ok"
+    }
+    if output == "detections":
+        h, w = media_bgr.shape[:2]
+        result["image_size"] = {"width": w, "height": h}
+        return result, "ok"
+
+    jpeg = jpeg_codec.encode(annotated_bgr, quality)
+    if jpeg is None:
+        return None, "结果图像编码失败"
+    if output == "jpeg":
+        result["annotated_jpeg"] = jpeg
+    else:
+        result["annotated_base64"] = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()
+    return result, "ok"
 
 
 # ------------------ Flask路由 ------------------
@@ -239,56 +1943,114 @@ def index():
     return render_template_string(INDEX_HTML)
 
 
-@app.route('/init_model', methods=['GET'])
-def init_model_endpoint():
-    global model, model_loaded, big_category_mapping, big_category_names, small_category_names
+def init_model():
+    """加载YAML与模型池（含预热和额外模型），启动推理线程；返回 (code, msg)，可重复调用"""
+    global model_registry, model_loaded, big_category_mapping, big_category_names, small_category_names
+    global inference_worker
     if model_loaded:
-        return jsonify({"code": 0, "msg": "✅ 模型已加载，可直接开始检测"})
+        return 0, "✅ 模型已加载，可直接开始检测"
+
+    if not os.path.exists(MODEL_PATH):
+        err_msg = f"模型文件不存在: {MODEL_PATH}"
+        logger.error(err_msg)
+        return 1, err_msg
+    if not os.path.exists(YAML_PATH):
+        err_msg = f"YAML配置不存在: {YAML_PATH}"
+        logger.error(err_msg)
+        return 2, err_msg
 
     try:
-        if not os.path.exists(MODEL_PATH):
-            err_msg = f"模型文件不存在: {MODEL_PATH}"
-            logger.error(err_msg)
-            return jsonify({"code": 1, "msg": err_msg})
-        if not os.path.exists(YAML_PATH):
-            err_msg = f"YAML配置不存在: {YAML_PATH}"
-            logger.error(err_msg)
-            return jsonify({"code": 2, "msg": err_msg})
+        with open(YAML_PATH, 'r', encoding='utf-8-sig') as f:
+            cfg = yaml.safe_load(f)
+        big_category_mapping = cfg.get("big_category_mapping", {})
+        big_category_names = cfg.get("big_category_names", {})
+        small_category_names = cfg.get("names", {})
+        renderer.set_categories(small_category_names, big_category_mapping, big_category_names)
+        logger.info(f"YAML配置加载成功，包含{len(small_category_names)}个小类别")
+    except Exception as e:
+        err_msg = f"YAML解析失败: {str(e)}"
+        logger.exception(err_msg)
+        return 4, err_msg
 
+    try:
+        if model_registry is not None:
+            registry = model_registry
+        elif WORKER_PROCESSES > 0:
+            registry = ProcessModelRegistry().start()
+        else:
+            registry = ModelRegistry()
+        registry.load(MODEL_PATH, activate=True)
+        logger.info(f"模型加载成功: {MODEL_PATH}")
+    except Exception as e:
+        err_msg = f"模型加载失败: {str(e)}"
+        logger.exception(err_msg)
+        return 3, err_msg
+    for path in EXTRA_MODEL_PATHS:
         try:
-            model = YOLO(MODEL_PATH)
-            logger.info(f"模型加载成功: {MODEL_PATH}")
+            registry.load(path)
         except Exception as e:
-            err_msg = f"模型加载失败: {str(e)}"
-            logger.exception(err_msg)
-            return jsonify({"code": 3, "msg": err_msg})
+            logger.warning(f"额外模型加载失败 {path}: {str(e)}")
+    model_registry = registry
 
-        try:
-            warmup_img = np.zeros((480, 640, 3), dtype=np.uint8)
-            model.predict(source=warmup_img, conf=0.5, imgsz=640, stream=False, verbose=False)
-            logger.info("模型预热完成")
-        except Exception as e:
-            logger.warning(f"模型预热失败: {str(e)}")
+    # 多进程模式下每个进程保持两批在途：一批在推理，下一批已写入共享内存等待
+    num_threads = registry.replicas * 2 if isinstance(registry, ProcessModelRegistry) else registry.replicas
+    inference_worker = BatchInferenceWorker(num_threads=num_threads)
+    inference_worker.start()
+
+    model_loaded = True
+    return 0, "✅ 模型加载成功，可开始检测"
+
+
+_init_lock = threading.Lock()
 
-        try:
-            with open(YAML_PATH, 'r', encoding='utf-8-sig') as f:
-                cfg = yaml.safe_load(f)
-            big_category_mapping = cfg.get("big_category_mapping", {})
-            big_category_names = cfg.get("big_category_names", {})
-            small_category_names = cfg.get("names", {})
-            logger.info(f"YAML配置加载成功，包含{len(small_category_names)}个小类别")
-        except Exception as e:
-            err_msg = f"YAML解析失败: {str(e)}"
-            logger.exception(err_msg)
-            return jsonify({"code": 4, "msg": err_msg})
 
-        model_loaded = True
-        return jsonify({"code": 0, "msg": "✅ 模型加载成功，可开始检测"})
+@app.route('/init_model', methods=['GET'])
+def init_model_endpoint():
+    try:
+        with _init_lock:
+            code, msg = init_model()
+        return jsonify({"code": code, "msg": msg})
     except Exception as e:
         logger.exception("模型初始化异常")
         return jsonify({"code": 500, "msg": f"初始化失败: {str(e)}"})
 
 
+@app.route('/models', methods=['GET'])
+def models_endpoint():
+    if model_registry is None:
+        return jsonify({"code": 1, "msg": "模型未加载，请先初始化", "data": {}})
+    return jsonify({"code": 0, "msg": "ok", "data": model_registry.status()})
+
+
+@app.route('/models/swap', methods=['POST'])
+def swap_model_endpoint():
+    """
+    热替换当前模型：{"path": "garbage_detection/xxx/weights/best.pt", "name": 可选}
+    或切换到已预加载的模型：{"name": "double_label_train7"}
+    """
+    if model_registry is None:
+        return jsonify({"code": 1, "msg": "模型未加载，请先初始化"})
+    data = request.get_json(silent=True) or {}
+    path, name = data.get("path"), data.get("name")
+    try:
+        if path:
+            path = str(Path(path).resolve())
+            if not os.path.exists(path):
+                return jsonify({"code": 404, "msg": f"模型文件不存在: {path}"})
+            model_registry.swap(path, name=name)
+            return jsonify({"code": 0, "msg": f"✅ 已热替换为 {model_registry.active_name}",
+                            "data": model_registry.status()})
+        if name:
+            model_registry.activate(name)
+            return jsonify({"code": 0, "msg": f"✅ 已切换为 {name}", "data": model_registry.status()})
+        return jsonify({"code": 400, "msg": "需要path或name字段"})
+    except KeyError:
+        return jsonify({"code": 404, "msg": f"未加载的模型: {name}"})
+    except Exception as e:
+        logger.exception("模型热替换失败")
+        return jsonify({"code": 500, "msg": f"模型热替换失败: {str(e)}"})
+
+
 @app.route('/start', methods=['POST'])
 def start_endpoint():
     global is_detecting_flag
@@ -305,17 +2067,79 @@ def stop_endpoint():
     return jsonify({"code": 0, "msg": "stopped"})
 
 
+@app.route('/stats', methods=['GET'])
+def stats_endpoint():
+    if inference_worker is None:
+        return jsonify({"code": 1, "msg": "推理线程未启动", "data": {}})
+    data = inference_worker.stats()
+    data["frame_reuse"] = frame_sessions.stats()
+    data["adaptive"] = adaptive_controller.stats()
+    return jsonify({"code": 0, "msg": "ok", "data": data})
+
+
+BINARY_IMAGE_TYPES = ("image/jpeg", "image/png", "image/webp", "application/octet-stream")
+
+
+def _read_request_image(base64_field, file_field):
+    """
+    从请求中读取图像，支持三种传输方式：
+      application/json       - {base64_field: "data:image/jpeg;base64,..."}
+      multipart/form-data    - 文件字段 file_field
+      image/jpeg 等二进制体   - 原始图像字节
+    返回 (img_bgr, None) 或 (None, 错误信息)
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        b64 = (data.get(base64_field) or '').strip()
+        if not b64:
+            return None, f"缺少{base64_field}字段"
+        return _check_decoded(*base64_to_cv2(b64))
+    if request.mimetype == "multipart/form-data":
+        file = request.files.get(file_field)
+        if file is None:
+            return None, f"缺少{file_field}文件字段"
+        return _check_decoded(*bytes_to_cv2(file.read()))
+    if request.mimetype in BINARY_IMAGE_TYPES:
+        return _check_decoded(*bytes_to_cv2(request.get_data(cache=False)))
+    return None, "请求格式错误，请使用application/json、multipart/form-data或image/jpeg"
+
+
+def _check_decoded(img, msg):
+    return (img, None) if img is not None else (None, msg)
+
+
+def _request_output_options():
+    """返回格式与JPEG质量：?format=json|jpeg|detections&quality=1~100（multipart时也可放在表单字段中）"""
+    output = (request.args.get("format") or request.form.get("format") or "json").lower()
+    if output not in OUTPUT_FORMATS:
+        output = "json"
+    try:
+        quality = int(request.args.get("quality") or request.form.get("quality") or JPEG_QUALITY)
+    except ValueError:
+        quality = JPEG_QUALITY
+    return output, quality
+
+
+def _media_response(result, output):
+    if output != "jpeg":
+        return jsonify({"code": 0, "msg": "ok", "data": result})
+    jpeg = result.pop("annotated_jpeg")
+    resp = Response(jpeg, mimetype="image/jpeg")
+    # 检测结果放在响应头中（ASCII转义的JSON），客户端无需额外请求
+    resp.headers["X-Detections"] = json.dumps(result["detections"], ensure_ascii=True, separators=(",", ":"))
+    resp.headers["X-Detected-Label"] = json.dumps(result["detected_label"], ensure_ascii=True)
+    return resp
+
+
+def _session_key():
+    """实时检测会话标识：X-Session-Id请求头或?session=参数，缺省按客户端地址区分"""
+    return request.headers.get("X-Session-Id") or request.args.get("session") or request.remote_addr
+
+
 @app.route('/process_frame', methods=['POST'])
 def process_frame_endpoint():
     try:
-        if not request.is_json:
-            return jsonify({"code": 400, "msg": "请求格式错误，请使用application/json"})
-        data = request.json or {}
-        frame_base64 = data.get('frame_base64', '').strip()
-        if not frame_base64:
-            return jsonify({"code": 400, "msg": "缺少frame_base64字段"})
-
-        frame_bgr, err = base64_to_cv2(frame_base64)
+        frame_bgr, err = _read_request_image('frame_base64', 'frame')
         if frame_bgr is None:
             return jsonify({"code": 400, "msg": f"帧解码失败: {err}"})
 
@@ -326,11 +2150,13 @@ def process_frame_endpoint():
             except Exception as e:
                 logger.warning(f"调试帧保存失败: {e}")
 
-        result, msg = process_media(frame_bgr, is_video_frame=True)
+        output, quality = _request_output_options()
+        session = frame_sessions.get(_session_key()) if FRAME_REUSE else None
+        result, msg = process_media(frame_bgr, is_video_frame=True, output=output, quality=quality, session=session)
         if result is None:
             return jsonify({"code": 500, "msg": msg})
 
-        return jsonify({"code": 0, "msg": "ok", "data": result})
+        return _media_response(result, output)
     except Exception as e:
         logger.exception("帧处理异常")
         return jsonify({"code": 500, "msg": f"帧处理失败: {str(e)}"})
@@ -339,129 +2165,130 @@ def process_frame_endpoint():
 @app.route('/process_image', methods=['POST'])
 def process_image_endpoint():
     try:
-        if not request.is_json:
-            return jsonify({"code": 400, "msg": "请求格式错误"})
-        data = request.json or {}
-        image_base64 = data.get('image_base64', '').strip()
-        if not image_base64:
-            return jsonify({"code": 400, "msg": "缺少image_base64字段"})
-
-        img_bgr, err = base64_to_cv2(image_base64)
+        img_bgr, err = _read_request_image('image_base64', 'image')
         if img_bgr is None:
             return jsonify({"code": 400, "msg": f"图片解码失败: {err}"})
 
-        result, msg = process_media(img_bgr, is_video_frame=False)
+        output, quality = _request_output_options()
+        result, msg = process_media(img_bgr, is_video_frame=False, output=output, quality=quality)
         if result is None:
             return jsonify({"code": 500, "msg": msg})
 
-        return jsonify({"code": 0, "msg": "ok", "data": result})
+        return _media_response(result, output)
     except Exception as e:
         logger.exception("图片处理异常")
         return jsonify({"code": 500, "msg": f"图片处理失败: {str(e)}"})
 
 
+def _save_uploaded_video():
+    """保存上传的视频到临时文件，返回 (input_path, filename, None) 或 (None, None, 错误响应)"""
+    if 'video' not in request.files:
+        return None, None, jsonify({"code": 400, "msg": "缺少视频文件"})
+
+    video_file = request.files['video']
+    if video_file.filename == '':
+        return None, None, jsonify({"code": 400, "msg": "视频文件名为空"})
+
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(video_file.filename)[1], delete=False) as tmp:
+        input_path = tmp.name
+        video_file.save(tmp)
+    logger.info(f"视频保存成功: {input_path}")
+    return input_path, video_file.filename, None
+
+
+def _submit_uploaded_video():
+    """保存上传视频并提交任务，返回 (job, None) 或 (None, 错误响应)"""
+    input_path, filename, err_resp = _save_uploaded_video()
+    if err_resp is not None:
+        return None, err_resp
+    job, msg = job_manager.submit(input_path, filename)
+    if job is None:
+        _remove_file(input_path)
+        return None, jsonify({"code": 503, "msg": msg})
+    return job, None
+
+
 @app.route('/process_video', methods=['POST'])
 def process_video_endpoint():
-    global history_messages
+    """同步接口（兼容旧前端）：提交任务后等待完成再返回；长视频请使用 /jobs"""
     try:
-        if 'video' not in request.files:
-            return jsonify({"code": 400, "msg": "缺少视频文件"})
+        job, err_resp = _submit_uploaded_video()
+        if err_resp is not None:
+            return err_resp
+        try:
+            job.future.result()
+        except Exception:
+            pass  # 已取消的任务，状态在下方统一处理
 
-        video_file = request.files['video']
-        if video_file.filename == '':
-            return jsonify({"code": 400, "msg": "视频文件名为空"})
+        if job.status != "done":
+            return jsonify({"code": 500, "msg": job.error or "视频任务已取消"})
+        return jsonify({"code": 0, "msg": "视频处理完成", "data": job.result})
+    except Exception as e:
+        logger.exception("视频处理异常")
+        return jsonify({"code": 500, "msg": f"视频处理失败: {str(e)}"})
 
-        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(video_file.filename)[1], delete=False) as tmp:
-            input_path = tmp.name
-            video_file.save(tmp)
-        logger.info(f"视频保存成功: {input_path}")
 
-        cap = cv2.VideoCapture(input_path)
-        if not cap.isOpened():
-            os.unlink(input_path)
-            return jsonify({"code": 500, "msg": "无法打开视频"})
+@app.route('/jobs', methods=['POST'])
+def submit_job_endpoint():
+    try:
+        job, err_resp = _submit_uploaded_video()
+        if err_resp is not None:
+            return err_resp
+        return jsonify({
+            "code": 0,
+            "msg": "任务已提交",
+            "data": {
+                "job_id": job.job_id,
+                "status": job.status,
+                "status_url": f"/jobs/{job.job_id}",
+                "stream_url": f"/jobs/{job.job_id}/stream",
+            }
+        })
+    except Exception as e:
+        logger.exception("视频任务提交异常")
+        return jsonify({"code": 500, "msg": f"任务提交失败: {str(e)}"})
 
-        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
-        logger.info(f"视频信息: {width}x{height}, {fps:.1f}FPS")
 
-        out_name = f"processed_{int(time.time())}_{os.path.splitext(video_file.filename)[0]}.mp4"
-        out_path = os.path.join(PROCESSED_VIDEO_DIR, out_name)
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(out_path, fourcc, fps, (width, height))
-        if not out.isOpened():
-            cap.release()
-            os.unlink(input_path)
-            return jsonify({"code": 500, "msg": "视频写入器初始化失败"})
+@app.route('/jobs', methods=['GET'])
+def list_jobs_endpoint():
+    jobs = sorted(job_manager.list(), key=lambda j: j.created_at, reverse=True)
+    return jsonify({"code": 0, "msg": "ok", "data": [
+        {k: v for k, v in j.to_dict().items() if k not in ("detections", "result")} for j in jobs
+    ]})
 
-        detected_set = {}
-        frame_idx = 0
-        video_duration = total_frames / fps if fps > 0 else 0
-        sample_interval = max(1, int(fps / (10 if video_duration < 60 else 5 if video_duration < 300 else 2)))
-        logger.info(f"视频采样间隔: {sample_interval}帧")
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_endpoint(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"code": 404, "msg": "任务不存在或已过期"}), 404
+    return jsonify({"code": 0, "msg": "ok", "data": job.to_dict()})
 
-            frame_idx += 1
-            if frame_idx % sample_interval != 0:
-                out.write(frame)
-                continue
 
-            try:
-                results = model(frame, conf=0.5, imgsz=480, verbose=False)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_img = Image.fromarray(frame_rgb)
-                pil_drawn, detected = draw_detection_results(pil_img, frame, results)
-                out_frame = cv2.cvtColor(np.array(pil_drawn), cv2.COLOR_RGB2BGR)
-                out.write(out_frame)
-
-                for d in detected:
-                    if d['label'] not in detected_set or d['confidence'] > detected_set[d['label']]['confidence']:
-                        detected_set[d['label']] = d
-            except Exception as e:
-                logger.warning(f"处理第{frame_idx}帧失败: {str(e)}")
-                out.write(frame)
-                continue
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def job_stream_endpoint(job_id):
+    """Server-Sent Events：周期推送进度和部分检测汇总，任务结束后推送最终结果并关闭"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"code": 404, "msg": "任务不存在或已过期"}), 404
 
-        cap.release()
-        out.release()
-        os.unlink(input_path)
-        logger.info(f"视频处理完成: {out_path}")
+    def generate():
+        while True:
+            info = job.to_dict()
+            yield f"data: {json.dumps(info, ensure_ascii=False)}\n\n"
+            if info["status"] not in VideoJob.ACTIVE:
+                break
+            time.sleep(0.5)
 
-        detections = sorted(list(detected_set.values()), key=lambda x: x['confidence'], reverse=True)
-        if detections:
-            detected_labels = [d['label'] for d in detections]
-            final_intro = ""  # 前端填充介绍
-            full_intro = ""
-        else:
-            final_intro = "未检测到物体"
-            full_intro = final_intro
-            detections = []
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-        history_item = f"[视频检测] {os.path.basename(video_file.filename)}\n{final_intro}\n"
-        history_messages.append(history_item)
-        if len(history_messages) > MAX_HISTORY_LENGTH:
-            history_messages.pop(0)
 
-        return jsonify({
-            "code": 0,
-            "msg": "视频处理完成",
-            "data": {
-                "download_url": f"/download_processed_video/{out_name}",
-                "introduction": full_intro,
-                "history": "\n".join(history_messages[-10:]),
-                "detections": detections,
-                "detected_labels": detected_labels if detections else []
-            }
-        })
-    except Exception as e:
-        logger.exception("视频处理异常")
-        return jsonify({"code": 500, "msg": f"视频处理失败: {str(e)}"})
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job_endpoint(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"code": 404, "msg": "任务不存在或已过期"}), 404
+    return jsonify({"code": 0, "msg": "已请求取消", "data": {"job_id": job.job_id, "status": job.status}})
 
 
 @app.route('/download_processed_video/<filename>')
@@ -475,6 +2302,8 @@ def download_processed_video(filename):
         if not video_path.endswith('.mp4'):
             logger.warning(f"禁止下载非视频文件: {video_path}")
             return jsonify({"code": 403, "msg": "不支持的文件类型"}), 403
+        if job_manager.is_active_output(safe_filename):
+            return jsonify({"code": 409, "msg": "视频仍在处理中"}), 409
         return send_from_directory(PROCESSED_VIDEO_DIR, safe_filename, as_attachment=True)
     except Exception as e:
         logger.exception("视频下载异常")
@@ -483,15 +2312,19 @@ def download_processed_video(filename):
 
 # ------------------ 启动配置 ------------------
 def cleanup_temp_files():
+    """清理调试帧和过期的处理结果；进行中或仍在保留期内的任务输出不会被删除"""
     try:
         if os.path.exists(DEBUG_SAVE_DIR):
             files = sorted(Path(DEBUG_SAVE_DIR).glob('*.jpg'), key=os.path.getmtime)
             for f in files[:-100]:
                 os.remove(f)
+        for job in job_manager.purge_expired():
+            _remove_file(job.out_path)
         if os.path.exists(PROCESSED_VIDEO_DIR):
             now = time.time()
+            protected = job_manager.protected_outputs()
             for f in Path(PROCESSED_VIDEO_DIR).glob('*.mp4'):
-                if now - os.path.getmtime(f) > 86400:
+                if f.name not in protected and now - os.path.getmtime(f) > JOB_RETENTION_SECONDS:
                     os.remove(f)
         logger.info("临时文件清理完成")
     except Exception as e:
@@ -501,6 +2334,9 @@ def cleanup_temp_files():
 if __name__ == '__main__':
     try:
         cleanup_temp_files()
+        if PRELOAD_MODEL:
+            code, msg = init_model()
+            logger.info(f"启动时预加载模型: {msg}")
         logger.info(f"服务启动，视频保存目录: {PROCESSED_VIDEO_DIR}")
         logger.info(f"后端服务地址: http://0.0.0.0:5000")
         app.run(
@@ -511,4 +2347,9 @@ if __name__ == '__main__':
             use_reloader=False
         )
     finally:
+        job_manager.shutdown()
+        if inference_worker is not None:
+            inference_worker.stop()
+        if isinstance(model_registry, ProcessModelRegistry):
+            model_registry.stop()
         cleanup_temp_files()
\ No newline at end of file
@@ -1,4 +1,10 @@
 import tempfile
+import threading
+import time
+import json
+import platform
+import importlib.util
+from collections import deque
 
 import gradio as gr
 import yaml
@@ -100,8 +106,25 @@ GARBAGE_INTRODUCTION = {
 MODEL_PATH = r"garbage_detection/double_label_train7/weights/best.pt"
 YAML_PATH = "lajifenlei.yaml"
 
+# 预热使用的推理尺寸（与process_frame中的imgsz一致）
+SERVED_IMGSZ = 640
+
+# 摄像头异步模式：后台线程只推理最新帧，界面立即叠加最近一次结果；False时每帧同步推理
+WEBCAM_ASYNC = os.getenv("GARBAGE_WEBCAM_ASYNC", "True").lower() == "true"
+WEBCAM_DETS_MAX_AGE = 1.0  # 秒，检测结果对应的帧超过该时长（如摄像头停止后重新开启）不再叠加
+
+# 推理后端：auto（导出ONNX/OpenVINO并与.pt在本机对比，选最快）/ pt / onnx / openvino
+SERVE_BACKEND = os.getenv("GARBAGE_BACKEND", "auto").lower()
+BACKEND_RUNTIMES = {"onnx": "onnxruntime", "openvino": "openvino"}  # 导出格式 → 推理所需的Python包
+BACKEND_RECORD_FILE = "serve_backend.json"  # 与14.py共用，保存在权重同目录
+BENCHMARK_RUNS = 20
+
 # 全局变量：模型和标签映射
 model = None
+model_mtime = None  # 当前已加载权重文件的修改时间，用于判断best.pt是否被重新训练覆盖
+model_lock = threading.Lock()
+reload_thread = None  # 后台加载新权重的线程，同一时间最多一个
+reload_error = None  # 最近一次后台加载失败的原因
 big_category_mapping = None
 big_category_names = None
 small_category_names = None
@@ -110,21 +133,118 @@ small_category_names = None
 history_messages = []
 
 
-def init_model():
-    """初始化模型和配置（页面加载时执行）"""
-    global model, big_category_mapping, big_category_names, small_category_names
+def benchmark_backend(path, imgsz=SERVED_IMGSZ, runs=BENCHMARK_RUNS):
+    """本机单张推理平均耗时（毫秒）"""
+    bench_model = YOLO(path, task="detect")
+    img = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+    bench_model.predict(img, conf=0.5, imgsz=imgsz, verbose=False)  # 预热
+    start = time.perf_counter()
+    for _ in range(runs):
+        bench_model.predict(img, conf=0.5, imgsz=imgsz, verbose=False)
+    return (time.perf_counter() - start) * 1000 / runs
+
+
+def select_serving_weights(pt_path):
+    """首次启动导出候选后端并在本机基准测试，记录最快者；之后主机和权重不变时直接复用记录"""
+    if SERVE_BACKEND == "pt" or not pt_path.endswith(".pt"):
+        return pt_path
+    record_file = os.path.join(os.path.dirname(pt_path), BACKEND_RECORD_FILE)
     try:
-        if not os.path.exists(MODEL_PATH):
-            return f"❌ 模型文件不存在：\n{MODEL_PATH}"
-        if not os.path.exists(YAML_PATH):
-            return f"❌ 配置文件不存在：\n{YAML_PATH}"
+        with open(record_file, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        records = {}
+    st = os.stat(pt_path)
+    key = f"{platform.node()}|cpu{os.cpu_count()}|{st.st_size}|{int(st.st_mtime)}|{SERVED_IMGSZ}|int8=False"
+    record = records.get(key)
+    if record and (record["backend"] == "pt" or os.path.exists(record["path"])):
+        return record["path"]
+
+    if SERVE_BACKEND == "auto":
+        formats = [fmt for fmt, mod in BACKEND_RUNTIMES.items() if importlib.util.find_spec(mod) is not None]
+    else:
+        formats = [SERVE_BACKEND]
+    candidates = {"pt": pt_path}
+    for fmt in formats:
+        try:
+            candidates[fmt] = str(YOLO(pt_path).export(format=fmt, imgsz=SERVED_IMGSZ, dynamic=True))
+        except Exception as e:
+            print(f"导出{fmt}失败，跳过该后端: {e}")
+
+    timings = {}
+    if SERVE_BACKEND == "auto":
+        for fmt, path in candidates.items():
+            try:
+                timings[fmt] = round(benchmark_backend(path), 2)
+            except Exception as e:
+                print(f"后端{fmt}基准测试失败: {e}")
+        best = min(timings, key=timings.get) if timings else "pt"
+    else:
+        best = SERVE_BACKEND if SERVE_BACKEND in candidates else "pt"
+
+    records[key] = {"backend": best, "path": candidates[best], "timings_ms": timings, "created_at": time.time()}
+    try:
+        with open(record_file, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"推理后端记录保存失败: {e}")
+    print(f"选用推理后端: {best} {timings}")
+    return candidates[best]
+
 
-        model = YOLO(MODEL_PATH)
+def load_warm_model(path, imgsz=SERVED_IMGSZ):
+    """选择推理后端后加载模型并空跑一次，提前完成AutoBackend构建、层融合和图初始化，避免首帧卡顿"""
+    new_model = YOLO(select_serving_weights(path), task="detect")
+    new_model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), conf=0.5, imgsz=imgsz, verbose=False)
+    return new_model
+
+
+def reload_model(mtime):
+    """后台线程：选择推理后端、加载并预热新权重，完成后再整体替换全局模型，期间页面和正在处理的帧继续用旧模型"""
+    global model, model_mtime, big_category_mapping, big_category_names, small_category_names, reload_error
+    try:
+        new_model = load_warm_model(MODEL_PATH)
         with open(YAML_PATH, "r", encoding="utf-8") as f:
             cfg = yaml.safe_load(f)
+    except Exception as e:
+        reload_error = str(e)
+        print(f"❌ 模型加载失败：{e}")
+        return
+    with model_lock:
         big_category_mapping = cfg["big_category_mapping"]
         big_category_names = cfg["big_category_names"]
         small_category_names = cfg["names"]
+        model, model_mtime, reload_error = new_model, mtime, None
+    print("✅ 模型已加载并预热")
+
+
+def init_model():
+    """
+    初始化模型（页面每次加载都会调用）：已加载且权重未变化时直接返回；
+    best.pt更新后在后台线程导出/加载预热新模型，本次调用立即返回并继续使用旧模型，新模型就绪后整体替换。
+    还没有任何模型时（首次启动）等待后台加载完成。
+    """
+    global reload_thread
+    try:
+        if not os.path.exists(MODEL_PATH):
+            return f"❌ 模型文件不存在：\n{MODEL_PATH}"
+        if not os.path.exists(YAML_PATH):
+            return f"❌ 配置文件不存在：\n{YAML_PATH}"
+
+        with model_lock:
+            mtime = os.path.getmtime(MODEL_PATH)
+            if model is not None and mtime == model_mtime:
+                return "✅ 模型已加载，点击「开始检测」启用摄像头检测"
+            if reload_thread is None or not reload_thread.is_alive():
+                reload_thread = threading.Thread(target=reload_model, args=(mtime,), name="model-reload", daemon=True)
+                reload_thread.start()
+            thread, swapping = reload_thread, model is not None
+
+        if swapping:
+            return "⏳ 检测到新权重，正在后台加载预热，完成前继续使用当前模型"
+        thread.join()  # 首次启动没有可用的旧模型
+        if model is None:
+            return f"❌ 初始化失败：{reload_error}"
         return "✅ 模型加载成功，点击「开始检测」启用摄像头检测"
     except Exception as e:
         return f"❌ 初始化失败：{str(e)}"
@@ -139,91 +259,237 @@ def get_ai_introduction(big_name, small_name):
     return f"{intro}/"
 
 
-def process_frame(frame, is_detecting, last_detected_label, is_mirrored):
-    """处理帧函数，新增镜像参数"""
-    global model, big_category_mapping, big_category_names, small_category_names
+class LabelCache:
+    """字体只加载一次；类别标签和"0.00"~"1.00"置信度文字首次用到时渲染成小图缓存，所有帧和线程共享"""
+
+    FONT_PATHS = ["C:/Windows/Fonts/simhei.ttf", "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"]
+
+    def __init__(self, font_size=20):
+        self.font_size = font_size
+        self._font = None
+        self._height = 0
+        self._patches = {}
+        self._lock = threading.Lock()
 
-    current_introduction = "暂无检测物体"
+    def font(self):
+        if self._font is None:
+            for path in self.FONT_PATHS:
+                try:
+                    self._font = ImageFont.truetype(path, self.font_size)
+                    break
+                except OSError:
+                    continue
+            else:
+                self._font = ImageFont.load_default()
+            left, top, right, bottom = self._font.getbbox("国0")
+            self._height = bottom
+        return self._font
+
+    def patch(self, text):
+        """绿底黑字的RGB标签小图"""
+        cached = self._patches.get(text)
+        if cached is not None:
+            return cached
+        with self._lock:
+            font = self.font()
+            width = max(1, int(font.getlength(text)))
+            img = Image.new("RGB", (width, self._height), (0, 255, 0))
+            ImageDraw.Draw(img).text((0, 0), text, font=font, fill=(0, 0, 0))
+            cached = self._patches[text] = np.asarray(img)
+        return cached
+
+    def label(self, name, conf):
+        return np.hstack([self.patch(f"{name} "), self.patch(f"{conf:.2f}")])
+
+
+label_cache = LabelCache()
+
+
+def detect(current_model, frame_rgb):
+    """推理一帧RGB画面，返回 n×6 的 [x1, y1, x2, y2, conf, cls] 数组"""
+    frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
+    results = current_model(frame_bgr, conf=0.5, imgsz=SERVED_IMGSZ, verbose=False)
+    return results[0].boxes.data.cpu().numpy()
+
+
+def compose(frame_rgb, dets):
+    """把检测结果直接画在RGB数组上（不经过PIL整图转换），返回 (标注图, 检测到的物体列表)"""
+    annotated = frame_rgb.copy()
+    h, w = annotated.shape[:2]
+    detected_objects = []
+    for x1, y1, x2, y2, conf, cls in dets.tolist():
+        x1, y1, x2, y2, small_idx = int(x1), int(y1), int(x2), int(y2), int(cls)
+        big_idx = big_category_mapping.get(small_idx, -1)
+        small_name = small_category_names.get(small_idx, "未知小类")
+        big_name = big_category_names.get(big_idx, "未知大类") if big_idx != -1 else "未知大类"
+        label = f"{big_name}/{small_name}"
+        detected_objects.append({
+            "big_name": big_name,
+            "small_name": small_name,
+            "label": label,
+            "confidence": conf
+        })
+
+        # 绘制边界框和标签（标签位于框左上角上方25像素，超出画面部分裁掉）
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 3)
+        patch = label_cache.label(label, conf)
+        ty, tx = y1 - 25, x1
+        y0, x0 = max(ty, 0), max(tx, 0)
+        y_end, x_end = min(ty + patch.shape[0], h), min(tx + patch.shape[1], w)
+        if y_end > y0 and x_end > x0:
+            annotated[y0:y_end, x0:x_end] = patch[y0 - ty:y_end - ty, x0 - tx:x_end - tx]
+    return annotated, detected_objects
+
+
+def summarize(detected_objects, is_detecting, last_detected_label):
+    """根据检测结果生成介绍、当前标签和历史记录文本"""
     current_label = last_detected_label
+    # 如果有检测到的物体，获取第一个物体的AI介绍
+    if detected_objects and is_detecting:
+        # 按置信度排序，选择最可信的物体
+        best_object = max(detected_objects, key=lambda x: x["confidence"])
+        current_label = best_object["label"]
+
+        # 只有当标签变化时才重新获取介绍
+        if current_label != last_detected_label:
+            current_introduction = get_ai_introduction(best_object["big_name"], best_object["small_name"])
+            # 添加到历史记录
+            history_messages.append(f"检测到: {best_object['label']}\n{current_introduction}\n")
+        else:
+            current_introduction = "正在获取介绍..."  # 保持原有介绍
+    else:
+        current_introduction = "暂无检测物体" if is_detecting else "检测已暂停"
+        current_label = ""
 
-    if model is None or frame is None:
-        return frame, current_introduction, current_label, ""
+    # 生成历史记录文本
+    history_text = "\n".join(history_messages[-10:])  # 只保留最近10条
+    return current_introduction, current_label, history_text
+
+
+def process_frame(frame, is_detecting, last_detected_label, is_mirrored):
+    """处理帧函数（同步推理，用于图片和视频），新增镜像参数"""
+    current_model = model  # 取一次引用，热更新时本帧仍用旧模型完成
+    if current_model is None or frame is None:
+        return frame, "暂无检测物体", last_detected_label, ""
 
     try:
         # 如果需要镜像，先翻转画面
         if is_mirrored:
             frame = cv2.flip(frame, 1)  # 水平翻转
 
-        # 格式转换：RGB（Gradio输入）→ BGR（模型处理）
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        # 模型推理
-        results = model(frame_bgr, conf=0.5, imgsz=640)
+        annotated, detected_objects = compose(frame, detect(current_model, frame))
+        current_introduction, current_label, history_text = summarize(
+            detected_objects, is_detecting, last_detected_label)
+        return annotated, current_introduction, current_label, history_text
 
-        # 绘制检测结果
-        pil_img = Image.fromarray(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
-        draw = ImageDraw.Draw(pil_img)
-        try:
-            font = ImageFont.truetype("C:/Windows/Fonts/simhei.ttf", 20)
-        except:
-            font = ImageFont.load_default()
-
-        detected_objects = []
-
-        for result in results:
-            for box in result.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                conf = float(box.conf[0].cpu().numpy())
-                small_idx = int(box.cls[0].cpu().numpy())
-                big_idx = big_category_mapping.get(small_idx, -1)
-                small_name = small_category_names.get(small_idx, "未知小类")
-                big_name = big_category_names.get(big_idx, "未知大类") if big_idx != -1 else "未知大类"
-
-                # 记录检测到的物体
-                label = f"{big_name}/{small_name}"
-                detected_objects.append({
-                    "big_name": big_name,
-                    "small_name": small_name,
-                    "label": label,
-                    "confidence": conf
-                })
-
-                # 绘制边界框
-                draw.rectangle([(x1, y1), (x2, y2)], outline=(0, 255, 0), width=3)
-
-                # 绘制标签背景
-                display_label = f"{big_name}/{small_name} {conf:.2f}"
-                text_bbox = draw.textbbox((x1, y1 - 25), display_label, font=font)
-                draw.rectangle(text_bbox, fill=(0, 255, 0))
-
-                # 绘制标签文字
-                draw.text((x1, y1 - 25), display_label, font=font, fill=(0, 0, 0))
-
-        # 如果有检测到的物体，获取第一个物体的AI介绍
-        if detected_objects and is_detecting:
-            # 按置信度排序，选择最可信的物体
-            detected_objects.sort(key=lambda x: x["confidence"], reverse=True)
-            best_object = detected_objects[0]
-            current_label = best_object["label"]
-
-            # 只有当标签变化时才重新获取介绍
-            if current_label != last_detected_label:
-                current_introduction = get_ai_introduction(best_object["big_name"], best_object["small_name"])
-                # 添加到历史记录
-                history_messages.append(f"检测到: {best_object['label']}\n{current_introduction}\n")
-            else:
-                current_introduction = "正在获取介绍..."  # 保持原有介绍
-        else:
-            current_introduction = "暂无检测物体" if is_detecting else "检测已暂停"
-            current_label = ""
+    except Exception as e:
+        print(f"处理帧时出错: {e}")
+        return frame, f"处理错误: {str(e)}", "", ""
 
-        # 生成历史记录文本
-        history_text = "\n".join(history_messages[-10:])  # 只保留最近10条
 
-        return np.array(pil_img), current_introduction, current_label, history_text
+class RateMeter:
+    """最近window秒内的事件速率"""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def tick(self):
+        now = time.perf_counter()
+        with self._lock:
+            self._times.append(now)
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+
+    def rate(self):
+        now = time.perf_counter()
+        with self._lock:
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+            return len(self._times) / self.window
+
+
+class LatestFrameWorker:
+    """
+    摄像头后台推理线程：只保留最新一帧，推理期间到达的帧直接覆盖旧帧（旧帧丢弃不排队）；
+    界面回调不等待推理，立即把最近一次完成的检测结果叠加到当前画面上，显示帧率与模型延迟解耦。
+    检测结果记录所属帧的提交时间和镜像设置，过期或镜像设置不同的结果不再叠加。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._dets = np.zeros((0, 6), dtype=np.float32)
+        self._dets_info = (float("-inf"), False)  # 检测结果所属帧的 (提交时间, 是否镜像)
+        self._thread = None
+        self.dropped = 0
+        self.last_infer_ms = 0.0
+        self.display_meter = RateMeter()
+        self.infer_meter = RateMeter()
+
+    def submit(self, frame_rgb, is_mirrored=False):
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame_rgb, (time.perf_counter(), is_mirrored)
+            self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="webcam-inference", daemon=True)
+                self._thread.start()
+
+    def latest(self, is_mirrored=False, max_age=WEBCAM_DETS_MAX_AGE):
+        """最近一次检测结果；所属帧早于max_age秒或镜像设置不同时返回空结果"""
+        with self._cond:
+            submitted, mirrored = self._dets_info
+            if mirrored != is_mirrored or time.perf_counter() - submitted > max_age:
+                return self._dets[:0]
+            return self._dets
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._frame is not None)
+                (frame, info), self._frame = self._frame, None
+            current_model = model
+            if current_model is None:
+                continue
+            try:
+                start = time.perf_counter()
+                dets = detect(current_model, frame)
+                self.last_infer_ms = (time.perf_counter() - start) * 1000
+            except Exception as e:
+                print(f"后台推理出错: {e}")
+                continue
+            with self._cond:
+                self._dets, self._dets_info = dets, info
+            self.infer_meter.tick()
+
+    def fps_text(self):
+        return (f"显示 {self.display_meter.rate():.1f} FPS ｜ 推理 {self.infer_meter.rate():.1f} FPS "
+                f"（{self.last_infer_ms:.0f}ms/帧）｜ 丢弃旧帧 {self.dropped}")
+
+
+webcam_worker = LatestFrameWorker()
+
+
+def process_stream_frame(frame, is_detecting, last_detected_label, is_mirrored):
+    """摄像头流回调：提交最新帧给后台线程，用已有的最新检测结果立即合成画面"""
+    if model is None or frame is None:
+        return frame, "暂无检测物体", last_detected_label, "", ""
 
+    try:
+        if is_mirrored:
+            frame = cv2.flip(frame, 1)
+        webcam_worker.submit(frame, is_mirrored)
+        annotated, detected_objects = compose(frame, webcam_worker.latest(is_mirrored))
+        current_introduction, current_label, history_text = summarize(
+            detected_objects, is_detecting, last_detected_label)
+        webcam_worker.display_meter.tick()
+        return annotated, current_introduction, current_label, history_text, webcam_worker.fps_text()
     except Exception as e:
         print(f"处理帧时出错: {e}")
-        return frame, f"处理错误: {str(e)}", "", ""
+        return frame, f"处理错误: {str(e)}", "", "", ""
 
 
 def process_image(image, is_mirrored):
@@ -397,6 +663,13 @@ with gr.Blocks(title="垃圾分类实时检测系统") as demo:
 
         # AI介绍区域
         with gr.Column(scale=1):
+            fps_info = gr.Textbox(
+                label="⏱️ 帧率",
+                value="",
+                interactive=False,
+                lines=1
+            )
+
             ai_introduction = gr.Textbox(
                 label="🧠 详细垃圾分类介绍",
                 value="等待检测物体...",
@@ -428,14 +701,16 @@ with gr.Blocks(title="垃圾分类实时检测系统") as demo:
     # 视频流处理函数
     def video_stream(frame, detecting_state, last_label, mirror_state):
         """处理视频流，新增镜像参数"""
-        return process_frame(frame, detecting_state, last_label, mirror_state)
+        if WEBCAM_ASYNC:
+            return process_stream_frame(frame, detecting_state, last_label, mirror_state)
+        return process_frame(frame, detecting_state, last_label, mirror_state) + ("同步模式",)
 
 
     # 绑定视频流处理
     webcam.stream(
         video_stream,
         inputs=[webcam, is_detecting, last_detected_label, is_mirrored],
-        outputs=[webcam, ai_introduction, last_detected_label, ai_history],
+        outputs=[webcam, ai_introduction, last_detected_label, ai_history, fps_info],
         show_progress="hidden"
     )
 
@@ -506,6 +781,7 @@ with gr.Blocks(title="垃圾分类实时检测系统") as demo:
 
 # 启动界面
 if __name__ == "__main__":
+    print(init_model())  # 启动时预加载并预热，首个访问者无需等待
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
@@ -1,6 +1,7 @@
 import os
-import random
+import hashlib
 import shutil
+from collections import Counter, defaultdict
 from tqdm import tqdm  # 进度条显示
 
 # 配置路径
@@ -8,64 +9,160 @@ img_dir = r"D:\Study\ultralytics-main\MyDataset\JPEGImages"  # 原始图片文
 label_dir = r"D:\Study\ultralytics-main\MyDataset\labels"  # 原始标注文件夹路径
 output_dir = r"D:\Study\ultralytics-main\datasets"  # 输出根目录
 
-# 创建输出目录结构
-os.makedirs(os.path.join(output_dir, "images/train"), exist_ok=True)
-os.makedirs(os.path.join(output_dir, "images/val"), exist_ok=True)
-os.makedirs(os.path.join(output_dir, "labels/train"), exist_ok=True)
-os.makedirs(os.path.join(output_dir, "labels/val"), exist_ok=True)
+VAL_RATIO = 0.2  # 验证集比例
+# 按类别分层：每个类别内各自按比例划分验证集。分层按排名取边界，新增图片或修改标注会让已有图片换组，
+# 默认关闭；不分层时按文件名哈希划分，已有图片的归属永远不变
+STRATIFY = False
+# 输出方式：
+#   link - 在 images/{train,val}、labels/{train,val} 下建立硬链接（不支持时退回符号链接），lajifenlei.yaml无需修改
+#   list - 文件只链接一次到 images/all、labels/all，划分结果写成 train.txt / val.txt，
+#          yaml中改为 train: train.txt、val: val.txt，重新划分只需重写这两个文件
+MODE = "link"
 
-# 获取所有图片文件列表（支持多种格式）
+# 支持的图片格式
 img_exts = [".jpg", ".jpeg", ".png", ".bmp"]
-img_files = [f for f in os.listdir(img_dir)
-             if os.path.splitext(f)[1].lower() in img_exts]
-
-# 过滤存在对应标注文件的图片
-valid_files = []
-for img_file in img_files:
-    base_name = os.path.splitext(img_file)[0]
-    label_file = f"{base_name}.txt"
-    label_path = os.path.join(label_dir, label_file)
-
-    if os.path.exists(label_path):
-        valid_files.append((img_file, label_file))
-    else:
-        print(f"警告：{img_file} 没有对应的标注文件，已跳过")
 
-# 设置随机种子保证可重复性
-random.seed(42)
-random.shuffle(valid_files)
 
-# 计算分割点
-split_idx = int(len(valid_files) * 0.8)
-train_files = valid_files[:split_idx]
-val_files = valid_files[split_idx:]
+def stable_fraction(name):
+    """文件名的确定性哈希映射到[0, 1)：与文件列表顺序、随机种子和新增文件无关"""
+    digest = hashlib.md5(os.path.splitext(name)[0].encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def primary_class(label_path):
+    """标注中出现次数最多的类别（并列取编号最小者），空标注返回-1"""
+    counter = Counter()
+    with open(label_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                counter[int(float(parts[0]))] += 1
+    if not counter:
+        return -1
+    return min(counter, key=lambda c: (-counter[c], c))
+
+
+def assign_splits(valid_files, val_ratio=VAL_RATIO, stratify=STRATIFY):
+    """
+    按文件名哈希划分，返回 (train_files, val_files)。
+    不分层时哈希值小于val_ratio的进入验证集，新增图片不会改变已有图片的归属；
+    分层时每个类别内按哈希排序，取前 round(n × val_ratio) 个进入验证集。注意分层结果不稳定：
+    新增图片会移动该类别的边界，修改标注可能改变图片的主类别，都会让已有图片在train/val之间换组。
+    """
+    if not stratify:
+        is_val = [stable_fraction(f[0]) < val_ratio for f in valid_files]
+        return [f for f, v in zip(valid_files, is_val) if not v], [f for f, v in zip(valid_files, is_val) if v]
+
+    groups = defaultdict(list)
+    for img_file, label_file in tqdm(valid_files, desc="读取类别"):
+        groups[primary_class(os.path.join(label_dir, label_file))].append((img_file, label_file))
+    train, val = [], []
+    for cls in sorted(groups):
+        files = sorted(groups[cls], key=lambda f: stable_fraction(f[0]))
+        n_val = int(round(len(files) * val_ratio))
+        val.extend(files[:n_val])
+        train.extend(files[n_val:])
+    return train, val
+
+
+link_stats = Counter()
+
+
+def link_file(src, dst):
+    """
+    硬链接 → 符号链接 → 复制，依次退回。目标已链接到src时跳过，重新划分时已有链接不再产生I/O；
+    旧版脚本留下的完整副本、复制退回产生的副本或指向别处的链接会被删除后重新链接
+    """
+    if os.path.lexists(dst):
+        try:
+            if os.path.samefile(src, dst):
+                link_stats["已存在"] += 1
+                return
+        except OSError:  # 失效的符号链接
+            pass
+        os.remove(dst)
+        link_stats["替换旧文件"] += 1
+    try:
+        os.link(src, dst)
+        link_stats["硬链接"] += 1
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(src), dst)
+            link_stats["符号链接"] += 1
+        except OSError:
+            shutil.copy2(src, dst)
+            link_stats["复制"] += 1
+
+
+def link_subset(file_list, subset):
+    """把file_list链接到 images/{subset}、labels/{subset}，并删除不再属于该子集的旧链接"""
+    img_out = os.path.join(output_dir, "images", subset)
+    label_out = os.path.join(output_dir, "labels", subset)
+    os.makedirs(img_out, exist_ok=True)
+    os.makedirs(label_out, exist_ok=True)
 
+    for out, keep in ((img_out, {f[0] for f in file_list}), (label_out, {f[1] for f in file_list})):
+        for entry in os.scandir(out):
+            if entry.name not in keep and not entry.is_dir():
+                os.remove(entry.path)  # 只删除链接本身，原始文件不受影响
+                link_stats["移除旧链接"] += 1
 
-def copy_files(file_list, subset):
-    """复制文件到目标目录"""
     for img_file, label_file in tqdm(file_list, desc=f"处理 {subset} 集"):
-        # 复制图片
-        src_img = os.path.join(img_dir, img_file)
-        dst_img = os.path.join(output_dir, f"images/{subset}", img_file)
-        shutil.copy(src_img, dst_img)
-
-        # 复制标注
-        src_label = os.path.join(label_dir, label_file)
-        dst_label = os.path.join(output_dir, f"labels/{subset}", label_file)
-        shutil.copy(src_label, dst_label)
-
-
-# 执行复制
-copy_files(train_files, "train")
-copy_files(val_files, "val")
-
-# 输出统计信息
-print(f"\n分割完成！")
-print(f"总有效样本: {len(valid_files)}")
-print(f"训练集数量: {len(train_files)} ({len(train_files)})")
-print(f"验证集数量: {len(val_files)} ({len(val_files)})")
-print(f"输出目录结构：")
-print(f"├── {output_dir}/images/train")
-print(f"├── {output_dir}/images/val")
-print(f"├── {output_dir}/labels/train")
-print(f"└── {output_dir}/labels/val")
\ No newline at end of file
+        link_file(os.path.join(img_dir, img_file), os.path.join(img_out, img_file))
+        link_file(os.path.join(label_dir, label_file), os.path.join(label_out, label_file))
+
+
+def write_lists(train_files, val_files):
+    """文件链接到 images/all、labels/all，划分结果写入 train.txt / val.txt（相对路径）"""
+    all_files = train_files + val_files
+    link_subset(all_files, "all")
+    for subset, file_list in (("train", train_files), ("val", val_files)):
+        with open(os.path.join(output_dir, f"{subset}.txt"), "w", encoding="utf-8") as f:
+            f.writelines(f"./images/all/{img_file}\n" for img_file, _ in sorted(file_list))
+
+
+def split_dataset(mode=MODE, val_ratio=VAL_RATIO, stratify=STRATIFY):
+    # 过滤存在对应标注文件的图片（一次列出标注目录，不再逐个检查文件是否存在）
+    label_files = {f for f in os.listdir(label_dir) if f.endswith(".txt")}
+    valid_files = []
+    for img_file in sorted(os.listdir(img_dir)):
+        if os.path.splitext(img_file)[1].lower() not in img_exts:
+            continue
+        label_file = f"{os.path.splitext(img_file)[0]}.txt"
+        if label_file in label_files:
+            valid_files.append((img_file, label_file))
+        else:
+            print(f"警告：{img_file} 没有对应的标注文件，已跳过")
+
+    train_files, val_files = assign_splits(valid_files, val_ratio, stratify)
+
+    os.makedirs(output_dir, exist_ok=True)
+    if mode == "list":
+        write_lists(train_files, val_files)
+    else:
+        link_subset(train_files, "train")
+        link_subset(val_files, "val")
+
+    # 输出统计信息
+    print(f"\n分割完成！")
+    print(f"总有效样本: {len(valid_files)}")
+    print(f"训练集数量: {len(train_files)} ({len(train_files) / max(len(valid_files), 1):.1%})")
+    print(f"验证集数量: {len(val_files)} ({len(val_files) / max(len(valid_files), 1):.1%})")
+    print(f"文件处理: {dict(link_stats)}")
+    if link_stats["复制"]:
+        print("提示：当前文件系统不支持链接，部分文件以复制方式输出")
+    print(f"输出目录结构：")
+    if mode == "list":
+        print(f"├── {output_dir}/images/all")
+        print(f"├── {output_dir}/labels/all")
+        print(f"├── {output_dir}/train.txt")
+        print(f"└── {output_dir}/val.txt")
+    else:
+        print(f"├── {output_dir}/images/train")
+        print(f"├── {output_dir}/images/val")
+        print(f"├── {output_dir}/labels/train")
+        print(f"└── {output_dir}/labels/val")
+
+
+if __name__ == "__main__":
+    split_dataset()
@@ -0,0 +1,221 @@
+"""
+离线批量检测：对大量归档图片按批推理，输出每张图片的小类/大类结果和全部检测框（Parquet或NPZ列式文件）。
+
+用法：
+    python piliang.py 图片目录 --out 输出目录 [--batch 32] [--format auto|parquet|npz]
+
+中断后用相同参数重新运行即可续跑：每个分片写盘后才把其中的图片路径追加到 processed.txt，
+重跑时跳过清单中已有的图片。
+"""
+import argparse
+import importlib.util
+import queue
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+from ultralytics import YOLO
+from ultralytics.data.utils import IMG_FORMATS
+
+MODEL_PATH = "garbage_detection/double_label_train6/weights/best.pt"
+YAML_PATH = "lajifenlei.yaml"
+MANIFEST_NAME = "processed.txt"
+SOURCE_LIST_NAME = "pending.txt"  # 本次待处理图片列表，作为LoadImagesAndVideos的txt数据源
+
+
+def load_taxonomy(yaml_path):
+    """读取类别配置，返回 (小类名列表, 大类名列表, 小类→大类查找表)；查找表中未映射的小类为-1"""
+    with open(yaml_path, "r", encoding="utf-8-sig") as f:
+        cfg = yaml.safe_load(f)
+    names = cfg["names"]
+    big_names = cfg.get("big_category_names", {})
+    mapping = cfg.get("big_category_mapping", {})
+    small = [names[i] for i in range(len(names))]
+    big = [big_names[i] for i in range(len(big_names))]
+    lut = np.full(len(small), -1, dtype=np.int8)
+    for small_idx, big_idx in mapping.items():
+        lut[int(small_idx)] = int(big_idx)
+    return small, big, lut
+
+
+def list_images(source, recursive=True):
+    pattern = "**/*" if recursive else "*"
+    return sorted(str(p.resolve()) for p in Path(source).glob(pattern) if p.suffix[1:].lower() in IMG_FORMATS)
+
+
+def read_manifest(out_dir):
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def resolve_format(fmt):
+    if fmt != "auto":
+        return fmt
+    has_parquet = any(importlib.util.find_spec(m) is not None for m in ("pyarrow", "fastparquet"))
+    return "parquet" if has_parquet and importlib.util.find_spec("pandas") is not None else "npz"
+
+
+class ShardWriter:
+    """按图片累积结果，每shard_size张写一个分片，写盘后再登记到清单，保证续跑时不丢不重"""
+
+    def __init__(self, out_dir, fmt, n_big, shard_size):
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.n_big = n_big
+        self.shard_size = shard_size
+        self.shard_id = len(list(out_dir.glob("part-*.npz"))) + len(list(out_dir.glob("part-*.images.parquet")))
+        self.images_written = 0
+        self._reset()
+
+    def _reset(self):
+        self.paths, self.n_boxes, self.boxes = [], [], []
+
+    def add(self, path, det, big):
+        """det为 n×6 的 [x1n, y1n, x2n, y2n, conf, cls]（坐标已归一化），big为对应的大类编号"""
+        self.paths.append(path)
+        self.n_boxes.append(len(det))
+        self.boxes.append((det, big))
+        if len(self.paths) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if not self.paths:
+            return
+        n = len(self.paths)
+        counts = np.asarray(self.n_boxes, dtype=np.int32)
+        det = np.concatenate([d for d, _ in self.boxes]) if counts.sum() else np.zeros((0, 6), np.float32)
+        big = np.concatenate([b for _, b in self.boxes]) if counts.sum() else np.zeros(0, np.int8)
+        image_idx = np.repeat(np.arange(n, dtype=np.int32), counts)
+        cls = det[:, 5].astype(np.int16)
+        conf = det[:, 4].astype(np.float32)
+
+        # 每张图片：置信度最高的检测作为该图的小类/大类结果，另统计各大类的检测数
+        top_cls = np.full(n, -1, dtype=np.int16)
+        top_big = np.full(n, -1, dtype=np.int8)
+        top_conf = np.zeros(n, dtype=np.float32)
+        if len(det):
+            order = np.lexsort((-conf, image_idx))  # 按图片分组，组内置信度降序
+            first = order[np.r_[0, np.flatnonzero(np.diff(image_idx[order])) + 1]]
+            top_cls[image_idx[first]] = cls[first]
+            top_big[image_idx[first]] = big[first]
+            top_conf[image_idx[first]] = conf[first]
+        big_counts = np.zeros((n, self.n_big), dtype=np.int32)
+        valid = big >= 0
+        np.add.at(big_counts, (image_idx[valid], big[valid]), 1)
+
+        images = {
+            "path": np.asarray(self.paths),
+            "n_boxes": counts,
+            "top_cls": top_cls,
+            "top_big": top_big,
+            "top_conf": top_conf,
+            "big_counts": big_counts,
+        }
+        boxes = {"image_idx": image_idx, "cls": cls, "big": big, "conf": conf, "xyxyn": det[:, :4].astype(np.float32)}
+        stem = self.out_dir / f"part-{self.shard_id:05d}"
+        if self.fmt == "parquet":
+            import pandas as pd
+
+            big_cols = {f"big_count_{i}": big_counts[:, i] for i in range(self.n_big)}
+            pd.DataFrame({**{k: v for k, v in images.items() if k != "big_counts"}, **big_cols}).to_parquet(
+                f"{stem}.images.parquet", index=False)
+            xyxyn = boxes.pop("xyxyn")
+            corners = {k: xyxyn[:, i] for i, k in enumerate(("x1", "y1", "x2", "y2"))}
+            pd.DataFrame({**boxes, **corners}).to_parquet(f"{stem}.boxes.parquet", index=False)
+        else:
+            np.savez_compressed(f"{stem}.npz", **{f"images_{k}": v for k, v in images.items()},
+                                **{f"boxes_{k}": v for k, v in boxes.items()})
+
+        # 分片写盘成功后才登记，崩溃时最多重做当前分片
+        with open(self.out_dir / MANIFEST_NAME, "a", encoding="utf-8") as f:
+            f.writelines(f"{p}\n" for p in self.paths)
+        self.images_written += n
+        self.shard_id += 1
+        self._reset()
+
+
+def run(source, out_dir, model_path=MODEL_PATH, yaml_path=YAML_PATH, batch=32, imgsz=640, conf=0.5,
+        shard_size=5000, fmt="auto", recursive=True, prefetch=4):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    small_names, big_names, big_lut = load_taxonomy(yaml_path)
+
+    done = read_manifest(out_dir)
+    pending = [p for p in list_images(source, recursive) if p not in done]
+    print(f"共{len(pending) + len(done)}张图片，已处理{len(done)}张，本次处理{len(pending)}张")
+    if not pending:
+        return
+    source_list = out_dir / SOURCE_LIST_NAME
+    with open(source_list, "w", encoding="utf-8") as f:
+        f.writelines(f"{p}\n" for p in pending)
+
+    fmt = resolve_format(fmt)
+    writer = ShardWriter(out_dir, fmt, len(big_names), shard_size)
+    model = YOLO(model_path, task="detect")
+
+    # 解码+推理在生产者线程中按批进行，主线程同时做类别映射和写盘；队列有界，避免结果堆积占满内存
+    results_q = queue.Queue(maxsize=max(1, prefetch) * batch)
+    error = []
+
+    def produce():
+        try:
+            for res in model.predict(str(source_list), stream=True, batch=batch, imgsz=imgsz, conf=conf,
+                                     verbose=False):
+                results_q.put((res.path, res.boxes.data.cpu().numpy(), res.orig_shape))
+        except Exception as e:
+            error.append(e)
+        finally:
+            results_q.put(None)
+
+    threading.Thread(target=produce, name="batch-predict", daemon=True).start()
+    start = time.perf_counter()
+    n = 0
+    while True:
+        item = results_q.get()
+        if item is None:
+            break
+        path, det, (h, w) = item
+        det = det.astype(np.float32)
+        det[:, :4] /= np.array([w, h, w, h], dtype=np.float32)
+        big = big_lut[det[:, 5].astype(np.int64)] if len(det) else np.zeros(0, np.int8)  # 向量化大类映射
+        writer.add(path, det, big)
+        n += 1
+        if n % 1000 == 0:
+            print(f"已处理{n}/{len(pending)}张，{n / (time.perf_counter() - start):.1f}张/秒")
+    writer.flush()
+    source_list.unlink(missing_ok=True)
+    if error:
+        raise error[0]
+    elapsed = time.perf_counter() - start
+    speed = writer.images_written / max(elapsed, 1e-6)
+    print(f"完成：{writer.images_written}张图片，用时{elapsed:.1f}s（{speed:.1f}张/秒），输出格式{fmt}，目录{out_dir}")
+    print(f"小类{len(small_names)}个，大类：{big_names}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="垃圾分类离线批量检测")
+    parser.add_argument("source", help="图片目录")
+    parser.add_argument("--out", default="batch_results", help="输出目录（含分片文件和processed.txt清单）")
+    parser.add_argument("--model", default=MODEL_PATH, help="模型权重")
+    parser.add_argument("--yaml", default=YAML_PATH, help="类别配置（含big_category_mapping）")
+    parser.add_argument("--batch", type=int, default=32, help="每批图片数")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--shard-size", type=int, default=5000, help="每个输出分片的图片数")
+    parser.add_argument("--format", default="auto", choices=["auto", "parquet", "npz"],
+                        help="auto：安装了pyarrow/fastparquet时用Parquet，否则NPZ")
+    parser.add_argument("--no-recursive", action="store_true", help="不递归子目录")
+    parser.add_argument("--prefetch", type=int, default=4, help="推理结果队列可缓存的批数")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(args.source, args.out, model_path=args.model, yaml_path=args.yaml, batch=args.batch, imgsz=args.imgsz,
+        conf=args.conf, shard_size=args.shard_size, fmt=args.format, recursive=not args.no_recursive,
+        prefetch=args.prefetch)
@@ -0,0 +1,16 @@
+from zhuanhuan import parse_xml
+
+
+def test_parse_xml_nested_elements():
+    """嵌套在object内的<part>、<attributes>中的name/bndbox不能覆盖目标本身的类别和框"""
+    xml = b"""<annotation><filename>a.jpg</filename><size><width>640</width><height>480</height></size>
+    <object><name>person</name><part><name>head</name><bndbox><xmin>5</xmin><ymin>6</ymin><xmax>7</xmax>
+    <ymax>8</ymax></bndbox></part><bndbox><xmin>1</xmin><ymin>2</ymin><xmax>30</xmax><ymax>40</ymax></bndbox></object>
+    <object><bndbox><xmin>10</xmin><ymin>20</ymin><xmax>50</xmax><ymax>60</ymax></bndbox><name>bottle</name>
+    <attributes><attribute><name>occluded</name><value>true</value></attribute></attributes></object></annotation>"""
+    info = parse_xml(None, xml)
+    assert (info['filename'], info['width'], info['height']) == ('a.jpg', 640.0, 480.0)
+    assert info['objects'] == [
+        {'class': 'person', 'bbox': (1.0, 2.0, 30.0, 40.0)},
+        {'class': 'bottle', 'bbox': (10.0, 20.0, 50.0, 60.0)},
+    ]
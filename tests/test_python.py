@@ -2,6 +2,7 @@
 
 import contextlib
 import csv
+import json
 import urllib
 from copy import copy
 from pathlib import Path
@@ -160,6 +161,39 @@ def test_predict_grey_and_4ch():
         f.unlink()  # cleanup
 
 
+def test_predict_pipeline():
+    """Test pipelined prediction yields the same results in the same order as sequential prediction."""
+    model = YOLO(MODEL)
+    serial = model(ASSETS, imgsz=32, batch=1)
+    pipelined = model(ASSETS, imgsz=32, batch=1, pipeline=True)
+    assert [r.path for r in serial] == [r.path for r in pipelined]
+    assert all(torch.equal(a.boxes.data, b.boxes.data) for a, b in zip(serial, pipelined))
+
+
+def test_predict_async():
+    """Test concurrent awaitable predictions are coalesced into one batch and match synchronous prediction."""
+    import asyncio
+
+    model = YOLO(MODEL)
+    im = cv2.imread(str(SOURCE))
+    expected = model(im, imgsz=32)[0].boxes.data
+    batches = []
+    model.add_callback("on_predict_start", lambda predictor: batches.append(1))
+
+    async def run():
+        results = await asyncio.gather(*(model.apredict(im, imgsz=32) for _ in range(4)))
+        assert len(batches) == 1  # coalesced
+        streamed = [r async for r in model.astream([im, im, im], imgsz=32)]
+        with pytest.raises(asyncio.TimeoutError):
+            await model.apredict(im, imgsz=32, timeout=0)
+        await model.async_predictor.close()
+        return results, streamed
+
+    results, streamed = asyncio.run(run())
+    assert all(torch.equal(r[0].boxes.data, expected) for r in results + [streamed])
+    assert len(streamed) == 3
+
+
 @pytest.mark.slow
 @pytest.mark.skipif(not ONLINE, reason="environment is offline")
 @pytest.mark.skipif(is_github_action_running(), reason="No auth https://github.com/JuanBindez/pytubefix/issues/166")
@@ -216,6 +250,120 @@ def test_train_pretrained():
     model(SOURCE)
 
 
+def test_dataset_mmap_cache():
+    """Test the memory-mapped image cache matches decoded images and is reused across runs."""
+    from ultralytics.cfg import get_cfg
+    from ultralytics.data.dataset import YOLODataset
+
+    im_dir, lb_dir = TMP / "mmap" / "images", TMP / "mmap" / "labels"
+    im_dir.mkdir(parents=True, exist_ok=True)
+    lb_dir.mkdir(parents=True, exist_ok=True)
+    for f in ("bus.jpg", "zidane.jpg"):
+        cv2.imwrite(str(im_dir / f), cv2.imread(str(ASSETS / f)))
+        (lb_dir / f).with_suffix(".txt").write_text("0 0.5 0.5 0.2 0.2\n")
+
+    kwargs = dict(img_path=im_dir, imgsz=64, augment=False, hyp=get_cfg(), data={"names": {0: "item"}, "channels": 3})
+    dataset = YOLODataset(cache="mmap", **kwargs)
+    assert dataset.mmap_file.exists() and dataset.mmap_index is not None
+    dataset = YOLODataset(cache="mmap", **kwargs)  # reuses the existing cache
+    for i in range(dataset.ni):
+        im, hw0, _ = dataset.load_image(i)
+        expected, expected_hw0 = dataset.read_image(i)
+        assert np.array_equal(im, expected) and tuple(hw0) == expected_hw0
+
+    (TMP / "mmap" / "val.txt").write_text(f"{im_dir / 'bus.jpg'}\n")  # a second split sharing the image directory
+    val = YOLODataset(cache="mmap", **{**kwargs, "img_path": TMP / "mmap" / "val.txt"})
+    assert val.mmap_file != dataset.mmap_file and dataset.mmap_file.exists()
+
+
+def test_dataset_label_shards(monkeypatch):
+    """Test the sharded label cache only re-verifies shards whose files changed."""
+    from ultralytics.cfg import get_cfg
+    from ultralytics.data import dataset as ds
+
+    im_dir, lb_dir = TMP / "shards" / "images", TMP / "shards" / "labels"
+    im_dir.mkdir(parents=True, exist_ok=True)
+    lb_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(6):
+        cv2.imwrite(str(im_dir / f"im{i}.jpg"), cv2.imread(str(SOURCE)))
+        (lb_dir / f"im{i}.txt").write_text(f"0 0.5 0.5 0.{i + 1} 0.2\n")
+    bounds = ds.label_shard_bounds([str(f) for f in sorted(im_dir.glob("*.jpg"))], shard_size=2)
+    assert len(bounds) > 2 and bounds[0][0] == 0 and bounds[-1][1] == 6
+    label_shard_bounds = ds.label_shard_bounds
+    monkeypatch.setattr(ds, "label_shard_bounds", lambda im_files: label_shard_bounds(im_files, shard_size=2))
+    built, cache_labels = [], ds.YOLODataset.cache_labels  # record the shards each dataset re-verifies
+    monkeypatch.setattr(ds.YOLODataset, "cache_labels", lambda self, *a: built.append(a[1]) or cache_labels(self, *a))
+
+    kwargs = dict(img_path=im_dir, imgsz=64, augment=False, hyp=get_cfg(), data={"names": {0: "item"}, "channels": 3})
+    labels = ds.YOLODataset(**kwargs).labels
+    assert isinstance(labels, ds.PackedLabels) and labels.results == (6, 0, 0, 0, 6)
+    shards = {f: f.stat().st_ino for f in lb_dir.with_suffix(".shards").glob("*.npz")}
+    assert len(shards) == len(bounds) and [len(m) for m in built] == [len(bounds)]
+
+    (lb_dir / "im3.txt").write_text("0 0.5 0.5 0.9 0.2\n")  # same size, new content
+    labels = ds.YOLODataset(**kwargs).labels
+    assert labels[3]["bboxes"][0, 2] == np.float32(0.9) and labels[4]["bboxes"][0, 2] == np.float32(0.5)
+    assert [[m[:2] for m in missing] for missing in built[1:]] == [[next(b for b in bounds if b[0] <= 3 < b[1])]]
+    after = {f: f.stat().st_ino for f in lb_dir.with_suffix(".shards").glob("*.npz")}
+    assert len(set(after) - set(shards)) == 1 and all(after[f] == ino for f, ino in shards.items())  # none rewritten
+
+
+def test_dataset_verifier():
+    """Test parallel verification reports per-file results and restores corrupt JPEGs after the pass."""
+    from ultralytics.data.utils import DatasetVerifier
+
+    d = TMP / "verify"
+    d.mkdir(parents=True, exist_ok=True)
+    (d / "ok.jpg").write_bytes(SOURCE.read_bytes())
+    (d / "cut.jpg").write_bytes(SOURCE.read_bytes() + b"\x00\x00")  # end-of-image marker not at the end
+    (d / "bad.jpg").write_bytes(b"not an image")
+    for f in ("ok", "cut", "bad"):
+        (d / f"{f}.txt").write_text("0 0.5 0.5 0.2 0.2\n")
+    files = [str(d / f"{f}.jpg") for f in ("ok", "cut", "bad")]
+
+    verifier = DatasetVerifier(num_cls=1, workers=2)
+    results = list(verifier(files, [f.replace(".jpg", ".txt") for f in files]))
+    assert [r[0] is not None for r in results] == [True, True, False]
+    assert verifier.corrupt_jpegs == [files[1]] and not verifier.restore()
+    assert (d / "cut.jpg").read_bytes()[-2:] == b"\xff\xd9"
+    report = verifier.report(records=True)
+    assert (report["found"], report["corrupt"], report["restored_jpegs"]) == (2, 1, 1)
+    assert [r["status"] for r in report["records"]] == ["found", "found", "corrupt"]
+
+
+def test_batch_augment():
+    """Test batch-level augmentation keeps shapes, leaves identity warps unchanged and keeps boxes in the image."""
+    from ultralytics.data.augment import BatchAugment
+    from ultralytics.utils.ops import xywh2xyxy
+
+    img = torch.rand(4, 3, 64, 64)
+    bboxes = torch.tensor([[0.5, 0.5, 0.4, 0.4], [0.3, 0.3, 0.2, 0.2], [0.6, 0.4, 0.5, 0.3]])
+    batch = {"img": img, "bboxes": bboxes, "cls": torch.zeros(3, 1), "batch_idx": torch.tensor([0.0, 1.0, 3.0])}
+    out = BatchAugment(mosaic=0.0, translate=0.0, scale=0.0, hgain=0.0, sgain=0.0, vgain=0.0)(dict(batch))
+    assert torch.allclose(out["img"], img, atol=1e-4) and torch.allclose(out["bboxes"], bboxes, atol=1e-4)
+    assert out["batch_idx"].tolist() == [0.0, 1.0, 3.0]
+
+    out = BatchAugment(mosaic=1.0, degrees=10.0, shear=2.0)(dict(batch))
+    assert out["img"].shape == img.shape and 0 <= out["img"].min() and out["img"].max() <= 1
+    assert len(out["bboxes"]) == len(out["cls"]) == len(out["batch_idx"])
+    xyxy = xywh2xyxy(out["bboxes"])
+    assert ((xyxy >= 0) & (xyxy <= 1 + 1e-6)).all()
+
+
+def test_batch_letterbox():
+    """Test BatchLetterBox matches LetterBox for mixed and repeated input shapes while reusing its buffer."""
+    from ultralytics.data.augment import BatchLetterBox, LetterBox
+
+    ims = [np.random.randint(0, 255, shape, dtype=np.uint8) for shape in ((48, 64, 3), (64, 40, 3), (32, 32, 3))]
+    for auto, batch in ((False, ims), (True, [ims[0]] * 2)):
+        letterbox, batch_letterbox = LetterBox(64, auto=auto), BatchLetterBox(64, auto=auto)
+        for images in (batch, batch[::-1]):
+            assert np.array_equal(batch_letterbox(images), np.stack([letterbox(image=im) for im in images]))
+    buffer = batch_letterbox.buffer
+    batch_letterbox([ims[0]])
+    assert batch_letterbox.buffer is buffer  # smaller batches reuse the buffer
+
+
 def test_all_model_yamls():
     """Test YOLO model creation for all available YAML configurations in the `cfg/models` directory."""
     for m in (ROOT / "cfg" / "models").rglob("*.yaml"):
@@ -278,6 +426,30 @@ def test_results(model):
         print(r, len(r), r.path)  # print after methods
 
 
+def test_batch_results():
+    """Test BatchResults joins the boxes of a batch without copying and matches the per-image results."""
+    from ultralytics.engine.results import BatchResults, Results
+
+    results = YOLO(MODEL)([SOURCE, ASSETS / "zidane.jpg", SOURCE], imgsz=160)
+    batch = BatchResults(results)
+    assert len(batch) == 3 and batch.counts.tolist() == [len(r.boxes) for r in results]
+    assert batch.data.data_ptr() == results[0].boxes.data.data_ptr()  # view of the NMS output
+    for i, r in enumerate(results):
+        assert np.array_equal(batch[i], r.boxes.data.cpu().numpy())
+    assert np.allclose(batch.xywhn, np.concatenate([r.boxes.xywhn.cpu().numpy() for r in results]))
+
+    columns = batch.to_columns(normalize=True)
+    assert columns["name"].tolist() == [results[0].names[c] for c in columns["class"]]
+    data = json.loads(batch.to_json(decimals=3))
+    assert data["offsets"] == batch.offsets.tolist() and len(data["boxes"]["x1"]) == batch.offsets[-1]
+    assert np.array_equal(BatchResults([r.numpy() for r in results])[1], batch[1])
+
+    empty = Results(np.zeros((160, 160, 3), np.uint8), path="", names=results[0].names, boxes=torch.zeros(0, 6))
+    assert empty.summary() == [] and json.loads(empty.to_json()) == []
+    batch = BatchResults([empty, *results])
+    assert batch.counts.tolist()[0] == 0 and np.array_equal(batch[1], results[0].boxes.data.cpu().numpy())
+
+
 def test_labels_and_crops():
     """Test output from prediction args for saving YOLO detection labels and crops; ensures accurate saving."""
     imgs = [SOURCE, ASSETS / "zidane.jpg"]
@@ -438,6 +610,53 @@ def test_utils_ops():
     torch.allclose(boxes, xyxyxyxy2xywhr(xywhr2xyxyxyxy(boxes)), rtol=1e-3)
 
 
+def test_utils_ops_category_nms():
+    """Test NMS within big categories suppresses overlapping boxes of different classes in the same category."""
+    from ultralytics.engine.results import Results
+    from ultralytics.utils.ops import non_max_suppression
+
+    groups = [0, 0, 1, 1, -1]  # 5 classes, 2 categories, class 4 without category
+    pred = torch.zeros(1, 4 + 5, 4)  # (batch, xywh + classes, anchors)
+    pred[0, :4] = torch.tensor([[50, 51, 50, 200], [50, 50, 51, 200], [20, 20, 20, 20], [20, 20, 20, 20]])
+    pred[0, 4:, 0] = torch.tensor([0.6, 0, 0, 0, 0])  # class 0
+    pred[0, 4:, 1] = torch.tensor([0, 0.5, 0, 0, 0])  # class 1, same category as box 0
+    pred[0, 4:, 2] = torch.tensor([0, 0, 0.3, 0.4, 0])  # classes 2 and 3 fuse into category 1
+    pred[0, 4:, 3] = torch.tensor([0, 0, 0, 0, 0.7])  # class 4
+
+    assert len(non_max_suppression(pred.clone(), 0.25, 0.5, nc=5)[0]) == 4
+    out = non_max_suppression(pred.clone(), 0.25, 0.5, nc=5, groups=groups)[0]
+    assert out.shape == (3, 8)
+    assert out[:, 5].tolist() == [4, 0, 3]  # class
+    assert out[:, 7].tolist() == [-1, 0, 1]  # category
+    assert torch.allclose(out[:, 6], torch.tensor([0.7, 0.6, 0.7]))  # fused category confidence
+
+    split = torch.zeros(1, 4 + 5, 1)  # best class 2 clears conf_thres, category 0 wins on the fused score
+    split[0, :, 0] = torch.tensor([50, 50, 20, 20, 0.3, 0.3, 0.55, 0, 0])
+    kept = non_max_suppression(split, 0.5, 0.5, nc=5, groups=groups)[0]
+    assert kept[:, 7].tolist() == [0] and torch.allclose(kept[:, 6], torch.tensor([0.6]))
+
+    names = {i: str(i) for i in range(5)}
+    result = Results(np.zeros((320, 320, 3), np.uint8), "", names, boxes=out[:, :6], categories=out[:, 6:])
+    assert result[1:].categories.cls.tolist() == [0, 1]
+    assert result.summary()[2]["category"] == 1
+
+
+def test_utils_ops_batched_nms():
+    """Test batched NMS over a whole batch matches NMS of each image on its own."""
+    from ultralytics.utils.ops import non_max_suppression
+
+    torch.manual_seed(0)
+    for n in 50, 400:  # single NMS call over the batch, and per-image calls for larger batches on CPU
+        pred = torch.cat((torch.rand(6, 2, n) * 600, torch.rand(6, 2, n) * 100 + 5, torch.rand(6, 5, n) ** 4), 1)
+        pred[3, 4:] = 0  # image without detections
+        for kwargs in {}, {"multi_label": True}, {"agnostic": True}, {"groups": [0, 0, 1, 1, -1]}, {"max_nms": 10}:
+            batch = non_max_suppression(pred.clone(), 0.25, 0.5, **kwargs)
+            assert len(batch) == 6 and batch[3].shape == (0, 8 if "groups" in kwargs else 6)
+            for i, out in enumerate(batch):
+                ref = non_max_suppression(pred[i : i + 1].clone(), 0.25, 0.5, **kwargs)[0]
+                assert torch.equal(out[out[:, 4].argsort()], ref[ref[:, 4].argsort()])
+
+
 def test_utils_files():
     """Test file handling utilities including file age, date, and paths with spaces."""
     from ultralytics.utils.files import file_age, file_date, get_latest_run, spaces_in_path
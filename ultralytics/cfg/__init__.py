@@ -224,6 +224,7 @@ CFG_BOOL_KEYS = frozenset(
         "visualize",
         "augment",
         "agnostic_nms",
+        "category_nms",
         "retina_masks",
         "show_boxes",
         "keras",
@@ -234,6 +235,8 @@ CFG_BOOL_KEYS = frozenset(
         "nms",
         "profile",
         "multi_scale",
+        "batch_augment",
+        "pipeline",
     }
 )
 
@@ -8,6 +8,7 @@ from typing import Tuple, Union
 import cv2
 import numpy as np
 import torch
+import torch.nn.functional as F
 from PIL import Image
 
 from ultralytics.data.utils import polygons2masks, polygons2masks_overlap
@@ -15,7 +16,7 @@ from ultralytics.utils import LOGGER, colorstr
 from ultralytics.utils.checks import check_version
 from ultralytics.utils.instance import Instances
 from ultralytics.utils.metrics import bbox_ioa
-from ultralytics.utils.ops import segment2box, xyxyxyxy2xywhr
+from ultralytics.utils.ops import segment2box, xywh2xyxy, xyxy2xywh, xyxyxyxy2xywhr
 from ultralytics.utils.torch_utils import TORCHVISION_0_10, TORCHVISION_0_11, TORCHVISION_0_13
 
 DEFAULT_MEAN = (0.0, 0.0, 0.0)
@@ -1631,6 +1632,115 @@ class LetterBox:
         return labels
 
 
+class BatchLetterBox(LetterBox):
+    """
+    Letterboxes a batch of images into one reused uint8 buffer.
+
+    Each image is resized straight into its slot of a preallocated (N, H, W, C) buffer, so a batch costs one resize
+    per image and no intermediate copies. The letterbox geometry is cached per input shape, and padding is only
+    refilled when the geometry of a slot changes, which makes steady video or fixed-camera streams nearly copy-free.
+    Geometry matches `LetterBox` without `scaleFill`.
+
+    Attributes:
+        pin_memory (bool): Allocate the buffer in page-locked memory for faster host-to-device copies.
+        buffer (np.ndarray | None): The reused (N, H, W, C) uint8 buffer.
+        slots (List[Tuple | None]): Geometry last written to each buffer slot.
+
+    Methods:
+        geometry: Returns the cached resize and padding parameters for an input shape.
+        __call__: Letterboxes a list of images into the buffer.
+
+    Examples:
+        >>> letterbox = BatchLetterBox(new_shape=(640, 640))
+        >>> batch = letterbox([np.zeros((480, 640, 3), dtype=np.uint8)] * 4)
+        >>> batch.shape
+        (4, 640, 640, 3)
+    """
+
+    max_cached_shapes = 1024  # input shapes whose geometry is kept
+
+    def __init__(self, new_shape=(640, 640), auto=False, scaleup=True, center=True, stride=32, pin_memory=False):
+        """
+        Initialize BatchLetterBox with the same options as LetterBox.
+
+        Args:
+            new_shape (int | Tuple[int, int]): Target size (height, width).
+            auto (bool): If True, use minimum rectangle to resize. If False, use new_shape directly.
+            scaleup (bool): If True, allow scaling up. If False, only scale down.
+            center (bool): If True, center the placed image. If False, place image in top-left corner.
+            stride (int): Stride of the model.
+            pin_memory (bool): Allocate the buffer in page-locked memory, for CUDA inference.
+        """
+        super().__init__(new_shape=new_shape, auto=auto, scaleup=scaleup, center=center, stride=stride)
+        self.pin_memory = pin_memory
+        self.buffer = None
+        self.slots = []
+        self._geometry = {}
+
+    def geometry(self, shape):
+        """
+        Returns the letterbox geometry for an input shape, computing it once per shape.
+
+        Args:
+            shape (Tuple[int, int]): Input image (height, width).
+
+        Returns:
+            (Tuple[Tuple[int, int], int, int, Tuple[int, int]]): Resized (width, height), top and left padding, and
+                output (height, width).
+        """
+        if shape not in self._geometry:
+            if len(self._geometry) >= self.max_cached_shapes:
+                self._geometry.clear()
+            new_shape = (self.new_shape, self.new_shape) if isinstance(self.new_shape, int) else self.new_shape
+            r = min(new_shape[0] / shape[0], new_shape[1] / shape[1])
+            if not self.scaleup:  # only scale down, do not scale up (for better val mAP)
+                r = min(r, 1.0)
+            new_unpad = int(round(shape[1] * r)), int(round(shape[0] * r))
+            dw, dh = new_shape[1] - new_unpad[0], new_shape[0] - new_unpad[1]  # wh padding
+            if self.auto:  # minimum rectangle
+                dw, dh = np.mod(dw, self.stride), np.mod(dh, self.stride)
+            if self.center:
+                dw /= 2  # divide padding into 2 sides
+                dh /= 2
+            top, bottom = int(round(dh - 0.1)) if self.center else 0, int(round(dh + 0.1))
+            left, right = int(round(dw - 0.1)) if self.center else 0, int(round(dw + 0.1))
+            out_shape = new_unpad[1] + top + bottom, new_unpad[0] + left + right
+            self._geometry[shape] = new_unpad, top, left, out_shape
+        return self._geometry[shape]
+
+    def __call__(self, images):
+        """
+        Letterboxes images into the reused buffer.
+
+        Args:
+            images (List[np.ndarray]): HWC uint8 images with the same number of channels, whose letterboxed shapes
+                agree (same input shapes, or `auto=False`).
+
+        Returns:
+            (np.ndarray): (N, H, W, C) view of the buffer. It is overwritten by the next call, so copy or transfer it
+                before letterboxing another batch.
+        """
+        geometries = [self.geometry(im.shape[:2]) for im in images]
+        n, (h, w), c = len(images), geometries[0][3], images[0].shape[2]
+        if self.buffer is None or len(self.buffer) < n or self.buffer.shape[1:] != (h, w, c):
+            if self.pin_memory:
+                self.buffer = torch.empty((n, h, w, c), dtype=torch.uint8).pin_memory().numpy()
+            else:
+                self.buffer = np.empty((n, h, w, c), dtype=np.uint8)
+            self.slots = [None] * n
+        for i, (im, (size, top, left, _)) in enumerate(zip(images, geometries)):
+            slot = self.buffer[i]
+            if self.slots[i] != (size, top, left):
+                slot.fill(114)  # border only changes with the geometry
+                self.slots[i] = size, top, left
+            roi = slot[top : top + size[1], left : left + size[0]]
+            if im.shape[1::-1] == size:
+                roi[:] = im
+            else:
+                cv2.resize(im, size, dst=roi, interpolation=cv2.INTER_LINEAR)
+        return self.buffer[:n]
+
+
 class CopyPaste(BaseMixTransform):
     """
     CopyPaste class for applying Copy-Paste augmentation to image datasets.
@@ -2275,6 +2385,223 @@ class RandomLoadText:
         return labels
 
 
+class BatchAugment:
+    """
+    Applies mosaic, random affine and HSV augmentation to a whole collated batch at once.
+
+    This is the batch-level counterpart of the per-sample `Mosaic`, `RandomPerspective` and `RandomHSV` transforms.
+    Dataloader workers only letterbox and flip each image; this class then assembles mosaics from the letterboxed
+    images of the same batch, warps all of them with one `grid_sample` call per mosaic tile and jitters HSV with
+    tensor ops, so the work runs vectorized on whatever device the batch is on (the training device, or the CPU).
+    Box labels are transformed for the whole batch in one pass, indexed by `batch_idx`.
+
+    Attributes:
+        mosaic (float): Probability of building a 2x2 mosaic for each output image.
+        degrees (float): Maximum absolute rotation in degrees.
+        translate (float): Maximum translation as a fraction of the image size.
+        scale (float): Scaling gain range, e.g. 0.5 samples scales in [0.5, 1.5].
+        shear (float): Maximum shear in degrees.
+        perspective (float): Perspective distortion factor.
+        gains (Tuple[float, float, float]): Hue, saturation and value gains.
+        fill (float): Border value in [0, 1] for areas not covered by any image.
+
+    Methods:
+        __call__: Augments the images and box labels of a collated batch.
+        affine_matrices: Samples one 3x3 warp matrix per image.
+        hsv: Applies random HSV gains per image.
+
+    Examples:
+        >>> augment = BatchAugment(mosaic=1.0, degrees=10.0, translate=0.1, scale=0.5)
+        >>> batch = {"img": torch.rand(8, 3, 640, 640), "cls": cls, "bboxes": bboxes, "batch_idx": batch_idx}
+        >>> batch = augment(batch)
+    """
+
+    def __init__(
+        self,
+        mosaic=1.0,
+        degrees=0.0,
+        translate=0.1,
+        scale=0.5,
+        shear=0.0,
+        perspective=0.0,
+        hgain=0.5,
+        sgain=0.5,
+        vgain=0.5,
+        fill=114 / 255,
+    ):
+        """
+        Initializes the BatchAugment object with the same hyperparameters as the per-sample transforms.
+
+        Args:
+            mosaic (float): Probability of building a mosaic for each output image.
+            degrees (float): Degree range for random rotations.
+            translate (float): Fraction of the image size for random translation.
+            scale (float): Scaling factor interval.
+            shear (float): Shear intensity in degrees.
+            perspective (float): Perspective distortion factor.
+            hgain (float): Maximum hue gain.
+            sgain (float): Maximum saturation gain.
+            vgain (float): Maximum value gain.
+            fill (float): Border value in [0, 1] for areas not covered by any image.
+
+        Examples:
+            >>> augment = BatchAugment(mosaic=0.5, hgain=0.015, sgain=0.7, vgain=0.4)
+        """
+        self.mosaic = mosaic
+        self.degrees = degrees
+        self.translate = translate
+        self.scale = scale
+        self.shear = shear
+        self.perspective = perspective
+        self.gains = (hgain, sgain, vgain)
+        self.fill = fill
+
+    def __call__(self, batch):
+        """
+        Augments the images and box labels of a collated batch.
+
+        Each output image is warped from a canvas that is either the image itself or, with probability `mosaic`, a
+        2x2 grid of the image and three other images of the batch. Boxes are copied into every output image whose
+        canvas contains their source image, warped, clipped and filtered like in `RandomPerspective`.
+
+        Args:
+            batch (Dict): Collated batch with 'img' as a (B, 3, H, W) float tensor in [0, 1] and 'cls', 'bboxes'
+                (normalized xywh) and 'batch_idx' label tensors.
+
+        Returns:
+            (Dict): The batch with augmented 'img', 'cls', 'bboxes' and 'batch_idx', all on the image device.
+
+        Examples:
+            >>> augment = BatchAugment()
+            >>> batch = augment(batch)
+            >>> batch["img"].shape == (8, 3, 640, 640)
+            True
+        """
+        img = batch["img"]
+        b, _, h, w = img.shape
+        device = img.device
+        mosaic = torch.rand(b, device=device) < self.mosaic
+        arange = torch.arange(b, device=device)
+        tiles = torch.stack([arange] + [torch.randperm(b, device=device) for _ in range(3)], 1)  # source per tile
+        active = torch.cat([torch.ones_like(mosaic[:, None]), mosaic[:, None].expand(-1, 3)], 1)  # (B, 4)
+        M, scale = self.affine_matrices(b, w, h, mosaic, device)
+
+        # Inverse-map every output pixel to canvas coordinates, then sample each 2x2 tile of the canvas
+        ys, xs = torch.meshgrid(torch.arange(h, device=device), torch.arange(w, device=device), indexing="ij")
+        dst = torch.stack([xs, ys, torch.ones_like(xs)], -1).view(1, -1, 3).float()
+        src = dst @ torch.linalg.inv(M).transpose(1, 2)
+        src = (src[..., :2] / src[..., 2:]).view(b, h, w, 2)
+        rgba = torch.cat([img, torch.ones_like(img[:, :1])], 1)  # alpha channel marks covered pixels
+        out = img.new_zeros(b, 4, h, w)
+        for q in range(4):
+            i = arange if q == 0 else active[:, q].nonzero().squeeze(1)
+            if len(i):
+                grid = (src[i] - src.new_tensor([q % 2 * w, q // 2 * h])) / src.new_tensor([w - 1, h - 1]) * 2 - 1
+                out[i] += F.grid_sample(rgba[tiles[i, q]], grid, mode="bilinear", align_corners=True)
+        img = out[:, :3] + self.fill * (1 - out[:, 3:]).clamp_(0, 1)
+        batch["img"] = self.hsv(img) if any(self.gains) else img
+
+        # Copy each box into every canvas containing its image, offset by the tile position
+        idx, cls, bboxes = (batch[k].to(device) for k in ("batch_idx", "cls", "bboxes"))
+        xyxy = xywh2xyxy(bboxes) * bboxes.new_tensor([w, h, w, h])
+        j, boxes, classes = [], [], []
+        for q in range(4):
+            inv = torch.empty_like(arange)
+            inv[tiles[:, q]] = arange
+            dst_i = inv[idx.long()]
+            keep = active[dst_i, q]
+            j.append(dst_i[keep])
+            boxes.append(xyxy[keep] + xyxy.new_tensor([q % 2 * w, q // 2 * h] * 2))
+            classes.append(cls[keep])
+        j, boxes, cls = torch.cat(j), torch.cat(boxes), torch.cat(classes)
+
+        # Warp box corners, take the enclosing box, clip and drop degenerate boxes
+        xy = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].view(-1, 4, 2)
+        xy = torch.cat([xy, torch.ones_like(xy[..., :1])], -1) @ M[j].transpose(1, 2)
+        xy = xy[..., :2] / xy[..., 2:]
+        new = torch.cat([xy.amin(1), xy.amax(1)], 1)
+        new[:, 0::2] = new[:, 0::2].clamp(0, w)
+        new[:, 1::2] = new[:, 1::2].clamp(0, h)
+        w1, h1 = (boxes[:, 2:] - boxes[:, :2]).mul(scale[j, None]).unbind(1)
+        w2, h2 = (new[:, 2:] - new[:, :2]).unbind(1)
+        ar = torch.maximum(w2 / (h2 + 1e-16), h2 / (w2 + 1e-16))
+        keep = (w2 > 2) & (h2 > 2) & (w2 * h2 / (w1 * h1 + 1e-16) > 0.1) & (ar < 100)  # RandomPerspective defaults
+        batch["batch_idx"] = j[keep].to(idx.dtype)
+        batch["cls"] = cls[keep]
+        batch["bboxes"] = xyxy2xywh(new[keep]) / new.new_tensor([w, h, w, h])
+        return batch
+
+    def affine_matrices(self, b, w, h, mosaic, device):
+        """
+        Samples one warp matrix per image, composed like `RandomPerspective.affine_transform`.
+
+        Mosaic canvases are twice the output size and are cropped around a random point within half the output size of
+        the tile corner, matching the random mosaic center of `Mosaic._mosaic4` with its default border. The offset is
+        part of the matrix, so boxes, which are warped by the same matrix, follow the images.
+
+        Args:
+            b (int): Batch size.
+            w (int): Output width.
+            h (int): Output height.
+            mosaic (torch.Tensor): Boolean (B,) tensor, True where the canvas is a 2x2 mosaic.
+            device (torch.device): Device for the returned tensors.
+
+        Returns:
+            M (torch.Tensor): (B, 3, 3) matrices mapping canvas to output pixel coordinates.
+            scale (torch.Tensor): (B,) sampled scale factors.
+        """
+
+        def uniform(lo, hi):
+            return torch.empty(b, device=device).uniform_(lo, hi)
+
+        def eye():
+            return torch.eye(3, device=device).repeat(b, 1, 1)
+
+        C = eye()  # center, mosaics around a random point near the tile corner
+        C[:, 0, 2] = -(mosaic + 1) * w / 2 + mosaic * uniform(-w / 2, w / 2)
+        C[:, 1, 2] = -(mosaic + 1) * h / 2 + mosaic * uniform(-h / 2, h / 2)
+        P = eye()  # perspective
+        P[:, 2, 0] = uniform(-self.perspective, self.perspective)
+        P[:, 2, 1] = uniform(-self.perspective, self.perspective)
+        R = eye()  # rotation and scale
+        a = uniform(-self.degrees, self.degrees) * math.pi / 180
+        scale = uniform(1 - self.scale, 1 + self.scale)
+        R[:, 0, 0] = R[:, 1, 1] = a.cos() * scale
+        R[:, 0, 1] = a.sin() * scale
+        R[:, 1, 0] = -R[:, 0, 1]
+        S = eye()  # shear
+        S[:, 0, 1] = torch.tan(uniform(-self.shear, self.shear) * math.pi / 180)
+        S[:, 1, 0] = torch.tan(uniform(-self.shear, self.shear) * math.pi / 180)
+        T = eye()  # translation
+        T[:, 0, 2] = uniform(0.5 - self.translate, 0.5 + self.translate) * w
+        T[:, 1, 2] = uniform(0.5 - self.translate, 0.5 + self.translate) * h
+        return T @ S @ R @ P @ C, scale  # order of operations (right to left) is IMPORTANT
+
+    def hsv(self, img):
+        """
+        Applies random hue, saturation and value gains per image, equivalent to `RandomHSV` on RGB tensors.
+
+        Args:
+            img (torch.Tensor): (B, 3, H, W) RGB images in [0, 1].
+
+        Returns:
+            (torch.Tensor): HSV-augmented images in [0, 1].
+        """
+        gains = img.new_tensor(self.gains).view(1, 3, 1, 1)
+        r = (torch.rand(len(img), 3, 1, 1, device=img.device) * 2 - 1) * gains + 1  # random gains
+        maxc, argmax = img.max(1)
+        delta = maxc - img.amin(1)
+        red, green, blue = img.unbind(1)
+        d = delta.clamp(min=1e-12)
+        hue = torch.where(argmax == 1, (blue - red) / d + 2, (red - green) / d + 4)
+        hue = torch.where(argmax == 0, (green - blue) / d, hue)
+        hue = torch.where(delta > 0, hue / 6, 0.0) * r[:, 0] % 1.0
+        sat = (delta / maxc.clamp(min=1e-12) * r[:, 1]).clamp_(0, 1)
+        val = (maxc * r[:, 2]).clamp_(0, 1)
+        k = (img.new_tensor([5, 3, 1]).view(1, 3, 1, 1) + hue[:, None] * 6) % 6  # HSV to RGB
+        return val[:, None] * (1 - sat[:, None] * torch.minimum(k, 4 - k).clamp_(0, 1))
+
+
 def v8_transforms(dataset, imgsz, hyp, stretch=False):
     """
     Applies a series of image transformations for training.
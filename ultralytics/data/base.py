@@ -14,7 +14,7 @@ import numpy as np
 import psutil
 from torch.utils.data import Dataset
 
-from ultralytics.data.utils import FORMATS_HELP_MSG, HELP_URL, IMG_FORMATS
+from ultralytics.data.utils import FORMATS_HELP_MSG, HELP_URL, IMG_FORMATS, get_hash
 from ultralytics.utils import DEFAULT_CFG, LOCAL_RANK, LOGGER, NUM_THREADS, TQDM
 
 
@@ -25,7 +25,8 @@ class BaseDataset(Dataset):
     Args:
         img_path (str): Path to the folder containing images.
         imgsz (int, optional): Image size. Defaults to 640.
-        cache (bool, optional): Cache images to RAM or disk during training. Defaults to False.
+        cache (bool | str, optional): Cache images to RAM ('ram' or True), disk ('disk', one *.npy per image) or a
+            single memory-mapped file ('mmap') during training. Defaults to False.
         augment (bool, optional): If True, data augmentation is applied. Defaults to True.
         hyp (dict, optional): Hyperparameters to apply data augmentation. Defaults to None.
         prefix (str, optional): Prefix to print in log messages. Defaults to ''.
@@ -43,6 +44,8 @@ class BaseDataset(Dataset):
         ni (int): Number of images in the dataset.
         ims (list): List of loaded images.
         npy_files (list): List of numpy file paths.
+        mmap_file (Path): Path of the memory-mapped image cache, keyed on the image directory, image list and imgsz.
+        mmap_index (dict | None): Offsets, resized shapes and original shapes of the images in the mmap cache.
         transforms (callable): Image transformation function.
     """
 
@@ -86,9 +89,13 @@ class BaseDataset(Dataset):
         self.buffer = []  # buffer size = batch size
         self.max_buffer_length = min((self.ni, self.batch_size * 8, 1000)) if self.augment else 0
 
-        # Cache images (options are cache = True, False, None, "ram", "disk")
+        # Cache images (options are cache = True, False, None, "ram", "disk", "mmap")
         self.ims, self.im_hw0, self.im_hw = [None] * self.ni, [None] * self.ni, [None] * self.ni
         self.npy_files = [Path(f).with_suffix(".npy") for f in self.im_files]
+        im_dir = Path(self.im_files[0]).parent
+        # keyed on the image list too, so splits sharing a directory (e.g. train and val) never overwrite each other
+        self.mmap_file = im_dir.parent / f"{im_dir.name}.{get_hash(self.im_files)[:16]}.{self.imgsz}.mmap"
+        self.mmap_index, self._mmap = None, None
         self.cache = cache.lower() if isinstance(cache, str) else "ram" if cache is True else None
         if self.cache == "ram" and self.check_cache_ram():
             if hyp.deterministic:
@@ -99,6 +106,10 @@ class BaseDataset(Dataset):
             self.cache_images()
         elif self.cache == "disk" and self.check_cache_disk():
             self.cache_images()
+        elif self.cache == "mmap":
+            self.mmap_index = self.load_mmap_index()
+            if self.mmap_index is None and self.check_cache_disk() and self.check_cache_ram():
+                self.cache_images()
 
         # Transforms
         self.transforms = self.build_transforms(hyp=hyp)
@@ -148,30 +159,39 @@ class BaseDataset(Dataset):
             if self.single_cls:
                 self.labels[i]["cls"][:, 0] = 0
 
+    def read_image(self, i, rect_mode=True):
+        """Reads and resizes 1 image from dataset index 'i' without touching the buffer, returns (im, original hw)."""
+        f, fn = self.im_files[i], self.npy_files[i]
+        if fn.exists():  # load npy
+            try:
+                im = np.load(fn)
+            except Exception as e:
+                LOGGER.warning(f"{self.prefix}WARNING ⚠️ Removing corrupt *.npy image file {fn} due to: {e}")
+                Path(fn).unlink(missing_ok=True)
+                im = cv2.imread(f)  # BGR
+        else:  # read image
+            im = cv2.imread(f)  # BGR
+        if im is None:
+            raise FileNotFoundError(f"Image Not Found {f}")
+
+        h0, w0 = im.shape[:2]  # orig hw
+        if rect_mode:  # resize long side to imgsz while maintaining aspect ratio
+            r = self.imgsz / max(h0, w0)  # ratio
+            if r != 1:  # if sizes are not equal
+                w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif not (h0 == w0 == self.imgsz):  # resize by stretching image to square imgsz
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+        return im, (h0, w0)
+
     def load_image(self, i, rect_mode=True):
         """Loads 1 image from dataset index 'i', returns (im, resized hw)."""
-        im, f, fn = self.ims[i], self.im_files[i], self.npy_files[i]
+        im = self.ims[i]
         if im is None:  # not cached in RAM
-            if fn.exists():  # load npy
-                try:
-                    im = np.load(fn)
-                except Exception as e:
-                    LOGGER.warning(f"{self.prefix}WARNING ⚠️ Removing corrupt *.npy image file {fn} due to: {e}")
-                    Path(fn).unlink(missing_ok=True)
-                    im = cv2.imread(f)  # BGR
-            else:  # read image
-                im = cv2.imread(f)  # BGR
-            if im is None:
-                raise FileNotFoundError(f"Image Not Found {f}")
-
-            h0, w0 = im.shape[:2]  # orig hw
-            if rect_mode:  # resize long side to imgsz while maintaining aspect ratio
-                r = self.imgsz / max(h0, w0)  # ratio
-                if r != 1:  # if sizes are not equal
-                    w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
-                    im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
-            elif not (h0 == w0 == self.imgsz):  # resize by stretching image to square imgsz
-                im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+            if self.mmap_index is not None and rect_mode:  # memory-mapped cache holds rect_mode images
+                im, (h0, w0) = self.mmap_image(i)
+            else:
+                im, (h0, w0) = self.read_image(i, rect_mode)
 
             # Add to buffer if training with augmentations
             if self.augment:
@@ -188,6 +208,8 @@ class BaseDataset(Dataset):
 
     def cache_images(self):
         """Cache images to memory or disk."""
+        if self.cache == "mmap":
+            return self.cache_images_to_mmap()
         b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
         fcn, storage = (self.cache_images_to_disk, "Disk") if self.cache == "disk" else (self.load_image, "RAM")
         with ThreadPool(NUM_THREADS) as pool:
@@ -208,24 +230,83 @@ class BaseDataset(Dataset):
         if not f.exists():
             np.save(f.as_posix(), cv2.imread(self.im_files[i]), allow_pickle=False)
 
+    def mmap_image(self, i):
+        """Returns a zero-copy view of resized image 'i' from the memory-mapped cache and its original hw."""
+        if self._mmap is None:  # opened lazily, once per dataloader worker; pages are shared through the OS page cache
+            # copy-on-write: in-place augmentations never reach the file
+            self._mmap = np.memmap(self.mmap_file, dtype=np.uint8, mode="c")
+        index = self.mmap_index
+        start, end = index["offsets"][i], index["offsets"][i + 1]
+        return self._mmap[start:end].reshape(index["shapes"][i]), tuple(index["hw0"][i])
+
+    def load_mmap_index(self):
+        """Loads the mmap cache index if the cache matches the current images and imgsz, else returns None."""
+        index_file = self.mmap_file.with_name(f"{self.mmap_file.name}.npz")
+        try:
+            with np.load(index_file) as x:
+                index = {k: x[k] for k in ("offsets", "shapes", "hw0", "hash")}
+            assert str(index["hash"]) == get_hash(self.im_files)  # identical images
+            assert self.mmap_file.stat().st_size == index["offsets"][-1]  # complete blob
+        except (FileNotFoundError, AssertionError, KeyError, ValueError, OSError):
+            return None
+        LOGGER.info(
+            f"{self.prefix}Using memory-mapped image cache {self.mmap_file} ({index['offsets'][-1] / (1 << 30):.1f}GB)"
+        )
+        return index
+
+    def cache_images_to_mmap(self):
+        """Writes all resized images into a single uint8 blob with an offset index, shared by all dataloader workers."""
+        gb = 1 << 30  # bytes per gigabytes
+        offsets = np.zeros(self.ni + 1, dtype=np.int64)
+        shapes = np.zeros((self.ni, 3), dtype=np.int32)
+        hw0 = np.zeros((self.ni, 2), dtype=np.int32)
+        index_file = self.mmap_file.with_name(f"{self.mmap_file.name}.npz")
+        tmp_file = self.mmap_file.with_name(f"{self.mmap_file.name}.tmp")
+        index_file.unlink(missing_ok=True)  # the index is written last and marks a complete cache
+        with open(tmp_file, "wb") as f, ThreadPool(NUM_THREADS) as pool:
+            results = pool.imap(self.read_image, range(self.ni))
+            pbar = TQDM(enumerate(results), total=self.ni, disable=LOCAL_RANK > 0)
+            for i, (im, (h0, w0)) in pbar:
+                im = im if im.ndim == 3 else im[..., None]
+                f.write(np.ascontiguousarray(im).data)
+                offsets[i + 1] = offsets[i] + im.nbytes
+                shapes[i], hw0[i] = im.shape, (h0, w0)
+                pbar.desc = f"{self.prefix}Caching images ({offsets[i + 1] / gb:.1f}GB mmap)"
+            pbar.close()
+        os.replace(tmp_file, self.mmap_file)
+        with open(index_file, "wb") as f:
+            np.savez(f, offsets=offsets, shapes=shapes, hw0=hw0, hash=np.array(get_hash(self.im_files)))
+        self.mmap_index = {"offsets": offsets, "shapes": shapes, "hw0": hw0}
+
+    def __getstate__(self):
+        """Drops the open memory map when the dataset is pickled to spawned workers, which re-open it lazily."""
+        state = self.__dict__.copy()
+        state["_mmap"] = None
+        if self.cache == "mmap":  # buffered images are views into the map, re-read them instead of pickling copies
+            state["ims"] = [None] * self.ni
+        return state
+
     def check_cache_disk(self, safety_margin=0.5):
         """Check image caching requirements vs available disk space."""
         import shutil
 
         b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
         n = min(self.ni, 30)  # extrapolate from 30 random images
+        cache_dir = self.mmap_file.parent if self.cache == "mmap" else None
         for _ in range(n):
             im_file = random.choice(self.im_files)
             im = cv2.imread(im_file)
             if im is None:
                 continue
-            b += im.nbytes
-            if not os.access(Path(im_file).parent, os.W_OK):
+            # *.npy files hold original images, the mmap cache holds resized ones
+            ratio = self.imgsz / max(im.shape[0], im.shape[1]) if self.cache == "mmap" else 1.0
+            b += im.nbytes * ratio**2
+            if not os.access(cache_dir or Path(im_file).parent, os.W_OK):
                 self.cache = None
                 LOGGER.info(f"{self.prefix}Skipping caching images to disk, directory not writeable ⚠️")
                 return False
         disk_required = b * self.ni / n * (1 + safety_margin)  # bytes required to cache dataset to disk
-        total, used, free = shutil.disk_usage(Path(self.im_files[0]).parent)
+        total, used, free = shutil.disk_usage(cache_dir or Path(self.im_files[0]).parent)
         if disk_required > free:
             self.cache = None
             LOGGER.info(
@@ -248,6 +329,13 @@ class BaseDataset(Dataset):
             b += im.nbytes * ratio**2
         mem_required = b * self.ni / n * (1 + safety_margin)  # GB required to cache dataset into RAM
         mem = psutil.virtual_memory()
+        if self.cache == "mmap":  # one copy in the page cache for all workers, evictable, so never a reason to skip
+            if mem_required > mem.available:
+                LOGGER.info(
+                    f"{self.prefix}mmap image cache needs {mem_required / gb:.1f}GB but only "
+                    f"{mem.available / gb:.1f}/{mem.total / gb:.1f}GB RAM available, part of it will be read from disk"
+                )
+            return True
         if mem_required > mem.available:
             self.cache = None
             LOGGER.info(
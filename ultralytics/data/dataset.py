@@ -1,10 +1,16 @@
 # Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
 
+import contextlib
 import json
+import os
+import time
+import zlib
 from collections import defaultdict
+from collections.abc import Sequence
 from itertools import repeat
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
+from zipfile import BadZipFile
 
 import cv2
 import numpy as np
@@ -12,15 +18,18 @@ import torch
 from PIL import Image
 from torch.utils.data import ConcatDataset
 
-from ultralytics.utils import LOCAL_RANK, NUM_THREADS, TQDM, colorstr
+from ultralytics.utils import LOCAL_RANK, NUM_THREADS, TQDM, colorstr, is_dir_writeable
 from ultralytics.utils.ops import resample_segments
 from ultralytics.utils.torch_utils import TORCHVISION_0_18
 
 from .augment import (
+    Albumentations,
+    BatchAugment,
     Compose,
     Format,
     Instances,
     LetterBox,
+    RandomFlip,
     RandomLoadText,
     classify_augmentations,
     classify_transforms,
@@ -30,16 +39,156 @@ from .base import BaseDataset
 from .utils import (
     HELP_URL,
     LOGGER,
+    DatasetVerifier,
+    get_files_hash,
     get_hash,
     img2label_paths,
     load_dataset_cache_file,
+    load_label_shard,
     save_dataset_cache_file,
+    save_label_shard,
     verify_image,
-    verify_image_label,
 )
 
 # Ultralytics dataset *.cache version, >= 1.0.0 for YOLOv8
 DATASET_CACHE_VERSION = "1.0.3"
+LABEL_SHARD_SIZE = 4096  # average number of images per label cache shard
+LABEL_SHARD_MAX_AGE = 7 * 86400  # seconds after which unused label cache shards are removed
+
+
+def label_shard_bounds(im_files, shard_size=LABEL_SHARD_SIZE):
+    """
+    Split sorted image files into label cache shards with content-defined boundaries.
+
+    A shard ends after every file whose name hash is divisible by shard_size, so boundaries depend only on the file
+    names: adding or removing images changes only the shards that contain them, not every shard after them.
+
+    Returns:
+        (List[Tuple[int, int]]): (start, end) index ranges covering im_files.
+    """
+    bounds, start = [], 0
+    for i, f in enumerate(im_files):
+        if zlib.crc32(os.path.basename(f).encode()) % shard_size == 0:
+            bounds.append((start, i + 1))
+            start = i + 1
+    if start < len(im_files):
+        bounds.append((start, len(im_files)))
+    return bounds
+
+
+def pack_labels(results, key, keypoint=False):
+    """
+    Pack `verify_image_label` results of one shard into flat numpy arrays.
+
+    Per-image arrays are indexed by image, box arrays are concatenated and sliced by `lb_offsets`, segment points are
+    concatenated and sliced per box by `seg_offsets`.
+    """
+    counts = [sum(r[k] for r in results) for k in (6, 5, 7, 8)] + [len(results)]  # found, missing, empty, corrupt, n
+    results = [r for r in results if r[0]]  # drop corrupt images
+    lbs = [r[1] for r in results]
+    segments = [r[3] for r in results]
+    seg_lens = [len(s) for seg in segments for s in seg] if any(segments) else []
+    x = {
+        "im_files": np.array([r[0] for r in results], dtype=str),
+        "shapes": np.array([r[2] for r in results], dtype=np.int32).reshape(-1, 2),
+        "lb_offsets": np.cumsum([0] + [len(lb) for lb in lbs], dtype=np.int64),
+        "cls": np.concatenate([lb[:, 0:1] for lb in lbs]) if lbs else np.zeros((0, 1), dtype=np.float32),
+        "bboxes": np.concatenate([lb[:, 1:] for lb in lbs]) if lbs else np.zeros((0, 4), dtype=np.float32),
+        "has_seg": np.array([len(seg) > 0 for seg in segments], dtype=bool),
+        "seg_offsets": np.cumsum(
+            [0] + [len(s) for seg, lb in zip(segments, lbs) for s in (seg or [()] * len(lb))], dtype=np.int64
+        )
+        if seg_lens
+        else np.zeros(1, dtype=np.int64),
+        "seg_points": np.concatenate([s for seg in segments for s in seg]).astype(np.float32)
+        if seg_lens
+        else np.zeros((0, 2), dtype=np.float32),
+        "results": np.array(counts, dtype=np.int64),
+        "msgs": np.array([r[9] for r in results if r[9]], dtype=str),
+        "key": np.array(key),
+    }
+    if keypoint:
+        x["keypoints"] = np.concatenate([r[4] for r in results]) if results else np.zeros((0, 0, 3), np.float32)
+    return x
+
+
+def prune_label_shards(cache_dir, keep, max_age=LABEL_SHARD_MAX_AGE):
+    """Remove label cache shards not in keep and unused for max_age seconds (other splits may share cache_dir)."""
+    now = time.time()
+    for f in cache_dir.glob("*.npz") if cache_dir.is_dir() else ():
+        if f not in keep and now - f.stat().st_mtime > max_age:
+            f.unlink(missing_ok=True)
+
+
+class PackedLabels(Sequence):
+    """
+    List-like view of YOLO labels stored as packed per-shard numpy arrays.
+
+    Per-image label dicts are built on first access and kept, so in-place edits (single_cls, class filtering,
+    rectangular shapes) persist as with a plain list. Only the per-image index arrays are read at startup; the box,
+    segment and keypoint arrays of a cached shard are decompressed the first time one of its labels is accessed.
+
+    Attributes:
+        shards (List[dict]): Arrays of each shard, plus 'path' for shards loaded lazily from disk.
+        im_files (List[str]): Image files of all labels in order.
+        results (Tuple[int, ...]): Total (found, missing, empty, corrupt, total) counts of the verification.
+        drop_segments (bool): Return empty segments, used for mixed detect-segment datasets.
+    """
+
+    INDEX_KEYS = "im_files", "shapes", "lb_offsets", "has_seg", "results", "msgs", "key"
+    DATA_KEYS = "cls", "bboxes", "seg_offsets", "seg_points", "keypoints"
+
+    def __init__(self, shards):
+        """Initialize from the arrays of each shard, see `pack_labels`."""
+        self.shards = shards
+        self.starts = np.cumsum([0] + [len(s["im_files"]) for s in shards])
+        self.im_files = [str(f) for s in shards for f in s["im_files"].tolist()]
+        self.results = tuple(int(x) for x in np.sum([s["results"] for s in shards], 0)) if shards else (0,) * 5
+        self.drop_segments = False
+        self._labels = {}
+
+    def __len__(self):
+        """Returns the number of labelled images."""
+        return int(self.starts[-1])
+
+    def __getitem__(self, index):
+        """Returns the label dict of image 'index', or a list of label dicts for a slice."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index) + (len(self) if index < 0 else 0)
+        if not 0 <= index < len(self):
+            raise IndexError(f"label index {index} out of range")
+        if index not in self._labels:
+            self._labels[index] = self._build(index)
+        return self._labels[index]
+
+    def counts(self):
+        """Returns the total (boxes, segments) counts from the index arrays, without loading any boxes."""
+        boxes = sum(int(s["lb_offsets"][-1]) for s in self.shards)
+        segments = sum(int(np.diff(s["lb_offsets"])[s["has_seg"]].sum()) for s in self.shards)
+        return boxes, segments
+
+    def _build(self, index):
+        """Builds the label dict of image 'index' from its shard arrays."""
+        si = int(np.searchsorted(self.starts, index, side="right")) - 1
+        shard, j = self.shards[si], index - self.starts[si]
+        if "cls" not in shard:  # lazy load
+            shard.update(load_label_shard(shard["path"], self.DATA_KEYS))
+        a, b = shard["lb_offsets"][j], shard["lb_offsets"][j + 1]
+        segments = []
+        if shard["has_seg"][j] and not self.drop_segments:
+            so = shard["seg_offsets"]
+            segments = [shard["seg_points"][so[k] : so[k + 1]] for k in range(a, b)]
+        return {
+            "im_file": str(shard["im_files"][j]),
+            "shape": tuple(int(x) for x in shard["shapes"][j]),
+            "cls": shard["cls"][a:b],  # n, 1
+            "bboxes": shard["bboxes"][a:b],  # n, 4
+            "segments": segments,
+            "keypoints": shard["keypoints"][a:b] if "keypoints" in shard else None,
+            "normalized": True,
+            "bbox_format": "xywh",
+        }
 
 
 class YOLODataset(BaseDataset):
@@ -63,117 +212,173 @@ class YOLODataset(BaseDataset):
         assert not (self.use_segments and self.use_keypoints), "Can not use both segments and keypoints."
         super().__init__(*args, **kwargs)
 
-    def cache_labels(self, path=Path("./labels.cache")):
+    def cache_labels(self, cache_dir, shards, salt=""):
         """
-        Cache dataset labels, check images and read shapes.
+        Verify images and labels of the given shards and save each shard as a compressed *.npz file in cache_dir.
+
+        Verification runs on a `DatasetVerifier` pool. Shards are saved as soon as they are complete, except shards with
+        corrupt JPEGs: these are saved after the JPEGs are restored, keyed on the restored files.
 
         Args:
-            path (Path): Path where to save the cache file. Default is Path("./labels.cache").
+            cache_dir (Path): Directory of the label cache shards.
+            shards (List[tuple]): (start, end, key, path) of each shard to build, start:end indexing self.im_files.
+            salt (str): Salt of the shard keys, see `get_files_hash`.
 
         Returns:
-            (dict): labels.
+            (List[dict]): Packed label arrays of each shard, see `pack_labels`.
         """
-        x = {"labels": []}
         nm, nf, ne, nc, msgs = 0, 0, 0, 0, []  # number missing, found, empty, corrupt, messages
-        desc = f"{self.prefix}Scanning {path.parent / path.stem}..."
-        total = len(self.im_files)
+        desc = f"{self.prefix}Scanning {cache_dir.parent / cache_dir.stem}..."
         nkpt, ndim = self.data.get("kpt_shape", (0, 0))
         if self.use_keypoints and (nkpt <= 0 or ndim not in {2, 3}):
             raise ValueError(
                 "'kpt_shape' in data.yaml missing or incorrect. Should be a list with [number of "
                 "keypoints, number of dims (2 for x,y or 3 for x,y,visible)], i.e. 'kpt_shape: [17, 3]'"
             )
-        with ThreadPool(NUM_THREADS) as pool:
-            results = pool.imap(
-                func=verify_image_label,
-                iterable=zip(
-                    self.im_files,
-                    self.label_files,
-                    repeat(self.prefix),
-                    repeat(self.use_keypoints),
-                    repeat(len(self.data["names"])),
-                    repeat(nkpt),
-                    repeat(ndim),
-                ),
-            )
-            pbar = TQDM(results, desc=desc, total=total)
-            for im_file, lb, shape, segments, keypoint, nm_f, nf_f, ne_f, nc_f, msg in pbar:
-                nm += nm_f
-                nf += nf_f
-                ne += ne_f
-                nc += nc_f
-                if im_file:
-                    x["labels"].append(
-                        {
-                            "im_file": im_file,
-                            "shape": shape,
-                            "cls": lb[:, 0:1],  # n, 1
-                            "bboxes": lb[:, 1:],  # n, 4
-                            "segments": segments,
-                            "keypoints": keypoint,
-                            "normalized": True,
-                            "bbox_format": "xywh",
-                        }
-                    )
-                if msg:
-                    msgs.append(msg)
-                pbar.desc = f"{desc} {nf} images, {nm + ne} backgrounds, {nc} corrupt"
-            pbar.close()
+        writeable = is_dir_writeable(cache_dir.parent)
+        if writeable:
+            cache_dir.mkdir(exist_ok=True)
+        else:
+            LOGGER.warning(f"{self.prefix}WARNING ⚠️ Cache directory {cache_dir.parent} is not writeable, not cached.")
+
+        indices = [i for start, end, _, _ in shards for i in range(start, end)]  # only files of changed shards
+        verifier = DatasetVerifier(self.prefix, self.use_keypoints, len(self.data["names"]), nkpt, ndim)
+        packed, results, deferred = [], [], []
+        pending = 0  # corrupt JPEGs found so far, the shard being filled has some if this grows
+        pbar = TQDM(
+            verifier((self.im_files[i] for i in indices), (self.label_files[i] for i in indices)),
+            desc=desc,
+            total=len(indices),
+        )
+        for result in pbar:
+            nm += result[5]
+            nf += result[6]
+            ne += result[7]
+            nc += result[8]
+            if result[9]:
+                msgs.append(result[9])
+            results.append(result)
+            start, end, key, path = shards[len(packed)]
+            if len(results) == end - start:  # shard complete, save it before verifying the next one
+                packed.append(pack_labels(results, key, self.use_keypoints))
+                if len(verifier.corrupt_jpegs) > pending:  # save after restoring its JPEGs, which changes the key
+                    deferred.append((len(packed) - 1, results))
+                    pending = len(verifier.corrupt_jpegs)
+                elif writeable:
+                    save_label_shard(path, packed[-1])
+                results = []
+            pbar.desc = f"{desc} {nf} images, {nm + ne} backgrounds, {nc} corrupt"
+        pbar.close()
 
         if msgs:
             LOGGER.info("\n".join(msgs))
+        failed = verifier.restore()  # JPEGs that could not be re-saved are corrupt, as when restored inline
+        nc += len(failed)
+        for k, results in deferred:
+            start, end, _, _ = shards[k]
+            key = get_files_hash(self.im_files[start:end] + self.label_files[start:end], salt)
+            results = [[None] * 5 + [0, 0, 0, 1, failed[r[0]]] if r[0] in failed else r for r in results]
+            packed[k] = pack_labels(results, key, self.use_keypoints)
+            if writeable:
+                save_label_shard(cache_dir / f"{key[:24]}.npz", packed[k])
+        report = verifier.report()
+        LOGGER.info(
+            f"{self.prefix}Verified {report['files']} files in {report['seconds']:.1f}s "
+            f"({report['files_per_second'] or 0:.0f} files/s, {report['workers']} {report['pool']} workers)"
+        )
         if nf == 0:
-            LOGGER.warning(f"{self.prefix}WARNING ⚠️ No labels found in {path}. {HELP_URL}")
-        x["hash"] = get_hash(self.label_files + self.im_files)
-        x["results"] = nf, nm, ne, nc, len(self.im_files)
-        x["msgs"] = msgs  # warnings
-        save_dataset_cache_file(self.prefix, path, x, DATASET_CACHE_VERSION)
-        return x
+            LOGGER.warning(f"{self.prefix}WARNING ⚠️ No labels found in {cache_dir}. {HELP_URL}")
+        if writeable:
+            with open(cache_dir / "report.json", "w", encoding="utf-8") as f:
+                json.dump(verifier.report(records=True), f)
+            LOGGER.info(f"{self.prefix}New cache created: {cache_dir} ({len(shards)} shards)")
+        return packed
 
     def get_labels(self):
-        """Returns dictionary of labels for YOLO training."""
+        """
+        Returns the labels for YOLO training as a list-like `PackedLabels`.
+
+        Labels are cached in content-defined shards (see `label_shard_bounds`) keyed by the paths, sizes and
+        modification times of their files, so adding or editing images only re-verifies the shards that contain them.
+        """
         self.label_files = img2label_paths(self.im_files)
-        cache_path = Path(self.label_files[0]).parent.with_suffix(".cache")
-        try:
-            cache, exists = load_dataset_cache_file(cache_path), True  # attempt to load a *.cache file
-            assert cache["version"] == DATASET_CACHE_VERSION  # matches current version
-            assert cache["hash"] == get_hash(self.label_files + self.im_files)  # identical hash
-        except (FileNotFoundError, AssertionError, AttributeError):
-            cache, exists = self.cache_labels(cache_path), False  # run cache ops
+        cache_dir = Path(self.label_files[0]).parent.with_suffix(".shards")
+        nkpt, ndim = self.data.get("kpt_shape", (0, 0))
+        salt = f"{DATASET_CACHE_VERSION} {self.use_keypoints} {len(self.data['names'])} {nkpt} {ndim}"
+
+        shards, missing = [], []
+        for start, end in label_shard_bounds(self.im_files):
+            key = get_files_hash(self.im_files[start:end] + self.label_files[start:end], salt)
+            path = cache_dir / f"{key[:24]}.npz"
+            try:
+                shard = load_label_shard(path, PackedLabels.INDEX_KEYS)  # boxes stay on disk until first used
+                assert str(shard["key"]) == key
+                shard["path"] = path
+                with contextlib.suppress(OSError):
+                    os.utime(path)  # mark as used, see prune below
+            except (FileNotFoundError, AssertionError, KeyError, ValueError, OSError, BadZipFile):
+                shard = None
+                missing.append((start, end, key, path))
+            shards.append(shard)
+        exists = len(missing) < len(shards)
+        if missing:
+            built = iter(self.cache_labels(cache_dir, missing, salt))
+            shards = [shard if shard is not None else next(built) for shard in shards]
+            prune_label_shards(cache_dir, {cache_dir / f"{str(s['key'])[:24]}.npz" for s in shards})
+        labels = PackedLabels(shards)
 
         # Display cache
-        nf, nm, ne, nc, n = cache.pop("results")  # found, missing, empty, corrupt, total
+        nf, nm, ne, nc, n = labels.results  # found, missing, empty, corrupt, total
         if exists and LOCAL_RANK in {-1, 0}:
-            d = f"Scanning {cache_path}... {nf} images, {nm + ne} backgrounds, {nc} corrupt"
+            d = f"Scanning {cache_dir}... {nf} images, {nm + ne} backgrounds, {nc} corrupt"
             TQDM(None, desc=self.prefix + d, total=n, initial=n)  # display results
-            if cache["msgs"]:
-                LOGGER.info("\n".join(cache["msgs"]))  # display warnings
+            if msgs := [str(m) for s in shards if "path" in s for m in s["msgs"]]:
+                LOGGER.info("\n".join(msgs))  # display warnings
 
-        # Read cache
-        [cache.pop(k) for k in ("hash", "version", "msgs")]  # remove items
-        labels = cache["labels"]
-        if not labels:
-            LOGGER.warning(f"WARNING ⚠️ No images found in {cache_path}, training may not work correctly. {HELP_URL}")
-        self.im_files = [lb["im_file"] for lb in labels]  # update im_files
+        if not len(labels):
+            LOGGER.warning(f"WARNING ⚠️ No images found in {cache_dir}, training may not work correctly. {HELP_URL}")
+        self.im_files = labels.im_files  # update im_files
 
         # Check if the dataset is all boxes or all segments
-        lengths = ((len(lb["cls"]), len(lb["bboxes"]), len(lb["segments"])) for lb in labels)
-        len_cls, len_boxes, len_segments = (sum(x) for x in zip(*lengths))
+        len_boxes, len_segments = labels.counts()
         if len_segments and len_boxes != len_segments:
             LOGGER.warning(
                 f"WARNING ⚠️ Box and segment counts should be equal, but got len(segments) = {len_segments}, "
                 f"len(boxes) = {len_boxes}. To resolve this only boxes will be used and all segments will be removed. "
                 "To avoid this please supply either a detect or segment dataset, not a detect-segment mixed dataset."
             )
-            for lb in labels:
-                lb["segments"] = []
-        if len_cls == 0:
-            LOGGER.warning(f"WARNING ⚠️ No labels found in {cache_path}, training may not work correctly. {HELP_URL}")
+            labels.drop_segments = True
+        if len_boxes == 0:
+            LOGGER.warning(f"WARNING ⚠️ No labels found in {cache_dir}, training may not work correctly. {HELP_URL}")
         return labels
 
     def build_transforms(self, hyp=None):
         """Builds and appends transforms to the list."""
-        if self.augment:
+        self.batch_transforms = None  # batch-level augmentation applied by the trainer, detect only
+        boxes_only = not (self.rect or self.use_segments or self.use_keypoints or self.use_obb)
+        if self.augment and hyp.batch_augment and boxes_only:
+            if hyp.mixup or hyp.copy_paste:
+                LOGGER.warning("WARNING ⚠️ 'batch_augment=True' does not support 'mixup' or 'copy_paste', ignoring")
+            transforms = Compose(
+                [
+                    LetterBox(new_shape=(self.imgsz, self.imgsz)),
+                    Albumentations(p=1.0),
+                    RandomFlip(direction="vertical", p=hyp.flipud),
+                    RandomFlip(direction="horizontal", p=hyp.fliplr),
+                ]
+            )
+            self.batch_transforms = BatchAugment(
+                mosaic=hyp.mosaic,
+                degrees=hyp.degrees,
+                translate=hyp.translate,
+                scale=hyp.scale,
+                shear=hyp.shear,
+                perspective=hyp.perspective,
+                hgain=hyp.hsv_h,
+                sgain=hyp.hsv_s,
+                vgain=hyp.hsv_v,
+            )
+        elif self.augment:
             hyp.mosaic = hyp.mosaic if self.augment and not self.rect else 0.0
             hyp.mixup = hyp.mixup if self.augment and not self.rect else 0.0
             transforms = v8_transforms(self, self.imgsz, hyp)
@@ -273,6 +478,8 @@ class YOLOMultiModalDataset(YOLODataset):
 
     def build_transforms(self, hyp=None):
         """Enhances data transformations with optional text augmentation for multi-modal training."""
+        if self.augment:
+            hyp.batch_augment = False  # texts are sampled per image, so labels cannot be mixed across the batch
         transforms = super().build_transforms(hyp)
         if self.augment:
             # NOTE: hard-coded the args for now.
@@ -348,6 +555,8 @@ class GroundingDataset(YOLODataset):
 
     def build_transforms(self, hyp=None):
         """Configures augmentations for training with optional text loading; `hyp` adjusts augmentation intensity."""
+        if self.augment:
+            hyp.batch_augment = False  # texts are sampled per image, so labels cannot be mixed across the batch
         transforms = super().build_transforms(hyp)
         if self.augment:
             # NOTE: hard-coded the args for now.
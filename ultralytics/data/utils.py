@@ -7,7 +7,7 @@ import random
 import subprocess
 import time
 import zipfile
-from multiprocessing.pool import ThreadPool
+from multiprocessing.pool import Pool, ThreadPool
 from pathlib import Path
 from tarfile import is_tarfile
 
@@ -55,6 +55,18 @@ def get_hash(paths):
     return h.hexdigest()  # return hash
 
 
+def get_files_hash(paths, salt=""):
+    """Returns a hash of the paths, sizes and modification times of files, detecting edits that keep the file size."""
+    h = hashlib.sha256(salt.encode())
+    for p in paths:
+        try:
+            st = os.stat(p)
+            h.update(f"{p}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        except OSError:  # missing file, e.g. image without label
+            h.update(f"{p}\0\n".encode())
+    return h.hexdigest()
+
+
 def exif_size(img: Image.Image):
     """Returns exif-corrected PIL size."""
     s = img.size  # (width, height)
@@ -94,25 +106,55 @@ def verify_image(args):
     return (im_file, cls), nf, nc, msg
 
 
-def verify_image_label(args):
-    """Verify one image-label pair."""
+def read_image_header(im_file):
+    """
+    Read the format and EXIF-corrected (h, w) of an image from its header only, without decoding pixels.
+
+    Returns:
+        (tuple): Image format in lowercase, (h, w) shape and, for JPEGs, whether the end-of-image marker is present.
+    """
+    with Image.open(im_file) as im:  # lazy: parses the header (and EXIF segment), not the pixel data
+        if im.format != "JPEG":
+            im.verify()  # PIL verify, e.g. PNG chunk CRCs; a no-op for JPEG
+        fmt, shape = im.format.lower(), exif_size(im)[::-1]  # hw
+    complete = True
+    if fmt in {"jpg", "jpeg"}:
+        with open(im_file, "rb") as f:
+            f.seek(-2, 2)
+            complete = f.read() == b"\xff\xd9"
+    return fmt, shape, complete
+
+
+def restore_jpeg(im_file):
+    """Re-save a corrupt JPEG through a temporary file, so hard-linked copies of the original are not rewritten."""
+    tmp = f"{im_file}.tmp"
+    with Image.open(im_file) as im:
+        ImageOps.exif_transpose(im).save(tmp, "JPEG", subsampling=0, quality=100)
+    os.replace(tmp, im_file)
+
+
+def verify_image_label(args, restore=True):
+    """
+    Verify one image-label pair.
+
+    With restore=False a corrupt JPEG is not re-saved here; an extra trailing `corrupt_jpeg` flag is returned instead so
+    the caller can restore such files in a separate pass (see `DatasetVerifier`).
+    """
     im_file, lb_file, prefix, keypoint, num_cls, nkpt, ndim = args
     # Number (missing, found, empty, corrupt), message, segments, keypoints
     nm, nf, ne, nc, msg, segments, keypoints = 0, 0, 0, 0, "", [], None
+    corrupt_jpeg = False
     try:
         # Verify images
-        im = Image.open(im_file)
-        im.verify()  # PIL verify
-        shape = exif_size(im)  # image size
-        shape = (shape[1], shape[0])  # hw
+        fmt, shape, complete = read_image_header(im_file)
         assert (shape[0] > 9) & (shape[1] > 9), f"image size {shape} <10 pixels"
-        assert im.format.lower() in IMG_FORMATS, f"invalid image format {im.format}. {FORMATS_HELP_MSG}"
-        if im.format.lower() in {"jpg", "jpeg"}:
-            with open(im_file, "rb") as f:
-                f.seek(-2, 2)
-                if f.read() != b"\xff\xd9":  # corrupt JPEG
-                    ImageOps.exif_transpose(Image.open(im_file)).save(im_file, "JPEG", subsampling=0, quality=100)
-                    msg = f"{prefix}WARNING ⚠️ {im_file}: corrupt JPEG restored and saved"
+        assert fmt in IMG_FORMATS, f"invalid image format {fmt}. {FORMATS_HELP_MSG}"
+        if not complete:  # corrupt JPEG
+            if restore:
+                restore_jpeg(im_file)
+                msg = f"{prefix}WARNING ⚠️ {im_file}: corrupt JPEG restored and saved"
+            else:
+                corrupt_jpeg = True
 
         # Verify labels
         if os.path.isfile(lb_file):
@@ -158,11 +200,130 @@ def verify_image_label(args):
                 kpt_mask = np.where((keypoints[..., 0] < 0) | (keypoints[..., 1] < 0), 0.0, 1.0).astype(np.float32)
                 keypoints = np.concatenate([keypoints, kpt_mask[..., None]], axis=-1)  # (nl, nkpt, 3)
         lb = lb[:, :5]
-        return im_file, lb, shape, segments, keypoints, nm, nf, ne, nc, msg
+        result = im_file, lb, shape, segments, keypoints, nm, nf, ne, nc, msg
     except Exception as e:
         nc = 1
         msg = f"{prefix}WARNING ⚠️ {im_file}: ignoring corrupt image/label: {e}"
-        return [None, None, None, None, None, nm, nf, ne, nc, msg]
+        result = None, None, None, None, None, nm, nf, ne, nc, msg
+    return result if restore else (*result, corrupt_jpeg and bool(result[0]))
+
+
+def _verify_image_label_deferred(args):
+    """Pool task for `DatasetVerifier`: verify_image_label without restoring corrupt JPEGs."""
+    return verify_image_label(args, restore=False)
+
+
+class DatasetVerifier:
+    """
+    Verifies image-label pairs in parallel and reports per-file results and throughput.
+
+    Pairs are dispatched in chunks to a process pool, so header parsing and label checks are not serialized by the GIL;
+    small datasets, where process start-up would dominate, use a thread pool. Images are checked from their headers
+    only, and corrupt JPEGs are recorded during verification and re-saved afterwards by `restore`.
+
+    Attributes:
+        workers (int): Number of pool workers.
+        use_processes (bool): Whether the last run used a process pool.
+        records (List[tuple]): (im_file, status, message) per verified file, status one of 'found', 'missing',
+            'empty' or 'corrupt'.
+        corrupt_jpegs (List[str]): JPEGs missing the end-of-image marker, waiting for `restore`.
+        restored (List[str]): JPEGs re-saved by `restore`.
+        failed (Dict[str, str]): JPEGs that `restore` could not re-save, with the error; these images are corrupt.
+        seconds (float): Verification wall time of the last run.
+
+    Examples:
+        >>> verifier = DatasetVerifier(num_cls=80)
+        >>> results = list(verifier(im_files, label_files))
+        >>> verifier.restore()
+        >>> print(verifier.report()["files_per_second"])
+    """
+
+    MIN_PROCESS_FILES = 2000  # below this a thread pool is faster than starting processes
+
+    def __init__(self, prefix="", keypoint=False, num_cls=80, nkpt=0, ndim=0, workers=NUM_THREADS):
+        """Initialize the verifier with the `verify_image_label` settings and the number of pool workers."""
+        self.args = prefix, keypoint, num_cls, nkpt, ndim
+        self.prefix = prefix
+        self.workers = max(1, workers)
+        self.use_processes = False
+        self.records, self.corrupt_jpegs, self.restored, self.failed = [], [], [], {}
+        self.seconds = 0.0
+
+    def __call__(self, im_files, label_files):
+        """Yields `verify_image_label` results in input order, recording each file in the report."""
+        im_files, label_files = list(im_files), list(label_files)
+        n = len(im_files)
+        tasks = [(im, lb, *self.args) for im, lb in zip(im_files, label_files)]
+        chunksize = max(1, min(256, n // (self.workers * 8)))
+        self.use_processes = self.workers > 1 and n >= self.MIN_PROCESS_FILES
+        t = time.perf_counter()
+        pool = None
+        if self.use_processes:
+            try:
+                pool = Pool(self.workers)
+            except (AssertionError, OSError):  # e.g. daemonic processes are not allowed to have children
+                self.use_processes = False
+        pool = pool or ThreadPool(self.workers)
+        try:
+            for i, result in enumerate(pool.imap(_verify_image_label_deferred, tasks, chunksize=chunksize)):
+                *result, corrupt_jpeg = result
+                nm, nf, ne, nc, msg = result[5:]
+                status = "corrupt" if nc else "missing" if nm else "empty" if ne else "found"
+                self.records.append((tasks[i][0], status, msg))
+                if corrupt_jpeg:
+                    self.corrupt_jpegs.append(result[0])
+                yield result
+        finally:
+            pool.terminate()  # all results consumed, or the caller stopped early
+            self.seconds += time.perf_counter() - t
+
+    def restore(self):
+        """Re-saves the corrupt JPEGs found during verification, returns the files that could not be restored."""
+        if not self.corrupt_jpegs:
+            return {}
+        with ThreadPool(self.workers) as pool:  # decoding and encoding release the GIL
+            errors = pool.map(self._restore_one, self.corrupt_jpegs)
+        failed = {}
+        for f, e in zip(self.corrupt_jpegs, errors):
+            if e:
+                failed[f] = f"{self.prefix}WARNING ⚠️ {f}: ignoring corrupt image/label: {e}"
+            else:
+                self.restored.append(f)
+                LOGGER.info(f"{self.prefix}WARNING ⚠️ {f}: corrupt JPEG restored and saved")
+        statuses = {f: i for i, (f, _, _) in enumerate(self.records)}
+        for f, msg in failed.items():
+            LOGGER.warning(msg)
+            self.records[statuses[f]] = (f, "corrupt", msg)
+        self.failed.update(failed)
+        self.corrupt_jpegs = []
+        return failed
+
+    @staticmethod
+    def _restore_one(im_file):
+        """Restores one JPEG, returns the error message or None."""
+        try:
+            restore_jpeg(im_file)
+        except Exception as e:
+            return str(e)
+
+    def report(self, records=False):
+        """Returns counts per status, throughput and pool settings, with per-file records if requested."""
+        counts = {k: 0 for k in ("found", "missing", "empty", "corrupt")}
+        for _, status, _ in self.records:
+            counts[status] += 1
+        n = len(self.records)
+        report = {
+            "files": n,
+            **counts,
+            "restored_jpegs": len(self.restored),
+            "seconds": round(self.seconds, 3),
+            "files_per_second": round(n / self.seconds, 1) if self.seconds else None,
+            "pool": "process" if self.use_processes else "thread",
+            "workers": self.workers,
+        }
+        if records:
+            report["records"] = [{"im_file": f, "status": s, "msg": m} for f, s, m in self.records]
+        return report
 
 
 def visualize_image_annotations(image_path, txt_path, label_map):
@@ -708,6 +869,20 @@ def load_dataset_cache_file(path):
     return cache
 
 
+def load_label_shard(path, keys=None):
+    """Load arrays of a *.npz label cache shard from path, only `keys` if given; other arrays are not decompressed."""
+    with np.load(str(path)) as x:
+        return {k: x[k] for k in (keys or x.files) if k in x.files}
+
+
+def save_label_shard(path, arrays):
+    """Save a compressed *.npz label cache shard atomically, so an interrupted run never leaves a partial shard."""
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as file:  # context manager here fixes windows async np.save bug
+        np.savez_compressed(file, **arrays)
+    os.replace(tmp, path)
+
+
 def save_dataset_cache_file(prefix, path, x, version):
     """Save an Ultralytics dataset *.cache dictionary x to path."""
     x["version"] = version  # add cache version
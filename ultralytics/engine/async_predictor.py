@@ -0,0 +1,238 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Awaitable prediction for asyncio applications, e.g. web servers handling many concurrent camera streams.
+
+Usage:
+    async def handler(frame):
+        results = await model.apredict(frame, conf=0.5, timeout=0.5)  # does not block the event loop
+
+    async def camera(websocket):
+        async for result in model.astream(websocket_frames(websocket), timeout=1.0):
+            await websocket.send(result.to_json())
+"""
+
+import asyncio
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+
+async def _aiter(frames):
+    """Iterate over an iterable or an async iterable asynchronously."""
+    if hasattr(frames, "__aiter__"):
+        async for frame in frames:
+            yield frame
+    else:
+        for frame in frames:
+            yield frame
+
+
+class _Request:
+    """One awaitable prediction request: images with their predict arguments and the future of their results."""
+
+    __slots__ = ("images", "kwargs", "key", "future")
+
+    def __init__(self, images, kwargs, future):
+        """Initialize a request for images predicted with kwargs, resolved through future."""
+        self.images = images
+        self.kwargs = kwargs
+        self.key = repr(sorted(kwargs.items()))  # requests with equal arguments can share a batch
+        self.future = future
+
+
+class AsyncPredictor:
+    """
+    Serves awaitable predictions from a single inference thread, coalescing concurrent requests into batches.
+
+    Requests are queued on the event loop and run by a dispatcher task, one batch at a time, on a single-thread
+    executor, so the event loop never blocks on inference. While a batch runs, new requests accumulate and are
+    coalesced into the next batch (up to `batch` images, requests with different predict arguments are never mixed).
+    At most `max_pending` requests are queued or running; further callers wait for a slot (backpressure). A request
+    whose caller is cancelled, e.g. on client disconnect, or whose deadline passes is dropped before it is run, or its
+    results are discarded if its batch is already running.
+
+    Attributes:
+        model (Model): The model whose `predict` runs the batches.
+        batch (int): Maximum number of images per coalesced batch.
+        max_wait (float): Seconds to wait for a batch to fill before running it, 0 to run what is pending at once.
+        max_pending (int): Maximum number of queued or running requests.
+        loop (asyncio.AbstractEventLoop | None): The event loop the predictor is bound to on first use.
+
+    Methods:
+        predict: Predicts images and returns their results, awaitable.
+        stream: Yields the results of frames from an iterable or async iterable in order.
+        close: Cancels pending requests and stops the dispatcher and the executor.
+
+    Examples:
+        >>> predictor = AsyncPredictor(YOLO("yolo11n.pt"), batch=32)
+        >>> results = await predictor.predict(frame, conf=0.5, timeout=0.5)
+    """
+
+    def __init__(self, model, batch=16, max_wait=0.0, max_pending=256):
+        """
+        Initialize the AsyncPredictor.
+
+        Args:
+            model (Model): The model whose `predict` runs the batches.
+            batch (int): Maximum number of images per coalesced batch.
+            max_wait (float): Seconds to wait for a batch to fill before running it, 0 to run what is pending at once.
+            max_pending (int): Maximum number of queued or running requests.
+        """
+        self.model = model
+        self.batch = batch
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.loop = None
+        self.executor = None
+        self._pending = deque()
+        self._dispatcher = None
+
+    def _bind(self):
+        """Bind the predictor to the running event loop and start the dispatcher on first use."""
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-predict")
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+        elif loop is not self.loop:
+            raise RuntimeError("AsyncPredictor is bound to the event loop it was first used in.")
+        elif self._dispatcher is None:
+            raise RuntimeError("AsyncPredictor is closed.")
+
+    async def predict(self, source, timeout=None, **kwargs):
+        """
+        Predict one image or a list of images without blocking the event loop.
+
+        Args:
+            source (str | Path | PIL.Image | np.ndarray | List): An image file, PIL or numpy image, or a list of them.
+            timeout (float | None): Deadline in seconds for the whole request, including waiting for a queue slot.
+            **kwargs (Any): Predict arguments, e.g. conf or imgsz.
+
+        Returns:
+            (List[ultralytics.engine.results.Results]): The results of the images in order.
+
+        Raises:
+            asyncio.TimeoutError: If the results are not ready within timeout; the request is then dropped.
+            TypeError: If source is not an image or a list of images, e.g. a video or a stream.
+        """
+        images = list(source) if isinstance(source, (list, tuple)) else [source]
+        if not all(isinstance(im, (str, Path, Image.Image, np.ndarray)) for im in images):
+            raise TypeError("AsyncPredictor supports image files, PIL images and numpy images, or a list of them.")
+        self._bind()
+        deadline = None if timeout is None else self.loop.time() + timeout
+
+        await asyncio.wait_for(self._slots.acquire(), timeout)  # backpressure
+        request = _Request(images, kwargs, self.loop.create_future())
+        request.future.add_done_callback(lambda _: self._slots.release())
+        self._pending.append(request)
+        self._wakeup.set()
+        if sum(len(r.images) for r in self._pending) >= self.batch:
+            self._full.set()
+        remaining = None if deadline is None else max(deadline - self.loop.time(), 0)
+        return await asyncio.wait_for(request.future, remaining)  # cancels the future on timeout or cancellation
+
+    async def stream(self, frames, timeout=None, max_inflight=2, **kwargs):
+        """
+        Yield the results of frames in order, keeping up to max_inflight frames in prediction at a time.
+
+        Frames that miss their deadline are dropped, so a slow moment does not end a live stream. Closing the
+        generator, e.g. when the client disconnects, cancels the frames still in flight.
+
+        Args:
+            frames (Iterable | AsyncIterable): Images as accepted by `predict`, e.g. decoded websocket frames.
+            timeout (float | None): Deadline in seconds for each frame.
+            max_inflight (int): Maximum number of frames in prediction at a time.
+            **kwargs (Any): Predict arguments, e.g. conf or imgsz.
+
+        Yields:
+            (ultralytics.engine.results.Results): The result of each frame that met its deadline.
+        """
+        inflight = deque()
+        try:
+            async for frame in _aiter(frames):
+                inflight.append(asyncio.ensure_future(self.predict(frame, timeout, **kwargs)))
+                while len(inflight) >= max_inflight:
+                    for result in await self._next(inflight):
+                        yield result
+            while inflight:
+                for result in await self._next(inflight):
+                    yield result
+        finally:
+            for task in inflight:
+                task.cancel()
+
+    @staticmethod
+    async def _next(inflight):
+        """Await the oldest in-flight frame and return its results, an empty list if it missed its deadline."""
+        try:
+            return await inflight.popleft()
+        except asyncio.TimeoutError:
+            return []
+
+    async def _dispatch(self):
+        """Coalesce pending requests into batches and run them one at a time on the executor."""
+        while True:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            if self.max_wait:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+
+            # oldest live request first, then the following requests with the same arguments that fit in the batch
+            batch, skipped, n = [], deque(), 0
+            while self._pending:
+                request = self._pending.popleft()
+                if request.future.done():  # cancelled or timed out while queued
+                    continue
+                if batch and (request.key != batch[0].key or n + len(request.images) > self.batch):
+                    skipped.append(request)
+                    continue
+                batch.append(request)
+                n += len(request.images)
+            self._pending = skipped
+            self._full.clear()
+            if not batch:
+                continue
+
+            images = [im for request in batch for im in request.images]
+            try:
+                results = await self.loop.run_in_executor(self.executor, self._predict, images, batch[0].kwargs)
+            except asyncio.CancelledError:  # closed while the batch runs
+                for request in batch:
+                    request.future.cancel()
+                raise
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            i = 0
+            for request in batch:
+                if not request.future.done():  # results of cancelled requests are discarded
+                    request.future.set_result(results[i : i + len(request.images)])
+                i += len(request.images)
+
+    def _predict(self, images, kwargs):
+        """Run one coalesced batch through the model, on the executor thread."""
+        return self.model.predict(images, **{"verbose": False, **kwargs})
+
+    async def close(self):
+        """Cancel pending requests and stop the dispatcher and the executor, waiting for a running batch to end."""
+        if self._dispatcher is None:
+            return
+        self._dispatcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._dispatcher
+        self._dispatcher = None
+        for request in self._pending:
+            request.future.cancel()
+        self._pending.clear()
+        await self.loop.run_in_executor(None, self.executor.shutdown)
@@ -113,6 +113,7 @@ class Model(torch.nn.Module):
         super().__init__()
         self.callbacks = callbacks.get_default_callbacks()
         self.predictor = None  # reuse predictor
+        self.async_predictor = None  # awaitable predictions for asyncio, created on first use
         self.model = None  # model object
         self.trainer = None  # trainer object
         self.ckpt = {}  # if loaded from *.pt
@@ -559,6 +560,66 @@ class Model(torch.nn.Module):
             self.predictor.set_prompts(prompts)
         return self.predictor.predict_cli(source=source) if is_cli else self.predictor(source=source, stream=stream)
 
+    async def apredict(
+        self,
+        source: Union[str, Path, Image.Image, list, tuple, np.ndarray],
+        timeout: float = None,
+        **kwargs: Any,
+    ) -> List[Results]:
+        """
+        Performs predictions on the given images without blocking the asyncio event loop.
+
+        Concurrent calls are queued and coalesced into batches that run one at a time on a dedicated inference
+        thread (see `AsyncPredictor`). Cancelling the awaiting task, e.g. when a client disconnects, drops the request.
+
+        Args:
+            source (str | Path | PIL.Image | np.ndarray | List | Tuple): An image file, PIL or numpy image, or a list
+                of them. Videos and streams are not supported, pass their frames instead.
+            timeout (float | None): Deadline in seconds for the request, including the time spent queued.
+            **kwargs: Additional keyword arguments for configuring the prediction process.
+
+        Returns:
+            (List[ultralytics.engine.results.Results]): A list of prediction results, one per image.
+
+        Raises:
+            asyncio.TimeoutError: If the results are not ready within timeout.
+
+        Examples:
+            >>> model = YOLO("yolo11n.pt")
+            >>> results = await model.apredict(frame, conf=0.5, timeout=0.5)
+        """
+        return await self._async_predictor().predict(source, timeout, **kwargs)
+
+    def astream(self, frames, timeout: float = None, max_inflight: int = 2, **kwargs: Any):
+        """
+        Asynchronously predicts a stream of frames, yielding results in order without blocking the event loop.
+
+        Up to max_inflight frames are in prediction at a time, coalesced with the requests of other streams.
+        Frames that miss their deadline are dropped; closing the generator cancels the frames still in flight.
+
+        Args:
+            frames (Iterable | AsyncIterable): Images as accepted by `apredict`, e.g. decoded websocket frames.
+            timeout (float | None): Deadline in seconds for each frame.
+            max_inflight (int): Maximum number of frames of this stream in prediction at a time.
+            **kwargs: Additional keyword arguments for configuring the prediction process.
+
+        Returns:
+            (AsyncIterator[ultralytics.engine.results.Results]): The result of each frame that met its deadline.
+
+        Examples:
+            >>> async for result in model.astream(websocket_frames(ws), timeout=1.0):
+            ...     await ws.send(result.to_json())
+        """
+        return self._async_predictor().stream(frames, timeout, max_inflight, **kwargs)
+
+    def _async_predictor(self):
+        """Returns the AsyncPredictor serving `apredict` and `astream`, created with default settings on first use."""
+        if self.async_predictor is None:
+            from ultralytics.engine.async_predictor import AsyncPredictor
+
+            self.async_predictor = AsyncPredictor(self)
+        return self.async_predictor
+
     def track(
         self,
         source: Union[str, Path, int, list, tuple, np.ndarray, torch.Tensor] = None,
@@ -33,6 +33,7 @@ Usage - formats:
 """
 
 import platform
+import queue
 import re
 import threading
 from pathlib import Path
@@ -43,13 +44,15 @@ import torch
 
 from ultralytics.cfg import get_cfg, get_save_dir
 from ultralytics.data import load_inference_source
-from ultralytics.data.augment import LetterBox, classify_transforms
+from ultralytics.data.augment import BatchLetterBox, classify_transforms
 from ultralytics.nn.autobackend import AutoBackend
 from ultralytics.utils import DEFAULT_CFG, LOGGER, MACOS, WINDOWS, callbacks, colorstr, ops
 from ultralytics.utils.checks import check_imgsz, check_imshow
 from ultralytics.utils.files import increment_path
 from ultralytics.utils.torch_utils import select_device, smart_inference_mode
 
+PIPELINE_DEPTH = 2  # batches each pipelined stage may run ahead of the next
+
 STREAM_WARNING = """
 WARNING ⚠️ inference results will accumulate in RAM unless `stream=True` is passed, causing potential out-of-memory
 errors for large sources or long-running streams and videos. See https://docs.ultralytics.com/modes/predict/ for help.
@@ -107,27 +110,54 @@ class BasePredictor:
         self.source_type = None
         self.seen = 0
         self.windows = []
+        self._local = threading.local()  # holds `batch`, see the property below
         self.batch = None
         self.results = None
         self.transforms = None
+        self.letterboxes = {}  # BatchLetterBox per (imgsz, auto, stride), reused across batches
         self.callbacks = _callbacks or callbacks.get_default_callbacks()
         self.txt_path = None
         self._lock = threading.Lock()  # for automatic thread-safe inference
         callbacks.add_integration_callbacks(self)
 
+    @property
+    def batch(self):
+        """
+        The (paths, images, info strings) batch being processed by the calling thread.
+
+        Kept per thread so that with `pipeline=True` the postprocess thread and the inference thread each see the batch
+        they are working on.
+        """
+        return getattr(self._local, "batch", None)
+
+    @batch.setter
+    def batch(self, batch):
+        """Sets the batch for the calling thread."""
+        self._local.batch = batch
+
     def preprocess(self, im):
         """
         Prepares input image before inference.
 
+        Images are letterboxed into one (N, H, W, 3) uint8 BGR batch. On CPU the channels are reordered while still
+        uint8; on other devices the uint8 batch is copied as is and reordered on the device.
+
         Args:
             im (torch.Tensor | List(np.ndarray)): BCHW for tensor, [(HWC) x B] for list.
         """
         not_tensor = not isinstance(im, torch.Tensor)
         if not_tensor:
-            im = np.stack(self.pre_transform(im))
-            im = im[..., ::-1].transpose((0, 3, 1, 2))  # BGR to RGB, BHWC to BCHW, (n, 3, h, w)
-            im = np.ascontiguousarray(im)  # contiguous
-            im = torch.from_numpy(im)
+            im = self.pre_transform(im)
+            im = np.stack(im) if isinstance(im, list) else im
+            if self.device.type == "cpu":
+                im = torch.from_numpy(np.ascontiguousarray(im[..., ::-1].transpose((0, 3, 1, 2))))  # BGR to RGB, BCHW
+            else:
+                im = torch.from_numpy(im)
+                if self.args.pipeline and self.device.type == "cuda" and not im.is_pinned():
+                    im = im.pin_memory().to(self.device, non_blocking=True)  # page-locked copy, asynchronous
+                else:
+                    im = im.to(self.device)  # blocking, a reused letterbox buffer is overwritten by the next batch
+                im = im.permute(0, 3, 1, 2).flip(1).contiguous()  # BHWC to BCHW, BGR to RGB
 
         im = im.to(self.device)
         im = im.half() if self.model.fp16 else im.float()  # uint8 to fp16/32
@@ -148,19 +178,24 @@ class BasePredictor:
         """
         Pre-transform input image before inference.
 
+        Letterboxing reuses one `BatchLetterBox` per image size and mode, keeping its buffer and cached geometry
+        across batches.
+
         Args:
-            im (List(np.ndarray)): (N, 3, h, w) for tensor, [(h, w, 3) x N] for list.
+            im (List(np.ndarray)): [(h, w, 3) x N] list of BGR images.
 
         Returns:
-            (list): A list of transformed images.
+            (np.ndarray | list): (N, h, w, 3) letterboxed batch, valid until the next call, or a list of transformed
+                images in subclasses.
         """
         same_shapes = len({x.shape for x in im}) == 1
-        letterbox = LetterBox(
-            self.imgsz,
-            auto=same_shapes and (self.model.pt or (getattr(self.model, "dynamic", False) and not self.model.imx)),
-            stride=self.model.stride,
-        )
-        return [letterbox(image=x) for x in im]
+        auto = same_shapes and (self.model.pt or (getattr(self.model, "dynamic", False) and not self.model.imx))
+        key = (*self.imgsz, auto, self.model.stride)
+        if key not in self.letterboxes:
+            self.letterboxes[key] = BatchLetterBox(
+                self.imgsz, auto=auto, stride=self.model.stride, pin_memory=self.device.type == "cuda"
+            )
+        return self.letterboxes[key](im)
 
     def postprocess(self, preds, img, orig_imgs):
         """Post-processes predictions for an image and returns them."""
@@ -248,44 +283,29 @@ class BasePredictor:
                 ops.Profile(device=self.device),
             )
             self.run_callbacks("on_predict_start")
-            for self.batch in self.dataset:
-                self.run_callbacks("on_predict_batch_start")
-                paths, im0s, s = self.batch
-
-                # Preprocess
-                with profilers[0]:
-                    im = self.preprocess(im0s)
-
-                # Inference
-                with profilers[1]:
-                    preds = self.inference(im, *args, **kwargs)
-                    if self.args.embed:
-                        yield from [preds] if isinstance(preds, torch.Tensor) else preds  # yield embedding tensors
-                        continue
-
-                # Postprocess
-                with profilers[2]:
-                    self.results = self.postprocess(preds, im, im0s)
-                self.run_callbacks("on_predict_postprocess_end")
-
-                # Visualize, save, write results
-                n = len(im0s)
-                for i in range(n):
-                    self.seen += 1
-                    self.results[i].speed = {
-                        "preprocess": profilers[0].dt * 1e3 / n,
-                        "inference": profilers[1].dt * 1e3 / n,
-                        "postprocess": profilers[2].dt * 1e3 / n,
-                    }
-                    if self.args.verbose or self.args.save or self.args.save_txt or self.args.show:
-                        s[i] += self.write_results(i, Path(paths[i]), im, s)
-
-                # Print batch results
-                if self.args.verbose:
-                    LOGGER.info("\n".join(s))
-
-                self.run_callbacks("on_predict_batch_end")
-                yield from self.results
+            if self._pipelined():
+                im = yield from self._stream_pipelined(profilers, *args, **kwargs)
+            else:
+                for self.batch in self.dataset:
+                    self.run_callbacks("on_predict_batch_start")
+                    paths, im0s, s = self.batch
+
+                    # Preprocess
+                    with profilers[0]:
+                        im = self.preprocess(im0s)
+
+                    # Inference
+                    with profilers[1]:
+                        preds = self.inference(im, *args, **kwargs)
+                        if self.args.embed:
+                            yield from [preds] if isinstance(preds, torch.Tensor) else preds  # yield embedding tensors
+                            continue
+
+                    # Postprocess
+                    with profilers[2]:
+                        self.results = self.postprocess(preds, im, im0s)
+                    self._finish_batch(im, tuple(x.dt for x in profilers))
+                    yield from self.results
 
         # Release assets
         for v in self.vid_writer.values():
@@ -305,6 +325,145 @@ class BasePredictor:
             LOGGER.info(f"Results saved to {colorstr('bold', self.save_dir)}{s}")
         self.run_callbacks("on_predict_end")
 
+    def _pipelined(self):
+        """Whether `pipeline=True` can be honoured for the current source."""
+        if not self.args.pipeline or self.args.embed:
+            return False
+        st = self.source_type
+        # Streams and in-memory sources are read live or in one batch, and mixed image/video folders switch
+        # `dataset.mode`, which results are written with; read-ahead is only safe for uniform file sources
+        return not (st.stream or st.screenshot or st.from_img or st.tensor) and len(set(self.dataset.video_flag)) == 1
+
+    def _stream_pipelined(self, profilers, *args, **kwargs):
+        """
+        Streams results with preprocess, inference and postprocess of consecutive batches running concurrently.
+
+        A prefetch thread reads and preprocesses batches and a postprocess thread turns raw predictions into Results,
+        while the calling thread runs inference, callbacks and result writing. Bounded queues between the stages
+        limit read-ahead to `PIPELINE_DEPTH` batches, and batches are finished and yielded in source order.
+
+        Args:
+            profilers (Tuple[ops.Profile, ops.Profile, ops.Profile]): Preprocess, inference and postprocess profilers,
+                each only entered by the thread running that stage.
+
+        Yields:
+            (Results): Results for each image, in source order.
+
+        Returns:
+            (torch.Tensor | None): The last preprocessed batch, or None for an empty source.
+        """
+        stop = threading.Event()
+        ready, pending, finished = queue.Queue(PIPELINE_DEPTH), queue.Queue(PIPELINE_DEPTH), queue.Queue()
+
+        def put(q, item):
+            """Put an item on a bounded queue, giving up once the pipeline is stopped."""
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(q):
+            """Get an item from a queue, returning None once the pipeline is stopped."""
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+        def prefetch():
+            """Read and preprocess batches ahead of inference."""
+            try:
+                for batch in self.dataset:
+                    with profilers[0]:
+                        im = self.preprocess(batch[1])
+                    if not put(ready, (batch, im, profilers[0].dt)):
+                        return
+            except Exception as e:
+                put(ready, e)
+            put(ready, None)
+
+        def postprocess():
+            """Turn raw predictions into Results behind inference."""
+            error = None
+            while (item := get(pending)) is not None:
+                if error:
+                    continue  # keep draining so inference never blocks on a full queue
+                self.batch, im, preds, dt = item
+                try:
+                    with profilers[2]:
+                        results = self.postprocess(preds, im, self.batch[1])
+                    finished.put((self.batch, im, results, (*dt, profilers[2].dt)))
+                except Exception as e:
+                    error = e
+                    finished.put(e)
+            finished.put(None)
+
+        def finish(item):
+            """Finish one postprocessed batch in the calling thread."""
+            if isinstance(item, Exception):
+                raise item
+            self.batch, im, self.results, dt = item
+            self._finish_batch(im, dt)
+            return self.results
+
+        # Inference mode is thread-local, so the stage functions are wrapped inside their own threads
+        stages = (prefetch, postprocess)
+        threads = [threading.Thread(target=lambda f=f: smart_inference_mode()(f)(), daemon=True) for f in stages]
+        for t in threads:
+            t.start()
+        im = None
+        try:
+            while (item := ready.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                self.batch, im, dt = item
+                self.run_callbacks("on_predict_batch_start")
+                with profilers[1]:
+                    preds = self.inference(im, *args, **kwargs)
+                put(pending, (self.batch, im, preds, (dt, profilers[1].dt)))
+                while not finished.empty():
+                    yield from finish(finished.get())
+            put(pending, None)
+            while (item := finished.get()) is not None:
+                yield from finish(item)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+        return im
+
+    def _finish_batch(self, im, dt):
+        """
+        Attaches stage timings to `self.results`, then writes, logs and runs the callbacks for `self.batch`.
+
+        Args:
+            im (torch.Tensor): Preprocessed batch the results were predicted from.
+            dt (Tuple[float, float, float]): Preprocess, inference and postprocess seconds for the batch.
+        """
+        self.run_callbacks("on_predict_postprocess_end")
+
+        # Visualize, save, write results
+        paths, im0s, s = self.batch
+        n = len(im0s)
+        for i in range(n):
+            self.seen += 1
+            self.results[i].speed = {
+                "preprocess": dt[0] * 1e3 / n,
+                "inference": dt[1] * 1e3 / n,
+                "postprocess": dt[2] * 1e3 / n,
+            }
+            if self.args.verbose or self.args.save or self.args.save_txt or self.args.show:
+                s[i] += self.write_results(i, Path(paths[i]), im, s)
+
+        # Print batch results
+        if self.args.verbose:
+            LOGGER.info("\n".join(s))
+
+        self.run_callbacks("on_predict_batch_end")
+
     def setup_model(self, model, verbose=True):
         """Initialize YOLO model with given parameters and set it to evaluation mode."""
         self.model = AutoBackend(
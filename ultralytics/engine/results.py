@@ -199,8 +199,10 @@ class Results(SimpleClass):
         probs (Probs | None): Object containing class probabilities for classification tasks.
         keypoints (Keypoints | None): Object containing detected keypoints for each object.
         obb (OBB | None): Object containing oriented bounding boxes.
+        categories (Categories | None): Object containing the big category of each detection.
         speed (Dict[str, float | None]): Dictionary of preprocess, inference, and postprocess speeds.
         names (Dict[int, str]): Dictionary mapping class IDs to class names.
+        category_names (Dict[int, str] | None): Dictionary mapping big category IDs to names.
         path (str): Path to the image file.
         _keys (Tuple[str, ...]): Tuple of attribute names for internal use.
 
@@ -228,7 +230,18 @@ class Results(SimpleClass):
     """
 
     def __init__(
-        self, orig_img, path, names, boxes=None, masks=None, probs=None, keypoints=None, obb=None, speed=None
+        self,
+        orig_img,
+        path,
+        names,
+        boxes=None,
+        masks=None,
+        probs=None,
+        keypoints=None,
+        obb=None,
+        speed=None,
+        categories=None,
+        category_names=None,
     ) -> None:
         """
         Initialize the Results class for storing and manipulating inference results.
@@ -243,6 +256,9 @@ class Results(SimpleClass):
             keypoints (torch.Tensor | None): A 2D tensor of keypoint coordinates for each detection.
             obb (torch.Tensor | None): A 2D tensor of oriented bounding box coordinates for each detection.
             speed (Dict | None): A dictionary containing preprocess, inference, and postprocess speeds (ms/image).
+            categories (torch.Tensor | None): A 2D tensor of (category confidence, category) for each detection,
+                as produced by NMS with category groups.
+            category_names (Dict | None): A dictionary of big category names.
 
         Examples:
             >>> results = model("path/to/image.jpg")
@@ -264,11 +280,13 @@ class Results(SimpleClass):
         self.probs = Probs(probs) if probs is not None else None
         self.keypoints = Keypoints(keypoints, self.orig_shape) if keypoints is not None else None
         self.obb = OBB(obb, self.orig_shape) if obb is not None else None
+        self.categories = Categories(categories, self.orig_shape) if categories is not None else None
         self.speed = speed if speed is not None else {"preprocess": None, "inference": None, "postprocess": None}
         self.names = names
+        self.category_names = category_names
         self.path = path
         self.save_dir = None
-        self._keys = "boxes", "masks", "probs", "keypoints", "obb"
+        self._keys = "boxes", "masks", "probs", "keypoints", "obb", "categories"
 
     def __getitem__(self, idx):
         """
@@ -444,7 +462,13 @@ class Results(SimpleClass):
             >>> results = model("path/to/image.jpg")
             >>> new_result = results[0].new()
         """
-        return Results(orig_img=self.orig_img, path=self.path, names=self.names, speed=self.speed)
+        return Results(
+            orig_img=self.orig_img,
+            path=self.path,
+            names=self.names,
+            speed=self.speed,
+            category_names=self.category_names,
+        )
 
     def plot(
         self,
@@ -796,16 +820,24 @@ class Results(SimpleClass):
         is_obb = self.obb is not None
         data = self.obb if is_obb else self.boxes
         h, w = self.orig_shape if normalize else (1, 1)
-        for i, row in enumerate(data):  # xyxy, track_id if tracking, conf, class_id
-            class_id, conf = int(row.cls), round(row.conf.item(), decimals)
-            box = (row.xyxyxyxy if is_obb else row.xyxy).squeeze().reshape(-1, 2).tolist()
+        data = data.cpu()  # one host transfer, then plain Python values instead of a Boxes object per row
+        boxes = (data.xyxyxyxy if is_obb else data.xyxy).reshape(-1, 4 if is_obb else 2, 2).tolist()
+        track_ids = data.id.tolist() if data.is_track else None
+        categories = self.categories.cpu().data.tolist() if self.categories is not None else None
+        for i, (box, class_id, conf) in enumerate(zip(boxes, data.cls.tolist(), data.conf.tolist())):
+            class_id, conf = int(class_id), round(conf, decimals)
             xy = {}
             for j, b in enumerate(box):
                 xy[f"x{j + 1}"] = round(b[0] / w, decimals)
                 xy[f"y{j + 1}"] = round(b[1] / h, decimals)
             result = {"name": self.names[class_id], "class": class_id, "confidence": conf, "box": xy}
-            if data.is_track:
-                result["track_id"] = int(row.id.item())  # track ID
+            if categories is not None:
+                category_conf, category_id = categories[i][0], int(categories[i][1])
+                result["category"] = category_id
+                result["category_name"] = self.category_names.get(category_id) if self.category_names else None
+                result["category_confidence"] = round(category_conf, decimals)
+            if track_ids is not None:
+                result["track_id"] = int(track_ids[i])  # track ID
             if self.masks:
                 result["segments"] = {
                     "x": (self.masks.xy[i][:, 0] / w).round(decimals).tolist(),
@@ -1001,6 +1033,307 @@ class Results(SimpleClass):
         LOGGER.info(f"✅ Detection results successfully written to SQL table '{table_name}' in database '{db_path}'.")
 
 
+def _join_rows(arrays):
+    """
+    Join 2D tensors or arrays along rows, without copying when they are consecutive row blocks of the same memory.
+
+    The per-image predictions of a batch are split from one tensor by NMS, so joining them back is usually a view.
+
+    Args:
+        arrays (List[torch.Tensor | np.ndarray]): Non-empty list of 2D tensors or arrays with the same columns.
+
+    Returns:
+        (torch.Tensor | np.ndarray): The rows of all inputs in order.
+    """
+    if isinstance(arrays[0], np.ndarray):
+        return np.concatenate(arrays)
+    t = arrays[0]
+    if all(x.stride() == t.stride() and x.dtype == t.dtype and x.device == t.device for x in arrays):
+        n = [len(x) for x in arrays]
+        step = t.stride(0) * t.element_size()
+        if all(x.data_ptr() == t.data_ptr() + s * step for x, s in zip(arrays, np.cumsum([0] + n[:-1]).tolist())):
+            try:
+                return t.as_strided((sum(n), t.shape[1]), t.stride())
+            except RuntimeError:  # adjacent but separate allocations
+                pass
+    return torch.cat(arrays)
+
+
+def _insert_column(x, i, value):
+    """Return a tensor or array with a column filled with value inserted before column i."""
+    if isinstance(x, torch.Tensor):
+        return torch.cat((x[:, :i], x.new_full((len(x), 1), value), x[:, i:]), 1)
+    return np.insert(x, i, value, axis=1)
+
+
+def _join_columns(a, b):
+    """Return tensors or arrays a and b joined along columns."""
+    return torch.cat((a, b), 1) if isinstance(a, torch.Tensor) else np.concatenate((a, b), 1)
+
+
+class BatchResults(SimpleClass):
+    """
+    Detection results of a batch of images held in one tensor, with the row offsets of each image.
+
+    The boxes of all images are joined into a single tensor in Boxes layout, which is a view of the predictions when the
+    per-image boxes are consecutive slices of one tensor, as returned by batched NMS. The whole batch is transferred to
+    host memory once, on first access of a column, and derived coordinate formats are computed with array operations
+    and cached. Exports build columns for all boxes at once, without a Python object per box.
+
+    Attributes:
+        data (torch.Tensor | np.ndarray): Boxes of all images, rows of (x1, y1, x2, y2, [track_id], conf, cls).
+        categories (torch.Tensor | np.ndarray | None): (category confidence, category) of each box, if available.
+        offsets (np.ndarray): Row offsets of the images into data, of length num_images + 1.
+        orig_shapes (np.ndarray): Original (height, width) of each image.
+        paths (List[str]): Paths of the images.
+        names (Dict[int, str]): Dictionary mapping class IDs to class names.
+        category_names (Dict[int, str] | None): Dictionary mapping big category IDs to names.
+        is_track (bool): Whether the boxes include track IDs, -1 for boxes of images without tracks.
+
+    Methods:
+        to_columns: Returns a dictionary of NumPy columns with one row per box.
+        to_arrow: Returns a pyarrow Table with one row per box.
+        to_parquet: Writes the boxes to a Parquet file.
+        to_json: Returns the boxes of the batch as column-oriented JSON.
+
+    Examples:
+        >>> results = model(["image1.jpg", "image2.jpg"])
+        >>> batch = BatchResults(results)
+        >>> batch.xywhn  # (N, 4) normalized boxes of all images
+        >>> batch[1]  # (n, 6) boxes of the second image
+        >>> batch.to_parquet("detections.parquet")
+    """
+
+    def __init__(self, results):
+        """
+        Initialize BatchResults from the Results of a batch of images.
+
+        Args:
+            results (List[Results]): Detection results with boxes, e.g. the output of one predict call.
+
+        Raises:
+            ValueError: If a result has no boxes, e.g. for classification.
+
+        Examples:
+            >>> batch = BatchResults(model(["image1.jpg", "image2.jpg"]))
+            >>> print(batch.counts)
+        """
+        if any(r.boxes is None for r in results):
+            raise ValueError("BatchResults requires detection results with boxes.")
+        boxes = [r.boxes for r in results]
+        self.paths = [r.path for r in results]
+        self.orig_shapes = np.array([r.orig_shape for r in results], dtype=np.int64).reshape(-1, 2)
+        self.names = results[0].names if results else {}
+        self.category_names = results[0].category_names if results else None
+        self.offsets = np.cumsum([0] + [len(b) for b in boxes], dtype=np.int64)
+        self.is_track = any(b.is_track for b in boxes)
+
+        data = [b.data for b in boxes]
+        if self.is_track:  # track_id -1 for images without tracks
+            data = [d if b.is_track else _insert_column(d, 4, -1) for d, b in zip(data, boxes)]
+        self.data = _join_rows(data) if data else torch.zeros((0, 6))
+        categories = [r.categories for r in results]
+        has_categories = data and all(c is not None for c in categories)
+        self.categories = _join_rows([c.data for c in categories]) if has_categories else None
+        self._cache = {}
+
+    def __len__(self):
+        """Return the number of images in the batch."""
+        return len(self.paths)
+
+    def __getitem__(self, idx):
+        """
+        Return the host boxes of one image as a view of the batch array.
+
+        Args:
+            idx (int): Image index.
+
+        Returns:
+            (np.ndarray): Array of shape (n, 6 or 7) in Boxes layout (x1, y1, x2, y2, [track_id], conf, cls).
+        """
+        return self._host()[self.offsets[idx] : self.offsets[idx + 1], : self.data.shape[1]]
+
+    def _cached(self, key, fn):
+        """Return the cached value of key, computing it with fn on first access."""
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def _host(self):
+        """Return boxes and categories of the batch as one host array, transferred from the device once."""
+
+        def transfer():
+            x = self.data if self.categories is None else _join_columns(self.data, self.categories)
+            return x.cpu().numpy() if isinstance(x, torch.Tensor) else np.asarray(x)
+
+        return self._cached("host", transfer)
+
+    @property
+    def counts(self):
+        """Return the number of boxes of each image as a NumPy array."""
+        return np.diff(self.offsets)
+
+    @property
+    def image_index(self):
+        """Return the image index of each box as a NumPy array."""
+        return self._cached("image_index", lambda: np.repeat(np.arange(len(self)), self.counts))
+
+    @property
+    def xyxy(self):
+        """Return boxes in [x1, y1, x2, y2] format as an (N, 4) NumPy array."""
+        return self._host()[:, :4]
+
+    @property
+    def conf(self):
+        """Return the confidence of each box as a NumPy array."""
+        return self._host()[:, self.data.shape[1] - 2]
+
+    @property
+    def cls(self):
+        """Return the class ID of each box as a NumPy array."""
+        return self._host()[:, self.data.shape[1] - 1]
+
+    @property
+    def id(self):
+        """Return the track ID of each box as a NumPy array, or None without tracking."""
+        return self._host()[:, 4] if self.is_track else None
+
+    @property
+    def category(self):
+        """Return the big category of each box as a NumPy array, or None without categories."""
+        return self._host()[:, -1] if self.categories is not None else None
+
+    @property
+    def category_conf(self):
+        """Return the fused big category confidence of each box as a NumPy array, or None without categories."""
+        return self._host()[:, -2] if self.categories is not None else None
+
+    @property
+    def xywh(self):
+        """Return boxes in [x_center, y_center, width, height] format as an (N, 4) NumPy array."""
+        return self._cached("xywh", lambda: ops.xyxy2xywh(self.xyxy))
+
+    @property
+    def xyxyn(self):
+        """Return boxes in [x1, y1, x2, y2] format normalized by the original image sizes as an (N, 4) NumPy array."""
+        return self._cached("xyxyn", lambda: self.xyxy / self._scale())
+
+    @property
+    def xywhn(self):
+        """Return boxes in [x, y, width, height] format normalized by the original image sizes as an (N, 4) array."""
+        return self._cached("xywhn", lambda: self.xywh / self._scale())
+
+    def _scale(self):
+        """Return the (width, height, width, height) of the original image of each box."""
+        scale = self.orig_shapes[:, [1, 0, 1, 0]].astype(self.xyxy.dtype)
+        return self._cached("scale", lambda: np.repeat(scale, self.counts, 0))
+
+    def to_columns(self, normalize=False):
+        """
+        Return the boxes of the batch as a dictionary of 1D NumPy columns with one row per box.
+
+        Args:
+            normalize (bool): Whether to normalize the box coordinates by the original image dimensions.
+
+        Returns:
+            (Dict[str, np.ndarray]): Columns 'image', 'class', 'name', 'confidence', 'x1', 'y1', 'x2', 'y2', and
+                'track_id' when tracking, 'category' and 'category_confidence' with big categories.
+
+        Examples:
+            >>> columns = BatchResults(results).to_columns(normalize=True)
+            >>> columns["x1"][columns["image"] == 0]  # x1 of the boxes of the first image
+        """
+        xyxy = self.xyxyn if normalize else self.xyxy
+        cls = self.cls.astype(np.int64)
+        names = np.array([self.names.get(i, str(i)) for i in range(max(self.names, default=-1) + 1)] or [""])
+        columns = {
+            "image": self.image_index,
+            "class": cls,
+            "name": names[cls],
+            "confidence": self.conf,
+            **{k: xyxy[:, i] for i, k in enumerate(("x1", "y1", "x2", "y2"))},
+        }
+        if self.is_track:
+            columns["track_id"] = self.id.astype(np.int64)
+        if self.categories is not None:
+            columns["category"] = self.category.astype(np.int64)
+            columns["category_confidence"] = self.category_conf
+        return columns
+
+    def to_arrow(self, normalize=False):
+        """
+        Return the boxes of the batch as a pyarrow Table with one row per box.
+
+        Image paths and class names are dictionary-encoded columns, so each string is stored once.
+
+        Args:
+            normalize (bool): Whether to normalize the box coordinates by the original image dimensions.
+
+        Returns:
+            (pyarrow.Table): Table with a 'path' column and the columns of `to_columns`.
+
+        Examples:
+            >>> table = BatchResults(results).to_arrow()
+            >>> table.to_pandas()
+        """
+        check_requirements("pyarrow")
+        import pyarrow as pa  # scope for faster 'import ultralytics'
+
+        columns = self.to_columns(normalize=normalize)
+        names = [self.names.get(i, str(i)) for i in range(max(self.names, default=-1) + 1)]
+        columns["name"] = pa.DictionaryArray.from_arrays(columns["class"].astype(np.int32), names)
+        path = pa.DictionaryArray.from_arrays(columns["image"].astype(np.int32), [str(p) for p in self.paths])
+        return pa.table({"path": path, **columns})
+
+    def to_parquet(self, file, normalize=False, **kwargs):
+        """
+        Write the boxes of the batch to a Parquet file with one row per box.
+
+        Args:
+            file (str | Path): Output file path.
+            normalize (bool): Whether to normalize the box coordinates by the original image dimensions.
+            **kwargs (Any): Additional keyword arguments passed to pyarrow.parquet.write_table().
+
+        Examples:
+            >>> BatchResults(results).to_parquet("detections.parquet")
+        """
+        table = self.to_arrow(normalize=normalize)
+        import pyarrow.parquet as pq  # scope for faster 'import ultralytics'
+
+        pq.write_table(table, str(file), **kwargs)
+
+    def to_json(self, normalize=False, decimals=5):
+        """
+        Return the boxes of the batch as column-oriented JSON.
+
+        Args:
+            normalize (bool): Whether to normalize the box coordinates by the original image dimensions.
+            decimals (int): Number of decimal places to round the output values to.
+
+        Returns:
+            (str): A JSON object with the image 'paths', 'orig_shapes' and row 'offsets', the class 'names', and a
+                'boxes' object of columns as in `to_columns` (without the repeated 'name' column).
+
+        Examples:
+            >>> data = json.loads(BatchResults(results).to_json())
+            >>> data["boxes"]["confidence"][data["offsets"][1] : data["offsets"][2]]  # second image
+        """
+        import json
+
+        columns = self.to_columns(normalize=normalize)
+        columns.pop("name")
+        boxes = {k: (v.round(decimals) if v.dtype.kind == "f" else v).tolist() for k, v in columns.items()}
+        return json.dumps(
+            {
+                "paths": [str(p) for p in self.paths],
+                "orig_shapes": self.orig_shapes.tolist(),
+                "offsets": self.offsets.tolist(),
+                "names": self.names,
+                "boxes": boxes,
+            }
+        )
+
+
 class Boxes(BaseTensor):
     """
     A class for managing and manipulating detection boxes.
@@ -1804,3 +2137,46 @@ class OBB(BaseTensor):
             if isinstance(x, torch.Tensor)
             else np.stack([x.min(1), y.min(1), x.max(1), y.max(1)], -1)
         )
+
+
+class Categories(BaseTensor):
+    """
+    A class for storing the big category of each detection in a two-level (category → class) taxonomy.
+
+    Rows are aligned with the detection boxes, so indexing, device moves and numpy conversion of a Results object keep
+    both levels together.
+
+    Attributes:
+        data (torch.Tensor | numpy.ndarray): Tensor of shape (N, 2) with (category confidence, category) per detection.
+        orig_shape (Tuple[int, int]): Original image size in (height, width) format.
+        conf (torch.Tensor | numpy.ndarray): Fused category confidences, the summed scores of the member classes.
+        cls (torch.Tensor | numpy.ndarray): Category indices, -1 for classes that belong to no category.
+
+    Examples:
+        >>> results = model("path/to/image.jpg", category_nms=True, data="lajifenlei.yaml")
+        >>> for result in results:
+        ...     print(result.categories.cls, result.category_names)
+    """
+
+    def __init__(self, categories, orig_shape) -> None:
+        """
+        Initialize the Categories class with per-detection category data.
+
+        Args:
+            categories (torch.Tensor | np.ndarray): Tensor of shape (N, 2) with (category confidence, category).
+            orig_shape (Tuple[int, int]): Original image size in (height, width) format.
+        """
+        if categories.ndim == 1:
+            categories = categories[None, :]
+        assert categories.shape[-1] == 2, f"expected 2 values but got {categories.shape[-1]}"  # conf, cls
+        super().__init__(categories, orig_shape)
+
+    @property
+    def conf(self):
+        """Returns the fused confidence of each detection's category."""
+        return self.data[:, 0]
+
+    @property
+    def cls(self):
+        """Returns the category index of each detection."""
+        return self.data[:, 1]
@@ -2,7 +2,8 @@
 
 from ultralytics.engine.predictor import BasePredictor
 from ultralytics.engine.results import Results
-from ultralytics.utils import ops
+from ultralytics.utils import LOGGER, ops, yaml_load
+from ultralytics.utils.checks import check_yaml
 
 
 class DetectionPredictor(BasePredictor):
@@ -20,8 +21,33 @@ class DetectionPredictor(BasePredictor):
         ```
     """
 
+    def category_groups(self):
+        """
+        Returns the big category of each class and the category names for `category_nms`, or (None, None).
+
+        The mapping is read once from the 'big_category_mapping' and 'big_category_names' fields of the data yaml
+        (`data` argument, or the dataset the model was trained on). End2end models skip NMS and get (None, None).
+        """
+        key = self.args.category_nms and self.args.task == "detect", self.args.data
+        if getattr(self, "_category_key", None) != key:  # args may change between calls on a reused predictor
+            self._category_key, self._category_groups = key, (None, None)
+            if key[0] and getattr(self.model, "end2end", False):  # NMS-free models output one class per box
+                LOGGER.warning("WARNING ⚠️ category_nms=True is not supported by end2end models, ignoring it.")
+            elif key[0]:
+                try:
+                    data = yaml_load(check_yaml(self.args.data))
+                    mapping = data["big_category_mapping"]
+                except Exception as e:
+                    LOGGER.warning(f"WARNING ⚠️ category_nms=True needs 'big_category_mapping' in data yaml: {e}")
+                else:
+                    groups = [int(mapping.get(i, -1)) for i in range(len(self.model.names))]
+                    names = data.get("big_category_names") or {g: str(g) for g in set(groups) if g >= 0}
+                    self._category_groups = groups, {int(k): v for k, v in names.items()}
+        return self._category_groups
+
     def postprocess(self, preds, img, orig_imgs, **kwargs):
         """Post-processes predictions and returns a list of Results objects."""
+        groups, _ = self.category_groups()
         preds = ops.non_max_suppression(
             preds,
             self.args.conf,
@@ -32,6 +58,7 @@ class DetectionPredictor(BasePredictor):
             nc=len(self.model.names),
             end2end=getattr(self.model, "end2end", False),
             rotated=self.args.task == "obb",
+            groups=groups,
         )
 
         if not isinstance(orig_imgs, list):  # input images are a torch.Tensor, not a list
@@ -70,4 +97,14 @@ class DetectionPredictor(BasePredictor):
             (Results): The result object containing the original image, image path, class names, and bounding boxes.
         """
         pred[:, :4] = ops.scale_boxes(img.shape[2:], pred[:, :4], orig_img.shape)
+        groups, category_names = self.category_groups()
+        if groups is not None and pred.shape[1] > 6:  # two-level results, end2end outputs have no category columns
+            return Results(
+                orig_img,
+                path=img_path,
+                names=self.model.names,
+                boxes=pred[:, :6],
+                categories=pred[:, 6:8],
+                category_names=category_names,
+            )
         return Results(orig_img, path=img_path, names=self.model.names, boxes=pred[:, :6])
@@ -55,8 +55,11 @@ class DetectionTrainer(BaseTrainer):
         return build_dataloader(dataset, batch_size, workers, shuffle, rank)  # return dataloader
 
     def preprocess_batch(self, batch):
-        """Preprocesses a batch of images by scaling and converting to float."""
+        """Preprocesses a batch of images by scaling, converting to float and applying batch-level augmentation."""
         batch["img"] = batch["img"].to(self.device, non_blocking=True).float() / 255
+        batch_transforms = getattr(self.train_loader.dataset, "batch_transforms", None)
+        if batch_transforms is not None:
+            batch = batch_transforms(batch)
         if self.args.multi_scale:
             imgs = batch["img"]
             sz = (
@@ -194,6 +194,7 @@ def non_max_suppression(
     in_place=True,
     rotated=False,
     end2end=False,
+    groups=None,
 ):
     """
     Perform non-maximum suppression (NMS) on a set of boxes, with support for masks and multiple labels per box.
@@ -215,17 +216,31 @@ def non_max_suppression(
             output by a dataloader, with each label being a tuple of (class_index, x1, y1, x2, y2).
         max_det (int): The maximum number of boxes to keep after NMS.
         nc (int, optional): The number of classes output by the model. Any indices after this will be considered masks.
-        max_time_img (float): The maximum time (seconds) for processing one image.
-        max_nms (int): The maximum number of boxes into torchvision.ops.nms().
+        max_time_img (float): The expected maximum time (seconds) for processing one image. Exceeding the resulting
+            batch time limit only logs a warning, all images are still processed.
+        max_nms (int): The maximum number of boxes per image into torchvision.ops.nms(), the most confident ones.
         max_wh (int): The maximum box width and height in pixels.
         in_place (bool): If True, the input prediction tensor will be modified in place.
         rotated (bool): If Oriented Bounding Boxes (OBB) are being passed for NMS.
         end2end (bool): If the model doesn't require NMS.
+        groups (torch.Tensor | List[int], optional): Category (group) index of each class, -1 for classes that belong
+            to no category, e.g. the 4 big categories of a 40-class dataset. If given, class scores are summed into
+            fused category scores, each box takes its best category and the best class within that category (one label
+            per box, multi_label is ignored), and NMS runs class-agnostic within each category so duplicate
+            fine-grained boxes on the same object are suppressed. Classes without a category keep per-class NMS.
+            conf_thres applies to the best class score of a box over all classes, before its category is chosen, so
+            the kept class may score below conf_thres when its category wins on the fused score.
+
+    Note:
+        Candidate filtering, class selection and top-k run on the whole batch at once. Boxes are offset by class and
+        image so that a single NMS call handles the batch; large batches on CPU, where the NMS kernel is quadratic in
+        the number of boxes, and rotated boxes run the kernel once per image instead.
 
     Returns:
         (List[torch.Tensor]): A list of length batch_size, where each element is a tensor of
             shape (num_boxes, 6 + num_masks) containing the kept boxes, with columns
-            (x1, y1, x2, y2, confidence, class, mask1, mask2, ...).
+            (x1, y1, x2, y2, confidence, class, mask1, mask2, ...). With groups, two columns
+            (category confidence, category) are appended, category -1 for classes without one.
     """
     import torchvision  # scope for faster 'import ultralytics'
 
@@ -253,6 +268,15 @@ def non_max_suppression(
     # min_wh = 2  # (pixels) minimum box width and height
     time_limit = 2.0 + max_time_img * bs  # seconds to quit after
     multi_label &= nc > 1  # multiple labels per box (adds 0.5ms/img)
+    if groups is not None:
+        groups = torch.as_tensor(groups, device=prediction.device).long()
+        ng = int(groups.max()) + 1  # number of categories
+        # classes without a category get a category of their own, so NMS among them stays per-class
+        lone = groups < 0
+        gid = groups.clone()
+        gid[lone] = ng + torch.arange(int(lone.sum()), device=groups.device)
+        ng += int(lone.sum())
+        multi_label = False
 
     prediction = prediction.transpose(-1, -2)  # shape(1,84,6300) to shape(1,6300,84)
     if not rotated:
@@ -262,74 +286,93 @@ def non_max_suppression(
             prediction = torch.cat((xywh2xyxy(prediction[..., :4]), prediction[..., 4:]), dim=-1)  # xywh to xyxy
 
     t = time.time()
-    output = [torch.zeros((0, 6 + nm), device=prediction.device)] * bs
-    for xi, x in enumerate(prediction):  # image index, image inference
-        # Apply constraints
-        # x[((x[:, 2:4] < min_wh) | (x[:, 2:4] > max_wh)).any(1), 4] = 0  # width-height
-        x = x[xc[xi]]  # confidence
-
-        # Cat apriori labels if autolabelling
-        if labels and len(labels[xi]) and not rotated:
-            lb = labels[xi]
+    b, a = xc.nonzero(as_tuple=True)  # image index and anchor index of every candidate in the batch
+    x = prediction[b, a]
+
+    # Cat apriori labels if autolabelling
+    if labels and not rotated:
+        n = torch.tensor([len(lb) for lb in labels], device=x.device)
+        if n.sum():
+            lb = torch.cat([lb for lb in labels if len(lb)]).to(x.device)
             v = torch.zeros((len(lb), nc + nm + 4), device=x.device)
             v[:, :4] = xywh2xyxy(lb[:, 1:5])  # box
             v[range(len(lb)), lb[:, 0].long() + 4] = 1.0  # cls
             x = torch.cat((x, v), 0)
-
-        # If none remain process next image
-        if not x.shape[0]:
-            continue
-
-        # Detections matrix nx6 (xyxy, conf, cls)
-        box, cls, mask = x.split((4, nc, nm), 1)
-
-        if multi_label:
-            i, j = torch.where(cls > conf_thres)
-            x = torch.cat((box[i], x[i, 4 + j, None], j[:, None].float(), mask[i]), 1)
-        else:  # best class only
-            conf, j = cls.max(1, keepdim=True)
-            x = torch.cat((box, conf, j.float(), mask), 1)[conf.view(-1) > conf_thres]
-
-        # Filter by class
-        if classes is not None:
-            x = x[(x[:, 5:6] == classes).any(1)]
-
-        # Check shape
-        n = x.shape[0]  # number of boxes
-        if not n:  # no boxes
-            continue
-        if n > max_nms:  # excess boxes
-            x = x[x[:, 4].argsort(descending=True)[:max_nms]]  # sort by confidence and remove excess boxes
-
-        # Batched NMS
-        c = x[:, 5:6] * (0 if agnostic else max_wh)  # classes
+            b = torch.cat((b, torch.arange(len(labels), device=x.device).repeat_interleave(n)))
+
+    # Detections matrix nx6 (xyxy, conf, cls)
+    box, cls, mask = x.split((4, nc, nm), 1)
+    if groups is not None:  # best category by fused score, then best class within it
+        # candidates already passed conf_thres on their best class in any category (xc), the chosen category may not
+        gconf = cls.new_zeros(cls.shape[0], ng).index_add_(1, gid, cls).clamp_(max=1.0)
+        gconf, g = gconf.max(1, keepdim=True)
+        conf, j = cls.masked_fill(gid != g, -1.0).max(1, keepdim=True)
+        g = torch.where(lone[j], -1, g)
+        x = torch.cat((box, conf, j.float(), mask, gconf, g.float()), 1)
+    elif multi_label:
+        i, j = torch.where(cls > conf_thres)
+        x, b = torch.cat((box[i], x[i, 4 + j, None], j[:, None].float(), mask[i]), 1), b[i]
+    else:  # best class only
+        conf, j = cls.max(1, keepdim=True)
+        keep = conf.view(-1) > conf_thres
+        x, b = torch.cat((box, conf, j.float(), mask), 1)[keep], b[keep]
+
+    # Filter by class
+    if classes is not None:
+        keep = (x[:, 5:6] == classes).any(1)
+        x, b = x[keep], b[keep]
+
+    def first(b, k):
+        """Mask of the first k rows of each image, for rows grouped by image index b."""
+        counts = torch.bincount(b, minlength=bs)
+        return torch.arange(len(b), device=b.device) - (counts.cumsum(0) - counts)[b] < k
+
+    if len(x):
+        # Group by image with descending confidence inside each image, then keep the max_nms most confident per image
+        n = len(x)
+        rank = torch.unique(-x[:, 4], sorted=True, return_inverse=True)[1]  # confidence rank, highest first
+        i = ((b * n + rank) * n + torch.arange(n, device=b.device)).argsort()  # unique keys keep ties in anchor order
+        x, b = x[i], b[i]
+        i = first(b, max_nms)
+        x, b = x[i], b[i]
+
+        # Batched NMS, boxes offset by class (or category)
+        if groups is not None:  # offset by category instead of class
+            c = gid[x[:, 5].long(), None] * (0 if agnostic else max_wh)
+        else:
+            c = x[:, 5:6] * (0 if agnostic else max_wh)  # classes
         scores = x[:, 4]  # scores
-        if rotated:
-            boxes = torch.cat((x[:, :2] + c, x[:, 2:4], x[:, -1:]), dim=-1)  # xywhr
-            i = nms_rotated(boxes, scores, iou_thres)
+        # the NMS kernel is quadratic in the number of boxes, so small batches (or accelerators) run a single call over
+        # the whole batch with images also offset along y, larger ones run it per image on the contiguous slices
+        if not rotated and len(x) <= (1000 if x.device.type == "cpu" else 20000):
+            dtype = torch.float32 if x.device.type == "mps" else torch.float64  # keep precision under large offsets
+            offset = torch.cat((c, b[:, None] * max_wh), 1).to(dtype)
+            boxes = x[:, :4].to(dtype) + offset.repeat(1, 2)  # boxes (offset by class and image)
+            i = torchvision.ops.nms(boxes, scores.to(dtype), iou_thres)  # NMS
+            i = i[(b[i] * len(i) + torch.arange(len(i), device=i.device)).argsort()]  # regroup by image
         else:
-            boxes = x[:, :4] + c  # boxes (offset by class)
-            i = torchvision.ops.nms(boxes, scores, iou_thres)  # NMS
-        i = i[:max_det]  # limit detections
-
-        # # Experimental
-        # merge = False  # use merge-NMS
-        # if merge and (1 < n < 3E3):  # Merge NMS (boxes merged using weighted mean)
-        #     # Update boxes as boxes(i,4) = weights(i,n) * boxes(n,4)
-        #     from .metrics import box_iou
-        #     iou = box_iou(boxes[i], boxes) > iou_thres  # IoU matrix
-        #     weights = iou * scores[None]  # box weights
-        #     x[i, :4] = torch.mm(weights, x[:, :4]).float() / weights.sum(1, keepdim=True)  # merged boxes
-        #     redundant = True  # require redundant detections
-        #     if redundant:
-        #         i = i[iou.sum(1) > 1]  # require redundancy
-
-        output[xi] = x[i]
-        if (time.time() - t) > time_limit:
-            LOGGER.warning(f"WARNING ⚠️ NMS time limit {time_limit:.3f}s exceeded")
-            break  # time limit exceeded
-
-    return output
+            if rotated:
+                boxes = torch.cat((x[:, :2] + c, x[:, 2:4], x[:, -1:]), dim=-1)  # xywhr
+            else:
+                boxes = x[:, :4] + c  # boxes (offset by class)
+            i, start = [], 0
+            for n in torch.bincount(b, minlength=bs).tolist():
+                if n:
+                    s = slice(start, start + n)
+                    k = nms_rotated(boxes[s], scores[s], iou_thres) if rotated else torchvision.ops.nms(
+                        boxes[s], scores[s], iou_thres
+                    )
+                    i.append(k[:max_det] + start)
+                    start += n
+            i = torch.cat(i)
+        x, b = x[i], b[i]
+        i = first(b, max_det)  # limit detections
+        x, b = x[i], b[i]
+
+    if (time.time() - t) > time_limit:
+        LOGGER.warning(f"WARNING ⚠️ NMS time limit {time_limit:.3f}s exceeded, results are complete but slow")
+
+    return list(x.split(torch.bincount(b, minlength=bs).tolist()))
 
 
 def clip_boxes(boxes, shape):
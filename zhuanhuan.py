@@ -1,37 +1,45 @@
 import os
+import json
+import hashlib
 import xml.etree.ElementTree as ET
-from collections import defaultdict
-
-
-def parse_xml(xml_path):
-    """解析单个XML文件，返回图片信息和目标列表"""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
-    # 获取图片基本信息
-    size = root.find('size')
-    width = float(size.find('width').text)  # 改为浮点数
-    height = float(size.find('height').text)  # 改为浮点数
-    filename = root.find('filename').text
-
-    # 解析目标框（支持浮点数）
-    objects = []
-    for obj in root.iter('object'):
-        cls = obj.find('name').text
-        bbox = obj.find('bndbox')
-        # 将坐标转换为浮点数
-        xmin = float(bbox.find('xmin').text)
-        ymin = float(bbox.find('ymin').text)
-        xmax = float(bbox.find('xmax').text)
-        ymax = float(bbox.find('ymax').text)
-        objects.append({'class': cls, 'bbox': (xmin, ymin, xmax, ymax)})
-
-    return {
-        'filename': filename,
-        'width': width,
-        'height': height,
-        'objects': objects
-    }
+from io import BytesIO
+from multiprocessing import Pool
+from pathlib import Path
+
+from ultralytics.utils import NUM_THREADS, TQDM
+
+MANIFEST_NAME = ".convert_manifest.json"  # 保存在输出目录，记录每个XML的mtime/大小/哈希和解析结果
+MANIFEST_VERSION = 1
+
+
+def parse_xml(xml_path, data=None):
+    """流式解析单个XML文件（iterparse逐个元素处理，不构建完整树），返回图片信息和目标列表"""
+    if data is None:
+        with open(xml_path, 'rb') as f:
+            data = f.read()
+
+    info = {'filename': None, 'width': 0.0, 'height': 0.0, 'objects': []}
+    depth = 0  # 当前元素的层级，根元素annotation为0
+    for event, elem in ET.iterparse(BytesIO(data), events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            continue
+        depth -= 1
+        tag = elem.tag
+        if tag == 'object':
+            # 只读取object的直接子元素，<part>、<attributes>等嵌套的name/bndbox不会覆盖目标本身的值
+            bndbox = elem.find('bndbox')
+            # 将坐标转换为浮点数
+            bbox = tuple(float(bndbox.find(k).text) for k in ('xmin', 'ymin', 'xmax', 'ymax'))
+            info['objects'].append({'class': elem.find('name').text, 'bbox': bbox})
+        elif tag == 'size' and depth == 1:
+            info['width'] = float(elem.find('width').text)  # 改为浮点数
+            info['height'] = float(elem.find('height').text)  # 改为浮点数
+        elif tag == 'filename' and depth == 1:
+            info['filename'] = elem.text
+        if depth == 1:
+            elem.clear()  # 子元素在其所属的顶层元素（object、size等）处理完后才释放
+    return info
 
 
 def convert_bbox_to_yolo(bbox, width, height):
@@ -45,62 +53,153 @@ def convert_bbox_to_yolo(bbox, width, height):
     return [x_center, y_center, bbox_width, bbox_height]
 
 
-def generate_class_map(xml_dir):
-    """从XML文件中提取所有类别生成映射字典"""
-    class_counter = defaultdict(int)
-    for xml_file in os.listdir(xml_dir):
-        if not xml_file.endswith('.xml'):
+def _convert_one(args):
+    """
+    进程池任务：读取并解析一个XML，返回 (文件名, 记录)。
+    old_sha1与当前内容一致时（只是mtime变了）返回记录None，表示无需重新转换。
+    记录中的boxes为 [类别名, x_center, y_center, w, h]，与ultralytics/data/converter.py一致，
+    跳过宽或高不大于0的框并去除重复框。
+    """
+    xml_path, old_sha1 = args
+    with open(xml_path, 'rb') as f:
+        data = f.read()
+    sha1 = hashlib.sha1(data).hexdigest()
+    st = os.stat(xml_path)
+    stat = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': sha1}
+    if sha1 == old_sha1:
+        return os.path.basename(xml_path), None, stat
+
+    try:
+        info = parse_xml(xml_path, data)
+    except (ET.ParseError, AttributeError, KeyError, TypeError, ValueError) as e:
+        return os.path.basename(xml_path), {'error': f"{type(e).__name__}: {e}"}, stat
+
+    boxes, skipped = [], 0
+    for obj in info['objects']:
+        box = []
+        if info['width'] and info['height']:
+            box = convert_bbox_to_yolo(obj['bbox'], info['width'], info['height'])
+        if not box or box[2] <= 0 or box[3] <= 0:
+            skipped += 1
             continue
-        xml_path = os.path.join(xml_dir, xml_file)
-        data = parse_xml(xml_path)
-        for obj in data['objects']:
-            class_counter[obj['class']] += 1
+        box = [obj['class']] + box
+        if box not in boxes:
+            boxes.append(box)
+    return os.path.basename(xml_path), {'boxes': boxes, 'skipped': skipped}, stat
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'classes': [], 'files': {}}
 
+
+def generate_class_map(xml_dir):
+    """从XML文件中提取所有类别生成映射字典（单独调用时使用；convert_xml_to_yolo在转换的同一遍中生成）"""
+    xml_files = sorted(str(p) for p in Path(xml_dir).glob('*.xml'))
+    with Pool(NUM_THREADS) as pool:
+        records = pool.imap_unordered(_convert_one, [(p, None) for p in xml_files], chunksize=64)
+        boxes = (box for _, record, _ in records if record and 'boxes' in record for box in record['boxes'])
+        classes = sorted({box[0] for box in boxes})
     # 按字母顺序生成类别ID
-    classes = sorted(class_counter.keys())
     class_id_map = {cls: idx for idx, cls in enumerate(classes)}
     return class_id_map, classes
 
 
-def convert_xml_to_yolo(xml_dir, output_dir, class_map=None):
-    """批量转换XML文件为YOLO格式（支持浮点数）"""
-    os.makedirs(output_dir, exist_ok=True)
-
+def convert_xml_to_yolo(xml_dir, output_dir, class_map=None, workers=NUM_THREADS):
+    """
+    批量转换XML文件为YOLO格式（支持浮点数）。
+
+    每个XML只在进程池中解析一次，类别映射和标签在同一遍中得到；输出目录下的清单文件记录每个XML的
+    mtime、大小、SHA1和解析结果，再次运行时只重新解析变化过的文件。类别集合变化（类别ID随之改变）时，
+    未变化的文件直接用清单中的结果重写标签，不再解析；已删除的XML对应的标签文件一并删除。
+    """
+    xml_dir, output_dir = Path(xml_dir), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = _load_manifest(manifest_path)
+    old_files = manifest['files']
+
+    # 1. 按mtime和大小找出可能变化的文件；mtime变了但大小相同的文件由哈希最终确认
+    current, tasks = {}, []
+    for entry in os.scandir(xml_dir):
+        if not entry.name.endswith('.xml'):
+            continue
+        st = entry.stat()
+        old = old_files.get(entry.name)
+        label_exists = (output_dir / (os.path.splitext(entry.name)[0] + '.txt')).exists()
+        if old and label_exists and old['mtime_ns'] == st.st_mtime_ns and old['size'] == st.st_size:
+            current[entry.name] = old
+            continue
+        old_sha1 = old['sha1'] if old and label_exists and old['size'] == st.st_size else None
+        tasks.append((entry.path, old_sha1))
+
+    # 2. 进程池解析变化的文件
+    changed, failed = set(), set()
+    if tasks:
+        workers = max(1, min(workers, len(tasks)))
+        chunksize = min(64, max(1, len(tasks) // (workers * 4)))
+        with Pool(workers) as pool:
+            results = pool.imap_unordered(_convert_one, tasks, chunksize=chunksize)
+            for name, record, stat in TQDM(results, total=len(tasks), desc=f"解析 {xml_dir}"):
+                if record is None:
+                    current[name] = {**old_files[name], **stat}
+                    continue
+                if 'error' in record:
+                    print(f"警告：{name}解析失败，跳过（{record['error']}）")
+                    failed.add(name)
+                    continue
+                if record['skipped']:
+                    print(f"警告：{name}中有{record['skipped']}个宽或高不大于0的框，已跳过")
+                current[name] = {**stat, 'boxes': record['boxes']}
+                changed.add(name)
+
+    # 3. 类别映射：全部文件（含未变化文件的清单记录）的类别按字母顺序编号
     if not class_map:
-        class_map, classes = generate_class_map(xml_dir)
+        classes = sorted({box[0] for record in current.values() for box in record['boxes']})
+        class_map = {cls: idx for idx, cls in enumerate(classes)}
         print(f"检测到{len(classes)}个类别：{classes}")
         # 保存类别列表到文件
-        with open(os.path.join(output_dir, 'classes.txt'), 'w') as f:
+        with open(output_dir / 'classes.txt', 'w', encoding='utf-8') as f:
             f.write('\n'.join(classes))
     else:
         classes = list(class_map.keys())
+    rewrite_all = classes != manifest['classes']
 
-    for xml_file in os.listdir(xml_dir):
-        if not xml_file.endswith('.xml'):
-            continue
-        xml_path = os.path.join(xml_dir, xml_file)
-        data = parse_xml(xml_path)
-
+    # 4. 写出标签：变化的文件，或类别ID变化时的全部文件
+    missing = set()
+    for name in sorted(current if rewrite_all else changed):
         # 生成YOLO格式的标注（保留4位小数）
         yolo_lines = []
-        for obj in data['objects']:
-            cls = obj['class']
+        for cls, *box in current[name]['boxes']:
             if cls not in class_map:
-                print(f"警告：类别{cls}未在映射中，跳过该标注")
+                missing.add(cls)
                 continue
-            bbox = obj['bbox']
-            yolo_bbox = convert_bbox_to_yolo(bbox, data['width'], data['height'])
-            # 格式化输出（保留4位小数）
-            yolo_line = f"{class_map[cls]} " + " ".join([f"{v:.4f}" for v in yolo_bbox]) + "\n"
-            yolo_lines.append(yolo_line)
-
-        # 保存为TXT文件
-        txt_filename = os.path.splitext(xml_file)[0] + '.txt'
-        output_path = os.path.join(output_dir, txt_filename)
-        with open(output_path, 'w') as f:
+            yolo_lines.append(f"{class_map[cls]} " + " ".join([f"{v:.4f}" for v in box]) + "\n")
+        with open(output_dir / (os.path.splitext(name)[0] + '.txt'), 'w') as f:
             f.writelines(yolo_lines)
+    for cls in sorted(missing):
+        print(f"警告：类别{cls}未在映射中，跳过该标注")
+
+    # 5. 已删除的XML：删除对应的标签文件
+    for name in set(old_files) - set(current) - failed:
+        label_path = output_dir / (os.path.splitext(name)[0] + '.txt')
+        if label_path.exists():
+            label_path.unlink()
+
+    manifest.update({'classes': classes, 'files': current})
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
 
-    print(f"转换完成，输出路径：{output_dir}")
+    written = len(current) if rewrite_all else len(changed)
+    print(f"转换完成：共{len(current)}个文件，重新解析{len(tasks)}个，写出标签{written}个，输出路径：{output_dir}")
 
 
 if __name__ == "__main__":
@@ -109,4 +208,4 @@ if __name__ == "__main__":
     output_dir = r"D:\Study\ultralytics-main\MyDataset\labels"  # 输出YOLO标注的目录
 
     # 自动检测类别并生成映射
-    convert_xml_to_yolo(xml_dir, output_dir)
\ No newline at end of file
+    convert_xml_to_yolo(xml_dir, output_dir)
@@ -1,15 +1,105 @@
 import os
+import tempfile
+from multiprocessing import Pool
+
+import numpy as np
 from PIL import Image
+from tqdm import tqdm
+
+# 支持的图片格式（顺序即同名图片的优先级）
+IMG_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
+REPORT_LIMIT = 20  # 报告中最多列出的越界文件数
+NORM_EPS = 0.01  # 最大坐标不超过1+NORM_EPS的文件视为已归一化（如zhuanhuan.py未截断的超出图片边缘的框），超过才按像素坐标处理
+
+
+def build_image_index(images_dir):
+    """
+    一次列出图片目录，建立 标签名 → 图片路径 的索引，匹配规则与逐个探测时一致：
+    先找 {name}_original.*，再找 {name}.*，同名时按IMG_EXTENSIONS顺序优先
+    """
+    index = {}
+    priority = {}
+    for entry in os.scandir(images_dir):
+        stem, ext = os.path.splitext(entry.name)
+        if ext.lower() not in IMG_EXTENSIONS:
+            continue
+        rank = IMG_EXTENSIONS.index(ext.lower())
+        if stem.endswith('_original'):
+            stem, rank = stem[:-len('_original')], rank - len(IMG_EXTENSIONS)
+        if stem not in index or rank < priority[stem]:
+            index[stem], priority[stem] = entry.path, rank
+    return index
+
+
+def image_size(img_path):
+    """只读取文件头获得宽高（PIL的open是惰性的，不解码像素）"""
+    with Image.open(img_path) as img:
+        return img.size
 
 
-def normalize_labels(data_dir):
+def normalize_file(args):
+    """
+    进程池任务：归一化一个标签文件，返回统计信息。
+    坐标整体用NumPy数组运算；越界的框会被截断到[0, 1]并计入报告。
+    最大坐标不超过1+NORM_EPS的文件视为已归一化，不再重复除以图片尺寸；其中轻微越界的框只截断，并在报告中单独列出。
+    dry_run=True时只统计不写文件；写文件时先写临时文件再替换，不会改动硬链接指向的原始标签。
+    """
+    label_path, img_path, dry_run = args
+    stats = {'path': label_path, 'boxes': 0, 'out_of_range': 0, 'invalid': [], 'error': None, 'skipped': False,
+             'ambiguous': False}
+    try:
+        img_width, img_height = image_size(img_path)
+    except Exception as e:
+        stats['error'] = f"无法打开图片 {img_path} → {e}"
+        return stats
+
+    with open(label_path, 'r', encoding='utf-8') as f:
+        rows = [line.split() for line in f if line.strip()]
+
+    # 解析坐标（兼容整数/浮点数），无效行跳过
+    class_ids, coords = [], []
+    for parts in rows:
+        if len(parts) < 5:
+            stats['invalid'].append(' '.join(parts))
+            continue
+        try:
+            coords.append([float(v) for v in parts[1:5]])
+        except ValueError:
+            stats['invalid'].append(' '.join(parts))
+            continue
+        class_ids.append(parts[0])
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 4)
+    stats['boxes'] = len(coords)
+
+    if len(coords) and coords.max() <= 1 + NORM_EPS:  # 已是归一化坐标
+        if ((coords >= 0) & (coords <= 1)).all():
+            stats['skipped'] = True
+            return stats
+        stats['ambiguous'] = True  # 轻微越界，只截断不再除以图片尺寸
+    else:
+        # 归一化坐标（YOLO要求：x_center/y_center/w/h 相对于图片宽高，范围0-1）
+        coords /= np.array([img_width, img_height, img_width, img_height], dtype=np.float64)
+    out_of_range = ((coords < 0) | (coords > 1)).any(axis=1)
+    stats['out_of_range'] = int(out_of_range.sum())
+    np.clip(coords, 0.0, 1.0, out=coords)  # 确保坐标在合法范围
+
+    if not dry_run:
+        new_lines = [f"{c} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n" for c, (x, y, w, h) in zip(class_ids, coords.tolist())]
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(label_path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(new_lines)
+        os.replace(tmp_path, label_path)
+    return stats
+
+
+def normalize_labels(data_dir, dry_run=False, workers=None):
     """
     将标签文件从原始像素坐标转换为归一化坐标（YOLO 格式）
     :param data_dir: 数据集根目录（包含 images/ 和 labels/）
+    :param dry_run: 只输出越界框等报告，不修改文件
+    :param workers: 并行进程数，默认CPU核数
     """
-    # 支持的图片格式
-    img_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
-
+    tasks = []
     for split in ['train', 'val']:
         labels_dir = os.path.join(data_dir, 'labels', split)
         images_dir = os.path.join(data_dir, 'images', split)
@@ -22,86 +112,54 @@ def normalize_labels(data_dir):
             print(f"警告：图片目录不存在 {images_dir}")
             continue
 
-        for label_file in os.listdir(labels_dir):
-            if not label_file.endswith('.txt'):
+        index = build_image_index(images_dir)
+        for entry in os.scandir(labels_dir):
+            if not entry.name.endswith('.txt'):
                 continue
-            label_path = os.path.join(labels_dir, label_file)
-
-            # 获取标签文件名（不含后缀）
-            label_name = os.path.splitext(label_file)[0]
-
-            # 寻找匹配的图片文件（处理_original后缀、多格式）
-            img_path = None
-            # 1. 先尝试带_original的后缀
-            for ext in img_extensions:
-                candidate = os.path.join(images_dir, f"{label_name}_original{ext}")
-                if os.path.exists(candidate):
-                    img_path = candidate
-                    break
-            # 2. 再尝试原名称
-            if not img_path:
-                for ext in img_extensions:
-                    candidate = os.path.join(images_dir, f"{label_name}{ext}")
-                    if os.path.exists(candidate):
-                        img_path = candidate
-                        break
-
+            label_name = os.path.splitext(entry.name)[0]
+            img_path = index.get(label_name)
             # 图片不存在则跳过并提示
             if not img_path:
-                print(f"跳过：未找到 {label_file} 对应的图片（{images_dir}/{label_name}.*）")
+                print(f"跳过：未找到 {entry.name} 对应的图片（{images_dir}/{label_name}.*）")
                 continue
-
-            # 获取图片尺寸
-            try:
-                img = Image.open(img_path)
-                img_width, img_height = img.size
-            except Exception as e:
-                print(f"错误：无法打开图片 {img_path} → {e}")
+            tasks.append((entry.path, img_path, dry_run))
+
+    totals = {'files': 0, 'boxes': 0, 'out_of_range': 0, 'invalid': 0, 'skipped': 0, 'errors': 0}
+    offenders, ambiguous = [], []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    with Pool(workers) as pool:
+        results = pool.imap_unordered(normalize_file, tasks, chunksize=max(1, min(64, len(tasks) // (workers * 4))))
+        for stats in tqdm(results, total=len(tasks), desc="预检查" if dry_run else "归一化"):
+            if stats['error']:
+                print(f"错误：{stats['error']}")
+                totals['errors'] += 1
                 continue
-
-            # 读取并修正标签
-            with open(label_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            new_lines = []
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split()
-                if len(parts) < 5:  # 跳过无效行
-                    print(f"警告：{label_file} 中无效行 → {line}")
-                    continue
-
-                # 解析坐标（兼容整数/浮点数）
-                try:
-                    class_id = parts[0]
-                    x_center, y_center, width, height = map(float, parts[1:5])
-                except ValueError:
-                    print(f"警告：{label_file} 中坐标格式错误 → {line}")
-                    continue
-
-                # 归一化坐标（YOLO要求：x_center/y_center/w/h 相对于图片宽高，范围0-1）
-                x_center_norm = x_center / img_width
-                y_center_norm = y_center / img_height
-                width_norm = width / img_width
-                height_norm = height / img_height
-
-                # 确保坐标在合法范围
-                x_center_norm = max(0.0, min(1.0, x_center_norm))
-                y_center_norm = max(0.0, min(1.0, y_center_norm))
-                width_norm = max(0.0, min(1.0, width_norm))
-                height_norm = max(0.0, min(1.0, height_norm))
-
-                new_lines.append(
-                    f"{class_id} {x_center_norm:.6f} {y_center_norm:.6f} {width_norm:.6f} {height_norm:.6f}\n")
-
-            # 保存修正后的标签
-            with open(label_path, 'w', encoding='utf-8') as f:
-                f.writelines(new_lines)
-            print(f"已修正：{label_path}（对应图片：{os.path.basename(img_path)}）")
+            totals['files'] += 1
+            totals['boxes'] += stats['boxes']
+            totals['out_of_range'] += stats['out_of_range']
+            totals['invalid'] += len(stats['invalid'])
+            totals['skipped'] += stats['skipped']
+            for line in stats['invalid']:
+                print(f"警告：{os.path.basename(stats['path'])} 中无效行 → {line}")
+            if stats['out_of_range']:
+                offenders.append((stats['out_of_range'], stats['path']))
+            if stats['ambiguous']:
+                ambiguous.append(stats['path'])
+
+    print(f"\n{'预检查（未修改文件）' if dry_run else '归一化完成'}：共{totals['files']}个标签文件，{totals['boxes']}个框；"
+          f"已是归一化坐标而跳过{totals['skipped']}个文件，无效行{totals['invalid']}条，图片读取失败{totals['errors']}个")
+    print(f"越界框：{totals['out_of_range']}个，分布在{len(offenders)}个文件中{'（已截断到0~1）' if not dry_run else ''}")
+    for count, path in sorted(offenders, reverse=True)[:REPORT_LIMIT]:
+        print(f"  {path}: {count}个越界框")
+    if ambiguous:
+        print(f"已是归一化坐标但有轻微越界（≤{1 + NORM_EPS}）的文件：{len(ambiguous)}个，"
+              f"{'将只截断，不会' if dry_run else '已截断，未'}除以图片尺寸，请确认：")
+        for path in sorted(ambiguous)[:REPORT_LIMIT]:
+            print(f"  {path}")
+    return totals
 
 
 # 使用示例（修改为您的数据集路径）
 if __name__ == "__main__":
-    normalize_labels(r"D:\Study\ultralytics-main\datasets")
\ No newline at end of file
+    # 可先用 dry_run=True 查看越界框报告，确认后再正式修改
+    normalize_labels(r"D:\Study\ultralytics-main\datasets")